@@ -0,0 +1,63 @@
+# scripts/bench_client_prewarm.py
+"""
+Benchmark first-call latency to the OpenAI API: a cold client (new connection, TLS handshake)
+vs the shared, prewarmed pool the server uses (src/services/clients.py).
+
+Each trial builds a fresh pool and times the first call on it, either right away ("cold") or after
+prewarm_clients() ("prewarmed"). The call is a model-list request (no tokens) or, with --tts,
+time to the first audio byte of a short sentence. Pool stats are printed after each mode.
+
+Usage: python scripts/bench_client_prewarm.py [--trials 5] [--tts]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+# Allow importing from src
+sys.path.append(os.getcwd())
+
+from src.core import control
+from src.services import clients
+
+async def first_call(tts: bool) -> float:
+    client = clients.get_openai_client()
+    start = time.perf_counter()
+    if tts:
+        async with client.audio.speech.with_streaming_response.create(
+            model=control.TTS_MODEL, voice=control.TTS_VOICE, input="Sure.", response_format="pcm"
+        ) as response:
+            async for _ in response.iter_bytes():
+                break
+    else:
+        await client.models.list()
+    return (time.perf_counter() - start) * 1000
+
+async def trial(prewarm: bool, tts: bool) -> float:
+    await clients.close_clients()  # New pool: no open connections
+    if prewarm:
+        await clients.prewarm_clients()
+    return await first_call(tts)
+
+async def run(trials: int, tts: bool):
+    print(f"HTTP/2: {clients.http2_enabled()}, first call: {'TTS first byte' if tts else 'models.list'}\n")
+    for mode, prewarm in (("cold", False), ("prewarmed", True)):
+        latencies = [await trial(prewarm, tts) for _ in range(trials)]
+        print(
+            f"{mode:<10} first call p50 {statistics.median(latencies):7.1f} ms   "
+            f"min {min(latencies):7.1f} ms   max {max(latencies):7.1f} ms"
+        )
+        print(f"{'':<10} pool: {clients.get_pool_stats()}")
+    await clients.close_clients()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare first-call latency with and without prewarming")
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--tts", action="store_true", help="Time the first TTS audio byte instead of models.list")
+    args = parser.parse_args()
+    asyncio.run(run(args.trials, args.tts))
+
+if __name__ == "__main__":
+    main()
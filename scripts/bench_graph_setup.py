@@ -0,0 +1,47 @@
+# scripts/bench_graph_setup.py
+"""
+Benchmark connection setup: per-connection build_graph (old) vs the shared compiled graph (new).
+Measures the time to set up the brain for one session and the memory retained per session.
+
+Usage: python scripts/bench_graph_setup.py [num_sessions]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+# Allow importing from src
+sys.path.append(os.getcwd())
+
+from langgraph.checkpoint.memory import MemorySaver
+from src.brain.graph import build_graph, brain_app
+
+def per_connection_setup(num_sessions: int) -> list:
+    """Old behaviour: every connection compiles its own graph with its own MemorySaver"""
+    return [build_graph(MemorySaver()) for _ in range(num_sessions)]
+
+def shared_setup(num_sessions: int) -> list:
+    """New behaviour: every connection only builds its run config"""
+    return [
+        (brain_app, {"configurable": {"thread_id": f"bench_{i}", "user_uuid": None}})
+        for i in range(num_sessions)
+    ]
+
+def measure(name: str, setup, num_sessions: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    sessions = setup(num_sessions)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:16} setup: {elapsed / num_sessions * 1000:8.3f} ms/session   "
+          f"memory: {current / num_sessions / 1024:8.1f} KiB/session")
+    return sessions
+
+if __name__ == "__main__":
+    num_sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print(f"--- Connection setup benchmark ({num_sessions} sessions) ---")
+    measure("per-connection", per_connection_setup, num_sessions)
+    measure("shared", shared_setup, num_sessions)
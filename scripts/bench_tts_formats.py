@@ -0,0 +1,88 @@
+# scripts/bench_tts_formats.py
+"""
+Benchmark TTS output formats: first-audio latency and bandwidth of mp3, pcm and opus.
+
+Synthesizes the same sentences through OpenAITTS.speak in each format (the path a voice
+session uses, including chunk framing) and reports, per format:
+- first audio: time until the first decodable chunk is yielded (what the client can start playing)
+- total: time until the sentence is fully streamed
+- bytes per sentence and bitrate (kbit/s of audio; durations come from the PCM run)
+
+Needs OPENAI_API_KEY; every sentence is synthesized `repeats` times per format (formats interleaved).
+
+Usage: python scripts/bench_tts_formats.py [--repeats 3] [--formats mp3,pcm,opus]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+# Allow importing from src
+sys.path.append(os.getcwd())
+
+from src.core import control
+from src.services.tts import OpenAITTS
+
+SENTENCES = [
+    "Sure, let me check that for you.",
+    "The Pro plan costs ninety-nine dollars a month and includes twenty hours of talk time.",
+    "We offer a thirty-day money-back guarantee if you are not satisfied with the latency.",
+    "Our support team is available Monday to Friday, nine to five Eastern time.",
+]
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+async def synthesize(tts: OpenAITTS, text: str) -> tuple[float, float, int]:
+    """(first chunk ms, total ms, bytes) for one sentence"""
+    start = time.perf_counter()
+    first = None
+    size = 0
+    async for chunk in tts.speak(text):
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+        size += len(chunk)
+    return first or 0.0, (time.perf_counter() - start) * 1000, size
+
+async def run(formats: list[str], repeats: int):
+    services = {f: OpenAITTS(audio_format=f) for f in formats}
+    results: dict[str, list[tuple[float, float, int]]] = {f: [] for f in formats}
+    durations: dict[str, float] = {}  # sentence -> seconds of audio (from PCM)
+    bytes_per_second = control.TTS_OUTPUT_SAMPLE_RATE * control.TTS_OUTPUT_CHANNELS * control.TTS_OUTPUT_BITS_PER_SAMPLE // 8
+
+    for _ in range(repeats):
+        for sentence in SENTENCES:
+            for f in formats:
+                first_ms, total_ms, size = await synthesize(services[f], sentence)
+                results[f].append((first_ms, total_ms, size))
+                if f == "pcm" and size:
+                    header = 44 if control.TTS_PCM_WAV_HEADER else 0
+                    durations[sentence] = (size - header) / bytes_per_second
+
+    audio_seconds = sum(durations.values()) * repeats
+    print(f"{len(SENTENCES)} sentences x {repeats} repeat(s), model {control.TTS_MODEL}, voice {control.TTS_VOICE}\n")
+    print(f"{'format':<8}{'first audio p50':>17}{'p95':>9}{'total p50':>12}{'bytes/sentence':>17}{'kbit/s':>9}")
+    for f in formats:
+        first = [r[0] for r in results[f]]
+        total = [r[1] for r in results[f]]
+        size = sum(r[2] for r in results[f])
+        kbps = f"{size * 8 / audio_seconds / 1000:.0f}" if audio_seconds else "n/a"
+        print(
+            f"{f:<8}{statistics.median(first):>14.0f} ms{percentile(first, 0.95):>6.0f} ms"
+            f"{statistics.median(total):>9.0f} ms{size / len(results[f]):>17,.0f}{kbps:>9}"
+        )
+    if not audio_seconds:
+        print("\n(add pcm to --formats to get audio durations for the bitrate column)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TTS output formats")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--formats", default="mp3,pcm,opus")
+    args = parser.parse_args()
+    asyncio.run(run(args.formats.split(","), args.repeats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# scripts/bench_vector_index.py
+"""
+Benchmark the local memory-mapped vector index against Pinecone.
+
+Builds float16 and int8 local indexes of random unit vectors at each size and measures
+top-k query latency (vector search only; embedding the query is excluded for both backends)
+and int8 recall against exact float32 search. With --pinecone it also times queries against
+the configured Pinecone index (whatever it currently holds: the script does not upload 1M rows).
+
+Disk needed per size: rows x dim x 2 bytes (float16) + rows x dim bytes (int8), e.g. ~4.6 GB at 1M x 1536.
+
+Usage: python scripts/bench_vector_index.py [--sizes 10000,100000,1000000] [--dim 1536] [--queries 50] [--pinecone]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+# Allow importing from src
+sys.path.append(os.getcwd())
+
+from src.brain.local_index import LocalVectorIndex
+
+USER = "bench-user"
+BATCH_ROWS = 50_000
+
+def random_unit_vectors(rng, rows: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def build_index(root: str, dtype: str, size: int, dim: int, seed: int) -> float:
+    """Append `size` rows in batches; returns rows/second."""
+    index = LocalVectorIndex(root, dtype=dtype)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for offset in range(0, size, BATCH_ROWS):
+        rows = min(BATCH_ROWS, size - offset)
+        vectors = random_unit_vectors(rng, rows, dim)
+        ids = [f"chunk-{offset + i}" for i in range(rows)]
+        index.add(vectors, [""] * rows, [{"user_uuid": USER}] * rows, ids)
+    return size / (time.perf_counter() - start)
+
+def time_queries(search, queries: np.ndarray, k: int) -> tuple[float, float]:
+    search(queries[0], k)  # Warm the page cache / connection
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query, k)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+def int8_recall(root: str, size: int, dim: int, seed: int, queries: np.ndarray, k: int) -> float:
+    """Overlap of int8 top-k with exact float32 top-k (regenerates the same vectors from the seed)."""
+    rng = np.random.default_rng(seed)
+    exact = np.concatenate([random_unit_vectors(rng, min(BATCH_ROWS, size - o), dim) for o in range(0, size, BATCH_ROWS)])
+    index = LocalVectorIndex(root, dtype="int8")
+    hits = 0
+    for query in queries:
+        truth = set(np.argsort(-(exact @ query))[:k].tolist())
+        found = {int(record["id"].split("-")[1]) for record, _ in index.search(query, k, {"user_uuid": USER})}
+        hits += len(truth & found)
+    return hits / (len(queries) * k)
+
+def bench_pinecone(queries: np.ndarray, k: int):
+    from src.brain.retriever import _get_vectorstore
+    from src.core import control
+    if control.VECTOR_BACKEND != "pinecone":
+        print("pinecone: skipped (control.VECTOR_BACKEND is not 'pinecone')")
+        return
+    try:
+        vectorstore = _get_vectorstore()
+        rows = vectorstore.index.describe_index_stats().get("total_vector_count", "?")  # type: ignore
+        p50, p95 = time_queries(
+            lambda q, k: vectorstore.similarity_search_by_vector_with_score(q.tolist(), k=k),  # type: ignore
+            queries, k
+        )
+    except Exception as e:
+        print(f"pinecone: failed ({e.__class__.__name__}: {e})")
+        return
+    print(f"{'pinecone':8} rows: {rows:>9}   p50: {p50:8.2f} ms   p95: {p95:8.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local vector index vs Pinecone")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--dir", default=None, help="Where to build the indexes (default: a temp dir)")
+    parser.add_argument("--pinecone", action="store_true", help="Also time the configured Pinecone index")
+    args = parser.parse_args()
+
+    queries = random_unit_vectors(np.random.default_rng(0), args.queries, args.dim)
+    print(f"--- Vector search benchmark (dim={args.dim}, k={args.k}, {args.queries} queries) ---")
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        print(f"\n{size:,} chunks")
+        for dtype in ("float16", "int8"):
+            root = tempfile.mkdtemp(prefix=f"chronos_{dtype}_", dir=args.dir)
+            try:
+                rate = build_index(root, dtype, size, args.dim, seed=size)
+                index = LocalVectorIndex(root, dtype=dtype)
+                p50, p95 = time_queries(lambda q, k: index.search(q, k, {"user_uuid": USER}), queries, args.k)
+                print(f"{dtype:8} ingest: {rate:9,.0f} rows/s   p50: {p50:8.2f} ms   p95: {p95:8.2f} ms")
+                if dtype == "int8" and size <= 100_000:
+                    recall = int8_recall(root, size, args.dim, size, queries[:10], args.k)
+                    print(f"{'':8} recall@{args.k} vs float32: {recall:.3f}")
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+
+    if args.pinecone:
+        print()
+        bench_pinecone(queries, args.k)
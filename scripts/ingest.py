@@ -1,49 +1,193 @@
+# scripts/ingest.py
+"""
+Bulk ingestion of a directory tree into the knowledge base (customer onboarding).
+
+Walks the directory for supported files, parses and chunks them in a process pool with the
+same code as uploads (src/ingestion), and streams the chunks through the batched,
+rate-limit-aware embedder and upsert of the ingestion worker. Files identical to documents
+already ingested for the user, and chunks the user already has, are skipped (document registry).
+
+Every finished file is appended to a checkpoint (JSON lines), so an interrupted run started
+again with the same arguments continues where it stopped. Files that changed since (size or
+mtime) and files that failed are ingested again. Progress is reported in files, chunks and
+tokens per second.
+
+Usage: python scripts/ingest.py DIRECTORY [--user-uuid UUID] [--checkpoint data/ingest_checkpoint.jsonl]
+                                [--parse-workers N] [--files-in-flight N] [--reset] [--no-registry]
+"""
 import os
 import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Optional
 
 # Allow importing from src
 sys.path.append(os.getcwd())
 
-from langchain_pinecone import PineconeVectorStore
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.documents import Document
-from src.core.config import settings
-
-def ingest_data():
-    print("--- 1. Loading Knowledge ---")
-    text_content = """
-    Chronos Voice AI Pricing:
-    - Basic Plan: $29/month. Includes 5 hours of talk time.
-    - Pro Plan: $99/month. Includes 20 hours of talk time and custom voices.
-    - Enterprise: Contact sales. Includes unlimited talk time and on-premise deployment.
-    
-    Refund Policy:
-    We offer a 30-day money-back guarantee if you are not satisfied with the latency.
-    
-    Support Hours:
-    Our support team is available Monday to Friday, 9 AM to 5 PM EST.
-    """
-    
-    docs = [Document(page_content=text_content, metadata={"source": "pricing_sheet"})]
-
-    print("--- 2. Creating Embeddings ---")
-    # FIX: Pass the API key explicitly here
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        api_key=settings.OPENAI_API_KEY # type: ignore
-    )
-
-    print(f"--- 3. Uploading to Pinecone ({settings.PINECONE_INDEX_NAME}) ---")
-    # To be safe, we set the env var for this process:
-    os.environ["PINECONE_API_KEY"] = settings.PINECONE_API_KEY # type: ignore
-    
-    PineconeVectorStore.from_documents(
-        docs, 
-        embeddings, 
-        index_name=settings.PINECONE_INDEX_NAME
-    )
-    
-    print("✅ Success! The bot now knows the pricing.")
+from src.core import control
+from src.ingestion import pipeline
+from src.ingestion.embedder import BatchEmbedder
+from src.ingestion.parsing import SUPPORTED_EXTENSIONS, shutdown_parse_pool
+from src.ingestion.registry import DocumentRegistry
+
+DEFAULT_CHECKPOINT = "data/ingest_checkpoint.jsonl"
+REPORT_SECONDS = 5.0
+
+def find_files(root: str) -> list[str]:
+    """Supported files under root, in a stable order (hidden directories skipped)."""
+    paths = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if not d.startswith("."))
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                paths.append(os.path.abspath(os.path.join(directory, name)))
+    return paths
+
+def file_key(path: str, user_uuid: Optional[str]) -> dict:
+    stat = os.stat(path)
+    return {"path": path, "user_uuid": user_uuid, "size": stat.st_size, "mtime": stat.st_mtime}
+
+class Checkpoint:
+    """Append-only record of finished files; the last line for a file wins."""
+
+    def __init__(self, path: str, reset: bool = False):
+        self.path = path
+        self.done: dict[tuple, dict] = {}
+        if reset and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            with open(path, "rb+") as f:
+                data = f.read()
+                # Drop a last line cut short by the interruption, so new records start on their own line
+                if not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+            for line in data.decode("utf-8", errors="replace").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # The cut-off last line
+                self.done[(entry["path"], entry["user_uuid"])] = entry
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def is_done(self, key: dict) -> bool:
+        entry = self.done.get((key["path"], key["user_uuid"]))
+        return (
+            entry is not None and entry["status"] == "done"
+            and entry["size"] == key["size"] and entry["mtime"] == key["mtime"]
+        )
+
+    def record(self, key: dict, **values):
+        entry = {**key, **values}
+        self.done[(key["path"], key["user_uuid"])] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class Stats:
+    def __init__(self, total_files: int, embedder: BatchEmbedder):
+        self.total_files = total_files
+        self.embedder = embedder
+        self.files = self.failed = self.chunks = self.skipped = 0
+        self.start = time.perf_counter()
+
+    def line(self) -> str:
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return (
+            f"[{self.files + self.failed}/{self.total_files} files] "
+            f"{self.files / elapsed:.2f} files/s | "
+            f"{self.embedder.chunks_embedded / elapsed:.1f} chunks/s | "
+            f"{self.embedder.tokens_embedded / elapsed:,.0f} tokens/s | "
+            f"{self.embedder.chunks_embedded} chunks embedded, {self.skipped} skipped, {self.failed} failed files"
+        )
+
+async def ingest_one(path: str, root: str, key: dict, registry, embedder, checkpoint: Checkpoint, stats: Stats):
+    counts = {}
+
+    async def progress(**values):
+        counts.update(values)
+
+    source = os.path.relpath(path, root)
+    metadata = {"source": source, "file_type": os.path.splitext(path)[1].lower()}
+    if key["user_uuid"]:
+        metadata["user_uuid"] = key["user_uuid"]
+    try:
+        chunks = await pipeline.ingest_file(
+            path, metadata["file_type"], metadata, progress, registry=registry, embedder=embedder
+        )
+    except Exception as e:
+        stats.failed += 1
+        checkpoint.record(key, status="failed", error=str(e))
+        print(f"❌ {source}: {e}")
+        return
+    stats.files += 1
+    stats.chunks += chunks
+    stats.skipped += counts.get("chunks_skipped", 0)
+    checkpoint.record(key, status="done", chunks=chunks, chunks_skipped=counts.get("chunks_skipped", 0))
+
+async def report(stats: Stats):
+    while True:
+        await asyncio.sleep(REPORT_SECONDS)
+        print(stats.line())
+
+async def ingest_directory(args) -> Stats:
+    root = os.path.abspath(args.directory)
+    paths = find_files(root)
+    checkpoint = Checkpoint(args.checkpoint, reset=args.reset)
+    keys = [file_key(path, args.user_uuid) for path in paths]
+    pending = [(path, key) for path, key in zip(paths, keys) if not checkpoint.is_done(key)]
+    print(f"📂 {root}: {len(paths)} supported file(s), {len(paths) - len(pending)} already ingested (checkpoint)")
+
+    registry = None
+    if not args.no_registry:
+        from src.db.database import init_db
+        await init_db()
+        registry = DocumentRegistry()
+
+    # One embedder for all files, so they share batching concurrency and rate-limit backoff
+    embedder = BatchEmbedder.from_control(pipeline._get_ingestion_embeddings())
+    stats = Stats(len(pending), embedder)
+    # Enough files in flight to keep the parse pool and the embedding requests busy
+    slots = asyncio.Semaphore(args.files_in_flight)
+
+    async def run(path: str, key: dict):
+        async with slots:
+            await ingest_one(path, root, key, registry, embedder, checkpoint, stats)
+
+    reporter = asyncio.create_task(report(stats))
+    try:
+        await asyncio.gather(*(run(path, key) for path, key in pending))
+    finally:
+        reporter.cancel()
+        checkpoint.close()
+        shutdown_parse_pool()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a directory tree into the knowledge base")
+    parser.add_argument("directory")
+    parser.add_argument("--user-uuid", default=None, help="Owner of the documents (default: shared, no user)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--reset", action="store_true", help="Forget the checkpoint and start over")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--files-in-flight", type=int, default=None, help="Default: 2 x parse workers")
+    parser.add_argument("--no-registry", action="store_true", help="No database: no file/chunk de-duplication")
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+
+    # The pool is created on first use, with the CLI's size rather than the API's
+    control.PARSE_MAX_WORKERS = args.parse_workers
+    args.files_in_flight = args.files_in_flight or 2 * args.parse_workers
+
+    stats = asyncio.run(ingest_directory(args))
+    print(stats.line())
+    print(f"✅ Done: {stats.files} file(s) ingested ({stats.chunks} chunks), {stats.failed} failed")
+    sys.exit(1 if stats.failed else 0)
 
 if __name__ == "__main__":
-    ingest_data()
\ No newline at end of file
+    main()
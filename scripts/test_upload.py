@@ -4,8 +4,19 @@ Test script for the file upload endpoint
 Usage: python scripts/test_upload.py <file_path>
 """
 import sys
+import time
 import requests
 
+def wait_for_job(status_url: str, base_url: str):
+    """Poll an ingestion job until it finishes and print per-file progress"""
+    while True:
+        job = requests.get(f"{base_url}{status_url}").json()
+        progress = ", ".join(f"{f['filename']}: {f['status']} {f['chunks_upserted']}/{f['chunks_total']}" for f in job["files"])
+        print(f"   [{job['status']}] {progress}")
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(1)
+
 def upload_file(file_path: str, base_url: str = "http://localhost:8026"):
     """Upload a file to the Chronos API"""
     
@@ -16,12 +27,11 @@ def upload_file(file_path: str, base_url: str = "http://localhost:8026"):
             files = {"file": (file_path.split("\\")[-1], f)}
             response = requests.post(endpoint, files=files)
         
-        if response.status_code == 200:
+        if response.status_code == 202:
             result = response.json()
-            print("✅ Upload Successful!")
-            print(f"   Filename: {result['filename']}")
-            print(f"   Documents Processed: {result['documents_processed']}")
-            print(f"   Index: {result['index']}")
+            print(f"✅ Upload Queued! Job: {result['job_id']}")
+            job = wait_for_job(result['status_url'], base_url)
+            print(f"   Chunks Ingested: {job['total_chunks_ingested']} ({job['total_chunks_skipped']} already indexed)")
         else:
             print(f"❌ Upload Failed!")
             print(f"   Status Code: {response.status_code}")
@@ -51,15 +61,15 @@ def upload_multiple_files(file_paths: list, base_url: str = "http://localhost:80
         for _, file_tuple in files:
             file_tuple[1].close()
         
-        if response.status_code == 200:
+        if response.status_code == 202:
             result = response.json()
-            print("✅ Batch Upload Successful!")
-            print(f"   Total Documents Ingested: {result['total_documents_ingested']}")
-            print(f"   Index: {result['index']}")
+            print(f"✅ Batch Upload Queued! Job: {result['job_id']}")
+            job = wait_for_job(result['status_url'], base_url)
+            print(f"   Total Chunks Ingested: {job['total_chunks_ingested']} ({job['total_chunks_skipped']} already indexed)")
             print("\n   File Details:")
-            for file_result in result['files']:
-                status = "✅" if file_result['status'] == 'processed' else "❌"
-                print(f"   {status} {file_result['filename']}: {file_result.get('documents_extracted', 'N/A')} docs")
+            for file_result in job['files']:
+                status = "✅" if file_result['status'] == 'upserted' else "❌"
+                print(f"   {status} {file_result['filename']}: {file_result['chunks_upserted']} chunks {file_result['error'] or ''}")
         else:
             print(f"❌ Upload Failed!")
             print(f"   Status Code: {response.status_code}")
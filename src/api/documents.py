@@ -0,0 +1,69 @@
+# src/api/documents.py
+import logging
+from uuid import UUID
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.api.deps import get_current_active_user
+from src.api.upload import check_extension, check_size, check_ingestion_config, enqueue_upload
+from src.db.database import get_db
+from src.db import crud
+from src.db.models import User, SourceDocument
+from src.ingestion.pipeline import delete_document
+from src.ingestion.registry import DocumentRegistry
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+def document_to_dict(document: SourceDocument) -> dict:
+    return {
+        "document_id": str(document.id),
+        "filename": document.filename,
+        "file_type": document.file_type,
+        "content_hash": document.content_hash,
+        "chunks": document.chunk_count,
+        "created_at": document.created_at.isoformat(),
+        "updated_at": document.updated_at.isoformat(),
+    }
+
+@router.get("/documents", tags=["Documents"])
+async def list_documents(
+    limit: int = 100,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """The current user's ingested documents, most recently updated first"""
+    documents = await crud.list_documents(db, current_user.id, limit=min(limit, 500))  # type: ignore
+    return {"documents": [document_to_dict(d) for d in documents]}
+
+@router.delete("/documents/{document_id}", tags=["Documents"])
+async def delete_user_document(
+    document_id: UUID,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Delete a document: its vectors are batch-deleted from the vector store and BM25 index
+    (chunks shared with another of the user's documents are kept), then its registry entry.
+    """
+    deleted = await delete_document(DocumentRegistry(), document_id, str(current_user.id))
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"status": "deleted", "document_id": str(document_id), "chunks_deleted": deleted}
+
+@router.put("/documents/{document_id}", status_code=202, tags=["Documents"])
+async def replace_document(
+    document_id: UUID,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload a new version of a document. Queued like an upload (202 + job id); the worker
+    embeds only changed chunks and deletes the vectors of removed ones.
+    """
+    check_ingestion_config()
+    check_extension(file.filename)  # type: ignore
+    check_size(file)
+    if await crud.get_document(db, document_id, user_id=current_user.id) is None:  # type: ignore
+        raise HTTPException(status_code=404, detail="Document not found")
+    logger.info(f"📤 Received new version of document {document_id}: {file.filename} from user: {current_user.id}")
+    return await enqueue_upload([file], current_user, db, replaces=document_id)
@@ -1,21 +1,21 @@
 # src/api/upload.py
 import os
+import uuid
+import hashlib
+import asyncio
 import logging
-from typing import List
+from typing import BinaryIO, List
+from uuid import UUID
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from langchain_pinecone import PineconeVectorStore
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.documents import Document
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    Docx2txtLoader,
-    UnstructuredMarkdownLoader,
-)
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.config import settings
+from src.core import control
+from src.ingestion.parsing import SUPPORTED_EXTENSIONS
 from src.api.deps import get_current_active_user
-from src.db.models import User
+from src.db.database import get_db
+from src.db import crud
+from src.db.models import User, IngestionJob
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -23,210 +23,221 @@ router = APIRouter()
 # Ensure Pinecone API key is set
 os.environ["PINECONE_API_KEY"] = settings.PINECONE_API_KEY # type: ignore
 
-def get_embeddings():
-    """Get OpenAI embeddings instance"""
-    return OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        api_key=settings.OPENAI_API_KEY # type: ignore
-    )
+MB = 1024 * 1024
+COPY_CHUNK_BYTES = MB
 
-async def process_file(file: UploadFile, user_uuid: str) -> List[Document]:
+def check_extension(filename: str) -> str:
+    """Lower-cased extension of a supported upload; 400 otherwise"""
+    file_extension = os.path.splitext(filename)[1].lower()
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type: {file_extension}. Supported: .pdf, .txt, .md, .docx"
+        )
+    return file_extension
+
+def check_size(file: UploadFile):
+    """413 for a file over UPLOAD_MAX_FILE_MB (size is known once the multipart body is parsed)"""
+    if file.size is not None and file.size > control.UPLOAD_MAX_FILE_MB * MB:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large: {file.size // MB} MB. Maximum: {control.UPLOAD_MAX_FILE_MB} MB"
+        )
+
+async def spool_files(files: List[UploadFile]) -> list[dict]:
     """
-    Process uploaded file and extract documents
-    Supports: PDF, TXT, MD, DOCX
+    Save uploads under INGESTION_UPLOAD_DIR/<spool id>/ until an ingestion worker picks them up.
+    Returns the file rows of the ingestion job (unsupported or oversized files are recorded as failed).
     """
-    # Create temp directory if it doesn't exist
-    temp_dir = "temp_uploads"
-    os.makedirs(temp_dir, exist_ok=True)
+    spool_dir = os.path.join(control.INGESTION_UPLOAD_DIR, str(uuid.uuid4()))
+    os.makedirs(spool_dir, exist_ok=True)
     
-    # Save file temporarily
-    file_path = os.path.join(temp_dir, file.filename) # type: ignore
-    
-    try:
-        # Write uploaded file to disk
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Determine file type and load accordingly
-        file_extension = os.path.splitext(file.filename)[1].lower()    # type: ignore
-        
-        if file_extension == ".pdf":
-            loader = PyPDFLoader(file_path)
-        elif file_extension == ".txt":
-            loader = TextLoader(file_path, encoding="utf-8")
-        elif file_extension == ".md":
-            loader = UnstructuredMarkdownLoader(file_path)
-        elif file_extension in [".docx", ".doc"]:
-            loader = Docx2txtLoader(file_path)
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {file_extension}. Supported: .pdf, .txt, .md, .docx"
-            )
-        
-        # Load and split documents
-        documents = loader.load()
-        
-        # Add metadata including user UUID
-        for doc in documents:
-            doc.metadata["source"] = file.filename
-            doc.metadata["file_type"] = file_extension
-            doc.metadata["user_uuid"] = user_uuid
-        
-        return documents
-    
-    finally:
-        # Clean up temp file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    spooled = []
+    for position, file in enumerate(files):
+        # Stored by position in a per-request directory, so two uploads of "report.pdf" never collide
+        file_path = ""
+        try:
+            file_extension = check_extension(file.filename)  # type: ignore
+            check_size(file)
+            file_path = os.path.join(spool_dir, f"{position}{file_extension}")
+            content_hash = await asyncio.to_thread(_copy_upload, file.file, file_path, control.UPLOAD_MAX_FILE_MB * MB)
+        except HTTPException as e:
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+            spooled.append({"filename": file.filename, "file_type": "", "storage_path": "", "status": "failed", "error": e.detail})
+            continue
+        spooled.append({
+            "filename": file.filename, "file_type": file_extension,
+            "storage_path": file_path, "content_hash": content_hash
+        })
+    return spooled
 
-async def ingest_to_pinecone(documents: List[Document]) -> int:
+def _copy_upload(source: BinaryIO, file_path: str, max_bytes: int) -> str:
     """
-    Ingest documents into Pinecone vector store
-    Returns number of documents ingested
+    Copy an upload to disk in COPY_CHUNK_BYTES pieces (memory stays flat whatever the file size).
+    Starlette has already spooled the request body to a temp file; this never reads it whole.
+    Returns the sha256 of the content (identical re-uploads are skipped at ingestion).
     """
-    embeddings = get_embeddings()
-    
-    PineconeVectorStore.from_documents(
-        documents,
-        embeddings,
-        index_name=settings.PINECONE_INDEX_NAME
-    )
+    source.seek(0)
+    written = 0
+    digest = hashlib.sha256()
+    with open(file_path, "wb") as f:
+        while chunk := source.read(COPY_CHUNK_BYTES):
+            written += len(chunk)
+            if written > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File too large. Maximum: {max_bytes // MB} MB")
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects upload requests over `max_bytes` with 413 before their body is parsed:
+    at once from Content-Length, or as soon as a chunked body grows past the limit.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefixes: tuple[str, ...] = ("/api/upload", "/api/documents")):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT") or not scope["path"].startswith(self.path_prefixes):
+            return await self.app(scope, receive, send)
+        
+        detail = f"Upload too large. Maximum: {self.max_bytes // MB} MB per request"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": detail})
+            return await response(scope, receive, send)
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside body parsing; FastAPI turns it into the 413 response
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+def check_ingestion_config():
+    """Ingestion needs the embedding (and Pinecone) keys; fail at upload time, not in the worker"""
+    if not settings.OPENAI_API_KEY or (control.VECTOR_BACKEND == "pinecone" and not settings.PINECONE_API_KEY):
+        raise HTTPException(
+            status_code=500,
+            detail="Missing PINECONE_API_KEY or OPENAI_API_KEY in configuration"
+        )
+
+def job_to_dict(job: IngestionJob) -> dict:
+    """Job status with per-file progress (parsed -> chunked -> embedded -> upserted)"""
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "attempts": job.attempts,
+        "total_chunks_ingested": sum(f.chunks_upserted for f in job.files),
+        # Chunks already in the user's index (re-uploads): not embedded or upserted again
+        "total_chunks_skipped": sum(f.chunks_skipped for f in job.files),
+        "files": [
+            {
+                "filename": f.filename,
+                "status": f.status,
+                "pages": f.pages,
+                "chunks_total": f.chunks_total,
+                "chunks_embedded": f.chunks_embedded,
+                "chunks_upserted": f.chunks_upserted,
+                "chunks_skipped": f.chunks_skipped,
+                "chunks_deleted": f.chunks_deleted,
+                "chunks_per_second": f.chunks_per_second,
+                "document_id": str(f.document_id) if f.document_id else None,
+                "error": f.error,
+            }
+            for f in job.files
+        ],
+    }
+
+async def enqueue_upload(
+    files: List[UploadFile], user: User, db: AsyncSession, replaces: UUID | None = None
+) -> JSONResponse:
+    """
+    Spool the files, queue one ingestion job for them and answer 202 with its id.
+    `replaces`: the (single) file is a new version of that registered document.
+    """
+    spooled = await spool_files(files)
+    if replaces is not None:
+        for f in spooled:
+            f["replaces_document_id"] = replaces
+    if all(f.get("status") == "failed" for f in spooled):
+        raise HTTPException(status_code=400, detail="No supported files in the upload")
+    job = await crud.create_ingestion_job(db, user.id, spooled)  # type: ignore
+    logger.info(f"📥 Queued ingestion job {job.id}: {len(spooled)} file(s) from user: {user.id}")
     
-    return len(documents)
+    content = job_to_dict(job)
+    content["status_url"] = f"/api/upload/jobs/{job.id}"
+    return JSONResponse(status_code=202, content=content)
 
-@router.post("/upload", tags=["Upload"])
+@router.post("/upload", status_code=202, tags=["Upload"])
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Upload a file and automatically ingest it into Pinecone vector store.
+    Upload a file and queue it for ingestion into the vector store.
+    Returns 202 with a job id at once; poll GET /api/upload/jobs/{job_id} for progress.
     
     Supported file types: PDF, TXT, MD, DOCX
     Requires authentication.
     """
-    try:
-        logger.info(f"📤 Received file: {file.filename} from user: {current_user.id}")
-        
-        # Validate Pinecone configuration
-        if not settings.PINECONE_API_KEY or not settings.OPENAI_API_KEY:
-            raise HTTPException(
-                status_code=500,
-                detail="Missing PINECONE_API_KEY or OPENAI_API_KEY in configuration"
-            )
-        
-        # Process the file with user UUID
-        logger.info(f"📄 Processing file: {file.filename}")
-        documents = await process_file(file, str(current_user.id))
-        
-        if not documents:
-            raise HTTPException(
-                status_code=400,
-                detail="No content could be extracted from the file"
-            )
-        
-        logger.info(f"📝 Extracted {len(documents)} document(s)")
-        
-        # Ingest to Pinecone
-        logger.info(f"🚀 Ingesting to Pinecone index: {settings.PINECONE_INDEX_NAME}")
-        num_ingested = await ingest_to_pinecone(documents)
-        
-        logger.info(f"✅ Successfully ingested {num_ingested} document(s)")
-        
-        return JSONResponse(
-            status_code=200,
-            content={
-                "status": "success",
-                "message": f"File '{file.filename}' successfully uploaded and ingested",
-                "filename": file.filename,
-                "documents_processed": num_ingested,
-                "index": settings.PINECONE_INDEX_NAME
-            }
-        )
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"❌ Error processing file: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error processing file: {str(e)}"
-        )
+    logger.info(f"📤 Received file: {file.filename} from user: {current_user.id}")
+    check_ingestion_config()
+    check_extension(file.filename)  # type: ignore
+    check_size(file)
+    return await enqueue_upload([file], current_user, db)
 
-@router.post("/upload/batch", tags=["Upload"])
+@router.post("/upload/batch", status_code=202, tags=["Upload"])
 async def upload_files_batch(
     files: List[UploadFile] = File(...),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Upload multiple files and automatically ingest them into Pinecone vector store.
+    Upload multiple files and queue them for ingestion as one job.
+    Returns 202 with a job id at once; poll GET /api/upload/jobs/{job_id} for per-file progress.
     
     Supported file types: PDF, TXT, MD, DOCX
     Requires authentication.
     """
-    try:
-        logger.info(f"📤 Received {len(files)} file(s) from user: {current_user.id}")
-        
-        # Validate Pinecone configuration
-        if not settings.PINECONE_API_KEY or not settings.OPENAI_API_KEY:
-            raise HTTPException(
-                status_code=500,
-                detail="Missing PINECONE_API_KEY or OPENAI_API_KEY in configuration"
-            )
-        
-        all_documents = []
-        file_results = []
-        
-        # Process all files
-        for file in files:
-            try:
-                logger.info(f"📄 Processing file: {file.filename}")
-                documents = await process_file(file, str(current_user.id))
-                all_documents.extend(documents)
-                
-                file_results.append({
-                    "filename": file.filename,
-                    "status": "processed",
-                    "documents_extracted": len(documents)
-                })
-            except Exception as e:
-                logger.error(f"❌ Error processing {file.filename}: {e}")
-                file_results.append({
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": str(e)
-                })
-        
-        if not all_documents:
-            raise HTTPException(
-                status_code=400,
-                detail="No content could be extracted from any files"
-            )
-        
-        # Ingest all documents to Pinecone
-        logger.info(f"🚀 Ingesting {len(all_documents)} document(s) to Pinecone")
-        num_ingested = await ingest_to_pinecone(all_documents)
-        
-        logger.info(f"✅ Successfully ingested {num_ingested} document(s)")
-        
-        return JSONResponse(
-            status_code=200,
-            content={
-                "status": "success",
-                "message": f"Successfully processed {len(files)} file(s)",
-                "total_documents_ingested": num_ingested,
-                "index": settings.PINECONE_INDEX_NAME,
-                "files": file_results
-            }
-        )
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"❌ Error processing files: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error processing files: {str(e)}"
-        )
+    logger.info(f"📤 Received {len(files)} file(s) from user: {current_user.id}")
+    check_ingestion_config()
+    return await enqueue_upload(files, current_user, db)
+
+@router.get("/upload/jobs/{job_id}", tags=["Upload"])
+async def get_upload_job(
+    job_id: UUID,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Status and per-file progress of one of the current user's ingestion jobs"""
+    job = await crud.get_ingestion_job(db, job_id, user_id=current_user.id)  # type: ignore
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job_to_dict(job)
+
+@router.get("/upload/jobs", tags=["Upload"])
+async def list_upload_jobs(
+    limit: int = 20,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """The current user's most recent ingestion jobs"""
+    jobs = await crud.list_ingestion_jobs(db, current_user.id, limit=min(limit, 100))  # type: ignore
+    return {"jobs": [job_to_dict(job) for job in jobs]}
@@ -11,6 +11,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.services.asr import DeepgramASR
 from src.services.llm import OpenAILLM
 from src.services.tts import OpenAITTS
+from src.services.audio import AUDIO_FORMATS
+from src.services.filler import get_filler_bank
+from src.core import control
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -20,6 +23,7 @@ async def websocket_endpoint(
     websocket: WebSocket, 
     session_id: str = Query(..., description="Client generated ID"),
     token: str | None = Query(None, description="Optional JWT token for authentication"),
+    audio_format: str | None = Query(None, description="TTS audio format: mp3, pcm or opus (default: server config)"),
     db: AsyncSession = Depends(get_db)
 ):
     # Optional Authentication
@@ -41,7 +45,10 @@ async def websocket_endpoint(
     asr_service = DeepgramASR()
     # Pass user_id as string to LLM for user-specific document retrieval
     llm_service = OpenAILLM(thread_id=session_id, user_uuid=str(user_id) if user_id else None)
-    tts_service = OpenAITTS()
+    if audio_format not in (None, *AUDIO_FORMATS):
+        logger.warning(f"Unsupported audio format {audio_format!r} for session {session_id}; using the default")
+        audio_format = None
+    tts_service = OpenAITTS(audio_format=audio_format)
 
     manager = ConnectionManager(
         websocket=websocket,
@@ -49,7 +56,8 @@ async def websocket_endpoint(
         llm=llm_service,
         tts=tts_service,
         user_id=user_id,
-        session_id=session_id
+        session_id=session_id,
+        fillers=get_filler_bank() if control.ENABLE_FILLER_AUDIO else None
     )
 
     try:
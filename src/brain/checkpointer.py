@@ -0,0 +1,182 @@
+import time
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Sequence
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+from src.core import metrics
+
+logger = logging.getLogger(__name__)
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    In-memory checkpointer with bounded growth.
+
+    - Prunes superseded checkpoints: only the latest `keep_checkpoints` per thread are kept,
+      together with their pending writes and the channel blobs they reference
+    - Evicts whole threads LRU-first when over `max_threads` or `max_bytes`
+    - Evicts threads idle for longer than `ttl_seconds`
+    - `release(thread_id)` drops a thread explicitly (e.g. when its WebSocket closes)
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 10_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        keep_checkpoints: int = 1
+    ):
+        super().__init__()
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.keep_checkpoints = max(1, keep_checkpoints)
+
+        # thread_id -> last access (time.monotonic), least recently used first
+        self._threads: OrderedDict[str, float] = OrderedDict()
+        self._thread_bytes: dict[str, int] = {}
+        # Per-thread key index so dropping a thread does not scan every write/blob
+        self._blob_keys: defaultdict[str, set] = defaultdict(set)
+        self._write_keys: defaultdict[str, set] = defaultdict(set)
+
+        self.total_bytes = 0
+        self.pruned_checkpoints = 0
+        self.evictions = {"lru": 0, "bytes": 0, "ttl": 0, "released": 0}
+
+    # --- Checkpointer API ---
+    def get_tuple(self, config: RunnableConfig):
+        self._sweep_expired()
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id in self._threads:
+            self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(self, config: RunnableConfig, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        for channel, version in new_versions.items():
+            self._blob_keys[thread_id].add((thread_id, checkpoint_ns, channel, version))
+
+        result = super().put(config, checkpoint, metadata, new_versions)
+
+        self._prune(thread_id, checkpoint_ns)
+        self._after_write(thread_id)
+        return result
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = ""):
+        super().put_writes(config, writes, task_id, task_path)
+
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        self._write_keys[thread_id].add((thread_id, checkpoint_ns, config["configurable"]["checkpoint_id"]))
+        self._after_write(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._drop(thread_id, "released")
+
+    # --- Public helpers ---
+    def release(self, thread_id: str) -> None:
+        """Drop all state for a finished session."""
+        self._drop(thread_id, "released")
+
+    def get_stats(self) -> dict:
+        return {
+            "threads": len(self._threads),
+            "bytes": self.total_bytes,
+            "max_threads": self.max_threads,
+            "max_bytes": self.max_bytes,
+            "pruned_checkpoints": self.pruned_checkpoints,
+            "evictions": dict(self.evictions)
+        }
+
+    # --- Internals ---
+    def _touch(self, thread_id: str):
+        self._threads[thread_id] = time.monotonic()
+        self._threads.move_to_end(thread_id)
+
+    def _after_write(self, thread_id: str):
+        self._account(thread_id)
+        self._touch(thread_id)
+        self._enforce_limits(protect=thread_id)
+        metrics.CHECKPOINT_THREADS.set(len(self._threads))
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Keep only the newest checkpoints of a thread, their writes and referenced blobs."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) > self.keep_checkpoints:
+            # Checkpoint ids are uuid6, so they sort chronologically
+            for checkpoint_id in sorted(checkpoints)[:-self.keep_checkpoints]:
+                del checkpoints[checkpoint_id]
+                self.pruned_checkpoints += 1
+
+        # Writes for checkpoints that no longer exist (including late writes)
+        for key in [k for k in self._write_keys[thread_id] if k[1] == checkpoint_ns and k[2] not in checkpoints]:
+            self.writes.pop(key, None)
+            self._write_keys[thread_id].discard(key)
+
+        # Channel blobs not referenced by any kept checkpoint
+        referenced = set()
+        for saved_checkpoint, _, _ in checkpoints.values():
+            versions = self.serde.loads_typed(saved_checkpoint).get("channel_versions", {})
+            referenced.update((thread_id, checkpoint_ns, ch, ver) for ch, ver in versions.items())
+        for key in [k for k in self._blob_keys[thread_id] if k[1] == checkpoint_ns and k not in referenced]:
+            self.blobs.pop(key, None)
+            self._blob_keys[thread_id].discard(key)
+
+    def _account(self, thread_id: str):
+        """Recompute the serialized size of one thread."""
+        size = 0
+        for checkpoints in self.storage.get(thread_id, {}).values():
+            for saved_checkpoint, saved_metadata, _ in checkpoints.values():
+                size += len(saved_checkpoint[1]) + len(saved_metadata[1])
+        for key in self._write_keys.get(thread_id, ()):
+            for write in self.writes.get(key, {}).values():
+                size += len(write[2][1])
+        for key in self._blob_keys.get(thread_id, ()):
+            if key in self.blobs:
+                size += len(self.blobs[key][1])
+
+        self.total_bytes += size - self._thread_bytes.get(thread_id, 0)
+        self._thread_bytes[thread_id] = size
+        metrics.CHECKPOINT_BYTES.set(self.total_bytes)
+
+    def _enforce_limits(self, protect: str | None = None):
+        self._sweep_expired()
+        while len(self._threads) > self.max_threads and self._evict_oldest("lru", protect):
+            pass
+        while self.total_bytes > self.max_bytes and self._evict_oldest("bytes", protect):
+            pass
+
+    def _sweep_expired(self):
+        if not self.ttl_seconds:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._threads:
+            thread_id, last_access = next(iter(self._threads.items()))
+            if last_access >= cutoff:
+                break
+            self._drop(thread_id, "ttl")
+
+    def _evict_oldest(self, reason: str, protect: str | None) -> bool:
+        for thread_id in self._threads:
+            if thread_id != protect:
+                self._drop(thread_id, reason)
+                return True
+        return False
+
+    def _drop(self, thread_id: str, reason: str):
+        known = thread_id in self._threads
+        self.storage.pop(thread_id, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        self._threads.pop(thread_id, None)
+        self.total_bytes -= self._thread_bytes.pop(thread_id, 0)
+
+        if known:
+            self.evictions[reason] += 1
+            metrics.CHECKPOINT_EVICTIONS.inc(reason=reason)
+            logger.debug(f"Checkpoint thread {thread_id} dropped ({reason})")
+        metrics.CHECKPOINT_THREADS.set(len(self._threads))
+        metrics.CHECKPOINT_BYTES.set(self.total_bytes)
@@ -0,0 +1,227 @@
+import os
+import time
+import array
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+from langchain_core.embeddings import Embeddings
+from src.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Trailing punctuation ASR adds or drops between otherwise identical utterances
+_QUERY_STRIP = " \t\n.?!,;:"
+
+
+def normalize_text(text: str, query: bool = False) -> str:
+    """Collapse whitespace; queries are also case-folded and lose trailing punctuation."""
+    text = " ".join(text.split())
+    if query:
+        text = text.strip(_QUERY_STRIP).casefold()
+    return text
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class DiskEmbeddingCache:
+    """
+    Persistent embedding tier in a local SQLite file (WAL), shared by all workers on the host.
+    Vectors are stored as float32. Oldest rows are pruned past `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connect().execute(
+            f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+        ).fetchall()
+        return {key: array.array("f", blob).tolist() for key, blob in rows}
+
+    def put_many(self, items: dict[str, list[float]]):
+        if not items:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                [(key, array.array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            self._writes += len(items)
+            # Amortize the size check over many inserts
+            if self._writes >= 1000:
+                self._writes = 0
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-process LRU tier and an optional on-disk tier.
+    Keys are sha256(model + normalized text), so a model change never serves stale vectors.
+    Used by retrieval (queries) and upload ingestion (document chunks).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        max_entries: int = 2048,
+        disk: Optional[DiskEmbeddingCache] = None
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.max_entries = max_entries
+        self.disk = disk
+
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    # --- Embeddings API ---
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed([text], query=True, compute=lambda t: [self.embeddings.embed_query(t[0])])[0]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, query=False, compute=self.embeddings.embed_documents)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        async def compute(missing):
+            return [await self.embeddings.aembed_query(missing[0])]
+        return (await self._aembed([text], query=True, compute=compute))[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self._aembed(texts, query=False, compute=self.embeddings.aembed_documents)
+
+    # --- Public helpers ---
+    def get_stats(self) -> dict:
+        lookups = sum(self.stats.values())
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    # --- Internals ---
+    def _embed(self, texts: list[str], query: bool, compute) -> list[list[float]]:
+        keys, results, missing = self._lookup_memory(texts, query)
+        if missing and self.disk is not None:
+            self._fill_from_disk(keys, results, missing, self._disk_get([keys[i] for i in missing]))
+            missing = [i for i in missing if results[i] is None]
+        if missing:
+            vectors = compute([texts[i] for i in missing])
+            new = self._store(keys, results, missing, vectors)
+            if self.disk is not None:
+                self._disk_put(new)
+        return results  # type: ignore
+
+    async def _aembed(self, texts: list[str], query: bool, compute) -> list[list[float]]:
+        keys, results, missing = self._lookup_memory(texts, query)
+        if missing and self.disk is not None:
+            found = await asyncio.to_thread(self._disk_get, [keys[i] for i in missing])
+            self._fill_from_disk(keys, results, missing, found)
+            missing = [i for i in missing if results[i] is None]
+        if missing:
+            vectors = await compute([texts[i] for i in missing])
+            new = self._store(keys, results, missing, vectors)
+            if self.disk is not None:
+                # Write-back off the critical path
+                asyncio.get_running_loop().run_in_executor(None, self._disk_put, new)
+        return results  # type: ignore
+
+    def _lookup_memory(self, texts: list[str], query: bool):
+        keys = [cache_key(self.model, normalize_text(t, query)) for t in texts]
+        results: list[Optional[list[float]]] = [None] * len(texts)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(i)
+                else:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+            self._count("memory_hits", len(texts) - len(missing))
+        return keys, results, missing
+
+    def _fill_from_disk(self, keys, results, missing, found: dict):
+        with self._lock:
+            for i in missing:
+                vector = found.get(keys[i])
+                if vector is not None:
+                    results[i] = vector
+                    self._remember(keys[i], vector)
+            self._count("disk_hits", len(found))
+
+    def _store(self, keys, results, missing, vectors) -> dict[str, list[float]]:
+        new = {}
+        with self._lock:
+            for i, vector in zip(missing, vectors):
+                results[i] = vector
+                new[keys[i]] = vector
+                self._remember(keys[i], vector)
+            self._count("misses", len(missing))
+        return new
+
+    def _remember(self, key: str, vector: list[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _count(self, result: str, amount: int):
+        if amount:
+            self.stats[result] += amount
+            metrics.EMBEDDING_CACHE.inc(amount, result=result)
+
+    def _disk_get(self, keys: list[str]) -> dict[str, list[float]]:
+        try:
+            return self.disk.get_many(keys)  # type: ignore
+        except Exception as e:
+            logger.warning(f"Embedding disk cache unavailable: {e}")
+            return {}
+
+    def _disk_put(self, items: dict[str, list[float]]):
+        try:
+            self.disk.put_many(items)  # type: ignore
+        except Exception as e:
+            logger.warning(f"Embedding disk cache write failed: {e}")
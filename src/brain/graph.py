@@ -1,29 +1,72 @@
-from typing import Optional
+import asyncio
+from typing import Callable, Optional
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from src.core.config import settings
 from src.core import control
+from src.core.metrics import mark_stage
 from src.brain.state import AgentState
-from src.brain.retriever import get_retriever
+from src.brain.retriever import get_retriever, asearch_with_scores
+from src.brain.lexical import get_lexical_index, reciprocal_rank_fusion
+from src.brain.selection import select_context
+from src.brain.checkpointer import BoundedMemorySaver
+from src.brain.history import split_history
+from src.services.clients import get_async_http_client, get_http_client
 
 # 1. Initialize LLM with control.py settings
-llm = ChatOpenAI(
-    model=control.LLM_MODEL, 
-    api_key=settings.OPENAI_API_KEY, # type: ignore
-    streaming=True,
-    temperature=control.LLM_TEMPERATURE,
-    max_tokens=control.LLM_MAX_TOKENS # type: ignore
-)
+def _create_llm() -> ChatOpenAI:
+    return ChatOpenAI(
+        model=control.LLM_MODEL, 
+        api_key=settings.OPENAI_API_KEY, # type: ignore
+        streaming=True,
+        stream_usage=True,  # Report token usage on streamed responses
+        temperature=control.LLM_TEMPERATURE,
+        max_tokens=control.LLM_MAX_TOKENS, # type: ignore
+        # Process-wide connection pools, prewarmed at startup
+        http_async_client=get_async_http_client(),
+        http_client=get_http_client()
+    )
+
+# Non-streaming LLM for rolling history summaries (runs after the turn, off the critical path)
+def _create_summary_llm() -> ChatOpenAI:
+    return ChatOpenAI(
+        model=control.LLM_MODEL, 
+        api_key=settings.OPENAI_API_KEY, # type: ignore
+        temperature=0,
+        max_tokens=control.HISTORY_SUMMARY_MAX_TOKENS, # type: ignore
+        http_async_client=get_async_http_client(),
+        http_client=get_http_client()
+    )
+
+# name -> (pools the model was built on, model)
+_models: dict[str, tuple[tuple, ChatOpenAI]] = {}
+
+def _model(name: str, factory: Callable[[], ChatOpenAI]) -> ChatOpenAI:
+    # Rebuilt when close_clients() has replaced the shared pools (e.g. app shutdown and restart)
+    pools = (get_async_http_client(), get_http_client())
+    cached = _models.get(name)
+    if cached is None or any(a is not b for a, b in zip(cached[0], pools)):
+        cached = _models[name] = (pools, factory())
+    return cached[1]
+
+def get_llm() -> ChatOpenAI:
+    return _model("llm", _create_llm)
+
+def get_summary_llm() -> ChatOpenAI:
+    return _model("summary_llm", _create_summary_llm)
 
 # 2. Define the Prompt Template (using control settings for response length)
 # Note: System prompt can be extended via control.py if needed
 prompt = ChatPromptTemplate.from_messages([
     ("system", "You are Chronos, a helpful voice assistant. "
                "Answer questions based on the following context:\n\n{context}\n\n"
+               "{summary}"
                "If the context indicates no documents are found, politely inform the user and suggest uploading documents for personalized answers. "
                "If user says him/her name, greet them by name and tell them their name's meaning. "
                f"Keep answers concise (under 2 sentences)."),
@@ -31,18 +74,40 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 # 3. Node 1: Retrieval (The Librarian)
-def create_retrieve_node(user_uuid: Optional[str] = None):
-    """Factory function to create a retrieve node with optional user filtering"""
-    async def retrieve_node(state: AgentState):
+def create_retrieve_node():
+    """Factory function to create the retrieve node (user filter comes from the run config)"""
+    async def retrieve_node(state: AgentState, config: RunnableConfig):
         # Get the last user message
         last_msg_obj = state["messages"][-1]
         last_message = str(last_msg_obj.content)
         
-        # Get user-specific retriever
-        retriever = get_retriever(user_uuid)
+        # Get user-specific retriever (configurable.user_uuid, None = no filtering)
+        user_uuid: Optional[str] = config.get("configurable", {}).get("user_uuid")
+        lexical_index = get_lexical_index()
         
-        # Search Pinecone
-        docs = await retriever.ainvoke(last_message)
+        mark_stage("retrieval_start")
+        if control.RAG_RETRIEVAL_MODE == "adaptive":
+            # Scored dense (+ BM25) candidates -> threshold, fusion, MMR, token budget
+            if lexical_index is None:
+                scored = await asearch_with_scores(last_message, user_uuid, k=control.RAG_FETCH_K)
+                lexical_docs = []
+            else:
+                scored, lexical_docs = await asyncio.gather(
+                    asearch_with_scores(last_message, user_uuid, k=control.RAG_FETCH_K),
+                    lexical_index.asearch_with_scores(last_message, user_uuid, control.RAG_FETCH_K)
+                )
+            docs = select_context(scored, lexical_docs)
+        elif lexical_index is None:
+            # Dense search only
+            docs = await get_retriever(user_uuid).ainvoke(last_message)
+        else:
+            # Dense + BM25 in parallel, merged with reciprocal rank fusion
+            dense_docs, lexical_docs = await asyncio.gather(
+                get_retriever(user_uuid, k=control.RAG_FETCH_K).ainvoke(last_message),
+                lexical_index.asearch(last_message, user_uuid, control.RAG_FETCH_K)
+            )
+            docs = reciprocal_rank_fusion([dense_docs, lexical_docs], control.RAG_TOP_K, control.RAG_RRF_K)
+        mark_stage("retrieval_end")
         
         # Check if user has any documents
         if not docs:
@@ -59,21 +124,32 @@ def create_retrieve_node(user_uuid: Optional[str] = None):
 # 4. Node 2: Generation (The Chatbot)
 async def chatbot_node(state: AgentState):
     context = state.get("context", "")
+    summary = state.get("summary", "")
+    
+    # Turns that left the verbatim window are sent until the rolling summary covers them
+    # (folding them removes them from state); without summaries they are simply not sent
     messages = state["messages"]
+    if not control.ENABLE_HISTORY_SUMMARY:
+        _, messages = split_history(messages)
+    summary_text = f"Summary of the earlier conversation:\n{summary}\n\n" if summary else ""
     
-    # Format the prompt with context + history
-    chain = prompt | llm
-    response = await chain.ainvoke({"context": context, "messages": messages})
+    # Format the prompt with context + summary + recent history
+    chain = prompt | get_llm()
+    response = await chain.ainvoke({"context": context, "summary": summary_text, "messages": messages})
     
     return {"messages": [response]}
 
 # 5. Build the Workflow
-def build_graph(user_uuid: Optional[str] = None):
-    """Build the graph with optional user-specific filtering"""
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """
+    Build and compile the graph.
+    Per-user filtering is passed at run time via config["configurable"]["user_uuid"],
+    so one compiled graph serves every session.
+    """
     workflow = StateGraph(AgentState)
 
-    # Add Nodes with user filtering
-    retrieve_node = create_retrieve_node(user_uuid)
+    # Add Nodes
+    retrieve_node = create_retrieve_node()
     workflow.add_node("retrieve", retrieve_node)
     workflow.add_node("chatbot", chatbot_node)
 
@@ -82,9 +158,15 @@ def build_graph(user_uuid: Optional[str] = None):
     workflow.add_edge("retrieve", "chatbot")
     workflow.add_edge("chatbot", END)
 
-    memory = MemorySaver()
+    return workflow.compile(checkpointer=checkpointer or MemorySaver())
 
-    return workflow.compile(checkpointer=memory)
+# Process-wide checkpointer, shared by all sessions (keyed by thread_id)
+checkpointer = BoundedMemorySaver(
+    max_threads=control.CHECKPOINT_MAX_THREADS,
+    max_bytes=control.CHECKPOINT_MAX_BYTES,
+    ttl_seconds=control.CHECKPOINT_TTL_SECONDS,
+    keep_checkpoints=control.CHECKPOINT_KEEP_PER_THREAD
+)
 
-# Default brain app (no user filtering - for backward compatibility)
-brain_app = build_graph()
\ No newline at end of file
+# Process-wide compiled brain, shared by all sessions
+brain_app = build_graph(checkpointer)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import logging
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from src.core import control
+from src.core.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead OpenAI adds for role/formatting
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a voice conversation between a user and Chronos, an assistant. "
+    "Merge the previous summary with the new exchanges below into one short paragraph. "
+    "Keep names, facts the user shared, preferences, open questions and commitments. Drop small talk."
+)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return count_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    """Group messages into turns, each starting at a user message."""
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def split_history(
+    messages: list[BaseMessage],
+    max_turns: int | None = None,
+    max_tokens: int | None = None
+) -> tuple[list[BaseMessage], list[BaseMessage]]:
+    """
+    Split history into (older, recent): `recent` is the last `max_turns` turns that fit in
+    `max_tokens`, verbatim. The latest turn is always kept, even if it alone exceeds the budget.
+    """
+    max_turns = control.HISTORY_MAX_TURNS if max_turns is None else max_turns
+    max_tokens = control.HISTORY_MAX_TOKENS if max_tokens is None else max_tokens
+
+    turns = split_turns(messages)
+    kept = 0
+    budget = 0
+    for turn in reversed(turns):
+        turn_tokens = sum(message_tokens(m) for m in turn)
+        if kept and (kept >= max_turns or budget + turn_tokens > max_tokens):
+            break
+        kept += 1
+        budget += turn_tokens
+
+    older = [m for turn in turns[:len(turns) - kept] for m in turn]
+    recent = [m for turn in turns[len(turns) - kept:] for m in turn]
+    return older, recent
+
+
+def format_summary_request(summary: str, messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Build the prompt that folds `messages` into the running `summary`."""
+    transcript = "\n".join(
+        f"{'User' if isinstance(m, HumanMessage) else 'Assistant'}: {m.content}" for m in messages
+    )
+    return [
+        SystemMessage(content=SUMMARY_INSTRUCTIONS),
+        HumanMessage(content=f"Previous summary:\n{summary or '(none)'}\n\nNew exchanges:\n{transcript}")
+    ]
@@ -0,0 +1,320 @@
+import os
+import re
+import json
+import math
+import time
+import asyncio
+import logging
+import uuid
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional
+from langchain_core.documents import Document
+from src.core import control, metrics
+from src.brain.local_index import file_lock, partition_name
+
+logger = logging.getLogger(__name__)
+
+# Keeps prices, versions, SKUs and section numbers whole: "$99", "4.2", "sku-1042", "§3.1"
+_TOKEN = re.compile(r"[\w$§]+(?:[.\-/][\w]+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "the", "to", "what", "when", "where", "which", "who",
+    "with", "you", "your", "can", "tell", "about",
+}
+# Unique query terms scored per search (bounds query latency for long utterances)
+MAX_QUERY_TERMS = 16
+# Logs shorter than this are never compacted (rewriting them would cost more than replaying)
+COMPACT_MIN_RECORDS = 1000
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased tokens; compound tokens ("sku-1042") also index their parts."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = re.split(r"[.\-/]", token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p and p not in _STOPWORDS)
+    return tokens
+
+
+class BM25Partition:
+    """In-memory BM25 inverted index of one user's chunks (oldest chunks evicted past max_docs)."""
+
+    def __init__(self, max_docs: int, k1: float = 1.2, b: float = 0.75):
+        self.max_docs = max_docs
+        self.k1 = k1
+        self.b = b
+        # doc_id -> (text, metadata, length); insertion ordered for eviction
+        self.docs: OrderedDict[str, tuple[str, dict, int]] = OrderedDict()
+        self.postings: dict[str, dict[str, int]] = {}
+        self.total_length = 0
+        self.approx_bytes = 0
+        # Replay position in the on-disk log: its first line identifies the file (a compaction
+        # by any worker rewrites it), loaded_offset/records count what has been applied
+        self.log_head: Optional[bytes] = None
+        self.loaded_offset = 0
+        self.records = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        self.docs.clear()
+        self.postings.clear()
+        self.total_length = self.approx_bytes = 0
+        self.log_head = None
+        self.loaded_offset = self.records = 0
+
+    def add(self, doc_id: str, text: str, metadata: dict):
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.docs[doc_id] = (text, metadata, len(tokens))
+        self.total_length += len(tokens)
+        self.approx_bytes += _doc_bytes(text, tokens)
+        while len(self.docs) > self.max_docs:
+            self.remove(next(iter(self.docs)))
+
+    def remove(self, doc_id: str):
+        entry = self.docs.pop(doc_id, None)
+        if entry is None:
+            return
+        text, _, length = entry
+        tokens = tokenize(text)
+        for term in set(tokens):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= length
+        self.approx_bytes -= _doc_bytes(text, tokens)
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        if not self.docs:
+            return []
+        terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        n = len(self.docs)
+        avg_length = self.total_length / n or 1.0
+        scores: dict[str, float] = {}
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                length = self.docs[doc_id][2]
+                norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def _doc_bytes(text: str, tokens: list[str]) -> int:
+    # Text plus ~64 bytes per posting entry (dict slot, key and int)
+    return len(text) + 64 * len(set(tokens))
+
+
+class LexicalIndex:
+    """
+    Per-user BM25 indexes, built incrementally from ingested chunks.
+
+    Each user's chunks are appended to `<root>/<partition>.jsonl`; every worker replays the new
+    tail of that log before searching, so all workers on the host see the same chunks.
+    Once more than `compact_ratio` of a log's records are dead (re-upserted, deleted or evicted
+    chunks), it is rewritten as a snapshot of the live chunks.
+    At most `max_users` partitions stay in memory (least recently used are unloaded and
+    reloaded from the log on demand), each holding at most `max_docs` chunks. Replays and
+    searches lock only their own partition.
+    """
+
+    def __init__(self, root: str, max_docs: int = 20000, max_users: int = 500, compact_ratio: float = 0.5):
+        self.root = root
+        self.max_docs = max_docs
+        self.max_users = max_users
+        self.compact_ratio = compact_ratio
+        self._partitions: OrderedDict[str, BM25Partition] = OrderedDict()
+        self._lock = threading.Lock()  # Guards _partitions only
+        self._query_ms: list[float] = []
+        os.makedirs(root, exist_ok=True)
+
+    # --- Writes ---
+    def add_documents(self, documents: list[Document], ids: list[str]):
+        groups: dict[str, list[str]] = {}
+        for doc, doc_id in zip(documents, ids):
+            record = {"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}
+            groups.setdefault(partition_name(doc.metadata.get("user_uuid")), []).append(json.dumps(record, ensure_ascii=False))
+        self._append(groups)
+
+    def delete(self, ids: list[str], user_uuid: Optional[str] = None):
+        line = json.dumps({"delete": list(ids)})
+        self._append({partition_name(user_uuid): [line]})
+
+    def _append(self, groups: dict[str, list[str]]):
+        for name, lines in groups.items():
+            path = self._log_path(name)
+            # Serialized with compaction (which replaces the file) across workers
+            with file_lock(path + ".lock"), open(path, "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+
+    # --- Reads ---
+    def search(self, query: str, user_uuid: Optional[str], k: int) -> list[Document]:
+        """BM25 top-k within the user's partition (the shared partition when user_uuid is None)."""
+        return [doc for doc, _ in self.search_with_scores(query, user_uuid, k)]
+
+    def search_with_scores(self, query: str, user_uuid: Optional[str], k: int) -> list[tuple[Document, float]]:
+        """BM25 top-k as (doc, BM25 score), best first."""
+        start = time.perf_counter()
+        name = partition_name(user_uuid)
+        with self._lock:
+            partition = self._partition(name)
+        # A long replay (e.g. after LRU eviction) only blocks searches of the same user
+        with partition.lock:
+            self._replay(name, partition)
+            if self._should_compact(partition):
+                self._compact(name, partition)
+            results = [
+                (Document(id=doc_id, page_content=partition.docs[doc_id][0], metadata=partition.docs[doc_id][1]), score)
+                for doc_id, score in partition.search(query, k)
+            ]
+        with self._lock:
+            metrics.LEXICAL_INDEX_BYTES.set(sum(p.approx_bytes for p in self._partitions.values()))
+        elapsed = time.perf_counter() - start
+        metrics.LEXICAL_SEARCH_SECONDS.observe(elapsed)
+        self._query_ms = (self._query_ms + [elapsed * 1000])[-200:]
+        return results
+
+    async def asearch(self, query: str, user_uuid: Optional[str], k: int) -> list[Document]:
+        return await asyncio.to_thread(self.search, query, user_uuid, k)
+
+    async def asearch_with_scores(self, query: str, user_uuid: Optional[str], k: int) -> list[tuple[Document, float]]:
+        return await asyncio.to_thread(self.search_with_scores, query, user_uuid, k)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            partitions = list(self._partitions.values())
+            timings = sorted(self._query_ms)
+        return {
+            "users_loaded": len(partitions),
+            "docs": sum(len(p.docs) for p in partitions),
+            "terms": sum(len(p.postings) for p in partitions),
+            "approx_bytes": sum(p.approx_bytes for p in partitions),
+            "query_p50_ms": round(timings[len(timings) // 2], 2) if timings else 0.0,
+            "query_max_ms": round(timings[-1], 2) if timings else 0.0,
+        }
+
+    # --- Internals ---
+    def _log_path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.jsonl")
+
+    def _partition(self, name: str) -> BM25Partition:
+        """Cached partition (LRU). Caller holds _lock; the partition is replayed under its own lock."""
+        partition = self._partitions.get(name)
+        if partition is None:
+            partition = BM25Partition(self.max_docs)
+            self._partitions[name] = partition
+            while len(self._partitions) > self.max_users:
+                self._partitions.popitem(last=False)
+        self._partitions.move_to_end(name)
+        return partition
+
+    def _replay(self, name: str, partition: BM25Partition):
+        """Apply log records appended since the last replay (by this or another worker). Caller holds partition.lock."""
+        try:
+            f = open(self._log_path(name), "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            head = f.readline()
+            if not head.endswith(b"\n"):
+                return  # Empty, or the first line is still being written
+            if head != partition.log_head:
+                # New partition, or the log was compacted (rewritten) since: load it from the start
+                partition.clear()
+                partition.log_head = head
+            if os.fstat(f.fileno()).st_size <= partition.loaded_offset:
+                return
+            f.seek(partition.loaded_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written line; pick it up next time
+                partition.loaded_offset += len(line)
+                partition.records += 1
+                record = json.loads(line)
+                if "delete" in record:
+                    for doc_id in record["delete"]:
+                        partition.remove(doc_id)
+                elif "snapshot" not in record:
+                    partition.add(record["id"], record["text"], record["metadata"])
+
+    def _should_compact(self, partition: BM25Partition) -> bool:
+        return (
+            partition.records >= COMPACT_MIN_RECORDS
+            and len(partition.docs) < partition.records * (1 - self.compact_ratio)
+        )
+
+    def _compact(self, name: str, partition: BM25Partition):
+        """Rewrite the log as the partition's live chunks (oldest first, so eviction order is kept)."""
+        path = self._log_path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with file_lock(path + ".lock"):
+                self._replay(name, partition)  # Records appended since the check
+                # The snapshot id changes the first line, so other workers notice the rewrite
+                head = (json.dumps({"snapshot": uuid.uuid4().hex}) + "\n").encode("utf-8")
+                with open(tmp, "wb") as f:
+                    f.write(head)
+                    for doc_id, (text, metadata, _) in partition.docs.items():
+                        record = {"id": doc_id, "text": text, "metadata": metadata}
+                        f.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                    size = f.tell()
+                os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"BM25 log compaction of {name} failed: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        dead = partition.records - len(partition.docs)
+        partition.log_head = head
+        partition.loaded_offset = size
+        partition.records = len(partition.docs) + 1
+        logger.info(f"Compacted BM25 log {name}: dropped {dead} dead record(s)")
+
+
+def rrf_scores(result_lists: list[list[Document]], rrf_k: int = 60) -> list[tuple[Document, float]]:
+    """Fused (doc, score) best first: score(d) = sum 1 / (rrf_k + rank). Chunks are matched by content."""
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [(docs[key], scores[key]) for key in ranked]
+
+
+def reciprocal_rank_fusion(result_lists: list[list[Document]], k: int, rrf_k: int = 60) -> list[Document]:
+    """Top-k of the fused ranking."""
+    return [doc for doc, _ in rrf_scores(result_lists, rrf_k)[:k]]
+
+
+_lexical_index: Optional[LexicalIndex] = None
+
+
+def get_lexical_index() -> Optional[LexicalIndex]:
+    """Process-wide lexical index (None when hybrid search is disabled)."""
+    global _lexical_index
+    if not control.ENABLE_HYBRID_SEARCH:
+        return None
+    if _lexical_index is None:
+        _lexical_index = LexicalIndex(
+            control.BM25_INDEX_PATH,
+            max_docs=control.BM25_MAX_DOCS_PER_USER,
+            max_users=control.BM25_MAX_USERS,
+            compact_ratio=control.BM25_COMPACT_RATIO
+        )
+    return _lexical_index
@@ -0,0 +1,530 @@
+import os
+import re
+import json
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Optional
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# Partition for documents without a user_uuid (e.g. scripts/ingest.py)
+SHARED_PARTITION = "_shared"
+# Rows scored per NumPy block: the float32 upcast of a block (1024 x 1536 x 4B = 6MB) stays cache-resident
+SEARCH_BLOCK_ROWS = 1024
+
+_DTYPES = {"float16": np.float16, "int8": np.int8}
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_GENERATION_FILE = re.compile(r"^(vectors|scales|offsets|meta|tombstones)\.(\d+)\.(bin|jsonl|txt)$")
+
+
+def partition_name(user_uuid: Optional[str]) -> str:
+    if not user_uuid:
+        return SHARED_PARTITION
+    user_uuid = str(user_uuid)
+    return user_uuid if _SAFE_NAME.match(user_uuid) else hashlib.sha1(user_uuid.encode()).hexdigest()
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """float32 rows -> stored rows (+ per-row scales for int8, symmetric)."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales
+
+
+
+def _lock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+    else:
+        # Locks the first byte; LK_LOCK retries for ~10s before raising
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock shared by all processes on the host (the lock file is created if missing)."""
+    with open(path, "w") as lock_file:
+        _lock_file(lock_file)
+        try:
+            yield
+        finally:
+            _unlock_file(lock_file)
+
+class _Partition:
+    """
+    One user's rows, stored as a generation of files:
+      manifest.json          {"v", "generation", "dim", "dtype", "count"} (written last, atomically)
+      vectors.<gen>.bin      count x dim, float16 or int8
+      scales.<gen>.bin       count float32 (int8 only)
+      offsets.<gen>.bin      count uint64, byte offset of each row in meta.<gen>.jsonl
+      meta.<gen>.jsonl       {"id", "text", "metadata"} per row
+      tombstones.<gen>.txt   deleted row numbers, one per line
+    Appends only add bytes past the manifest count, so readers never see partial rows.
+    Compaction writes generation+1 and then swaps the manifest.
+    """
+
+    def __init__(self, path: str, dtype: str):
+        self.path = path
+        self.default_dtype = dtype
+        self._lock = threading.Lock()
+        self._manifest_mtime: Optional[int] = None
+        self._view: Optional[dict] = None
+
+    # --- Files ---
+    def _file(self, name: str, generation: int, ext: str) -> str:
+        return os.path.join(self.path, f"{name}.{generation}.{ext}")
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path, "manifest.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, manifest: dict):
+        tmp = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+
+    @contextmanager
+    def _writer(self):
+        """Cross-process write lock (all workers on the host share the index directory)."""
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, file_lock(os.path.join(self.path, ".lock")):
+            yield
+
+    # --- Reads ---
+    def view(self) -> Optional[dict]:
+        """Memory-mapped snapshot of the partition, refreshed when the manifest changes."""
+        try:
+            mtime = os.stat(os.path.join(self.path, "manifest.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if self._view is not None and mtime == self._manifest_mtime:
+            return self._view
+
+        try:
+            view = self._open_view()
+        except FileNotFoundError:
+            # Compacted by another worker between reading the manifest and opening its files
+            view = self._open_view()
+        replaced = self._view is not None and view is not None and view["manifest"]["generation"] != self._view["manifest"]["generation"]
+        self._view, self._manifest_mtime = view, mtime
+        if replaced:
+            # The old generation's maps are released with the old view (unless a search still holds it)
+            self._remove_old_generations(view["manifest"]["generation"])
+        return view
+
+    def _open_view(self) -> Optional[dict]:
+        manifest = self._read_manifest()
+        if manifest is None or manifest["count"] == 0:
+            return None
+        gen, count, dim = manifest["generation"], manifest["count"], manifest["dim"]
+        dtype = _DTYPES[manifest["dtype"]]
+
+        # Keep the metadata file open: compaction in another worker may unlink it
+        meta_file = open(self._file("meta", gen, "jsonl"), "rb", buffering=0)
+        view = {
+            "manifest": manifest,
+            "vectors": np.memmap(self._file("vectors", gen, "bin"), dtype=dtype, mode="r", shape=(count, dim)),
+            "offsets": np.memmap(self._file("offsets", gen, "bin"), dtype=np.uint64, mode="r", shape=(count,)),
+            "scales": None,
+            "deleted": self._read_tombstones(gen, count),
+            "meta_file": meta_file,
+            "meta_lock": threading.Lock(),  # Guards the shared file position of meta_file
+            "meta_end": self._committed_meta_size(gen, count),
+        }
+        if manifest["dtype"] == "int8":
+            view["scales"] = np.memmap(self._file("scales", gen, "bin"), dtype=np.float32, mode="r", shape=(count,))
+        return view
+
+    def _read_tombstones(self, generation: int, count: int) -> np.ndarray:
+        try:
+            with open(self._file("tombstones", generation, "txt")) as f:
+                rows = [int(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            rows = []
+        return np.array([r for r in rows if r < count], dtype=np.int64)
+
+    @staticmethod
+    def read_rows(view: dict, rows: Iterable[int]) -> list[dict]:
+        offsets, count = view["offsets"], len(view["offsets"])
+        meta_file = view["meta_file"]
+        records = []
+        # seek + read rather than os.pread, which Windows lacks
+        with view["meta_lock"]:
+            for row in rows:
+                start = int(offsets[row])
+                end = int(offsets[row + 1]) if row + 1 < count else view["meta_end"]
+                meta_file.seek(start)
+                records.append(json.loads(meta_file.read(end - start)))
+        return records
+
+    @staticmethod
+    def search(view: dict, query: np.ndarray, k: int) -> list[tuple[int, float]]:
+        """Top-k (row, cosine score) by blockwise dot product over the memory map."""
+        vectors = view["vectors"]
+        count = vectors.shape[0]
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        if view["scales"] is not None:
+            scores *= view["scales"]
+        if len(view["deleted"]):
+            scores[view["deleted"]] = -np.inf
+
+        k = min(k, count)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    # --- Writes ---
+    def append(self, vectors: np.ndarray, records: list[dict]):
+        """Upsert: rows already stored under one of the record ids are tombstoned first."""
+        with self._writer():
+            manifest = self._read_manifest() or {
+                "v": FORMAT_VERSION, "generation": 0, "dim": vectors.shape[1],
+                "dtype": self.default_dtype, "count": 0
+            }
+            if manifest["dim"] != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {manifest['dim']}")
+            gen, count = manifest["generation"], manifest["count"]
+            self._tombstone(manifest, {r["id"] for r in records})
+            stored, scales = quantize(vectors, manifest["dtype"])
+
+            # Drop bytes of an append that crashed before its manifest was written
+            row_bytes = stored.itemsize * manifest["dim"]
+            self._append_bytes(self._file("vectors", gen, "bin"), count * row_bytes, stored.tobytes())
+            if scales is not None:
+                self._append_bytes(self._file("scales", gen, "bin"), count * 4, scales.tobytes())
+
+            meta_path = self._file("meta", gen, "jsonl")
+            meta_size = self._committed_meta_size(gen, count)
+            lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in records]
+            offsets = np.cumsum([meta_size] + [len(line) for line in lines[:-1]]).astype(np.uint64)
+            self._append_bytes(meta_path, meta_size, b"".join(lines))
+            self._append_bytes(self._file("offsets", gen, "bin"), count * 8, offsets.tobytes())
+
+            manifest["count"] = count + len(records)
+            self._write_manifest(manifest)
+
+    def _committed_meta_size(self, generation: int, count: int) -> int:
+        if count == 0:
+            return 0
+        offsets = np.memmap(self._file("offsets", generation, "bin"), dtype=np.uint64, mode="r", shape=(count,))
+        with open(self._file("meta", generation, "jsonl"), "rb") as f:
+            f.seek(int(offsets[-1]))
+            return int(offsets[-1]) + len(f.readline())
+
+    @staticmethod
+    def _append_bytes(path: str, committed: int, data: bytes):
+        with open(path, "ab") as f:
+            if f.tell() != committed:
+                f.truncate(committed)
+                f.seek(committed)
+            f.write(data)
+
+    def delete(self, ids: set[str]) -> int:
+        """Tombstone rows whose id is in `ids`. Returns the number of rows deleted."""
+        with self._writer():
+            manifest = self._read_manifest()
+            if manifest is None:
+                return 0
+            deleted = self._tombstone(manifest, ids)
+            if deleted:
+                # Bump the manifest so readers pick up the tombstones
+                self._write_manifest(manifest)
+            return deleted
+
+    def _tombstone(self, manifest: dict, ids: set[str]) -> int:
+        """Tombstone live rows whose id is in `ids` (caller holds the write lock and writes the manifest)."""
+        gen, count = manifest["generation"], manifest["count"]
+        if count == 0:
+            return 0
+        already = set(self._read_tombstones(gen, count).tolist())
+        rows = []
+        with open(self._file("meta", gen, "jsonl"), "rb") as f:
+            for row, line in zip(range(count), f):
+                if row not in already and json.loads(line)["id"] in ids:
+                    rows.append(row)
+        if rows:
+            with open(self._file("tombstones", gen, "txt"), "a") as f:
+                f.write("".join(f"{row}\n" for row in rows))
+        return len(rows)
+
+    def compact(self) -> int:
+        """Rewrite live rows into a new generation. Returns the number of rows reclaimed."""
+        with self._writer():
+            manifest = self._read_manifest()
+            if manifest is None:
+                return 0
+            gen, count, dim = manifest["generation"], manifest["count"], manifest["dim"]
+            deleted = set(self._read_tombstones(gen, count).tolist())
+            if not deleted:
+                return 0
+
+            dtype = _DTYPES[manifest["dtype"]]
+            live = np.array([r for r in range(count) if r not in deleted], dtype=np.int64)
+            new_gen = gen + 1
+            old_vectors = np.memmap(self._file("vectors", gen, "bin"), dtype=dtype, mode="r", shape=(count, dim))
+            with open(self._file("vectors", new_gen, "bin"), "wb") as f:
+                for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(old_vectors[live[start:start + SEARCH_BLOCK_ROWS]]).tobytes())
+            if manifest["dtype"] == "int8":
+                old_scales = np.fromfile(self._file("scales", gen, "bin"), dtype=np.float32, count=count)
+                old_scales[live].tofile(self._file("scales", new_gen, "bin"))
+
+            offsets = []
+            position = 0
+            with open(self._file("meta", gen, "jsonl"), "rb") as src, open(self._file("meta", new_gen, "jsonl"), "wb") as dst:
+                for row, line in zip(range(count), src):
+                    if row not in deleted:
+                        offsets.append(position)
+                        dst.write(line)
+                        position += len(line)
+            np.array(offsets, dtype=np.uint64).tofile(self._file("offsets", new_gen, "bin"))
+
+            self._write_manifest({**manifest, "generation": new_gen, "count": len(live)})
+            del old_vectors
+            self._remove_old_generations(new_gen)
+            return len(deleted)
+
+    def _remove_old_generations(self, current: int):
+        """
+        Delete files of generations before `current`. On POSIX open memory maps keep them readable
+        until dropped; Windows refuses to delete files that are still mapped or open, so those are
+        left in place and retried on the next view refresh or compaction.
+        """
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+        for name in names:
+            match = _GENERATION_FILE.match(name)
+            if match is None or int(match.group(2)) >= current:
+                continue
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+            except PermissionError:
+                logger.debug(f"{name} is still in use, deleting it later")
+
+    def stats(self) -> dict:
+        manifest = self._read_manifest() or {}
+        count = manifest.get("count", 0)
+        deleted = len(self._read_tombstones(manifest["generation"], count)) if manifest else 0
+        return {"rows": count, "deleted": deleted, "dtype": manifest.get("dtype"), "dim": manifest.get("dim")}
+
+
+class LocalVectorIndex:
+    """
+    On-disk vector index: one partition per user_uuid, searched with NumPy over memory-mapped files.
+    Scores are cosine similarities (embeddings are normalized on insert and query).
+    """
+
+    def __init__(self, root: str, dtype: str = "float16", compact_ratio: float = 0.2):
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported index dtype: {dtype}. Supported: {', '.join(_DTYPES)}")
+        self.root = root
+        self.dtype = dtype
+        self.compact_ratio = compact_ratio
+        self._partitions: dict[str, _Partition] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def partition(self, name: str) -> _Partition:
+        if name not in self._partitions:
+            self._partitions[name] = _Partition(os.path.join(self.root, name), self.dtype)
+        return self._partitions[name]
+
+    def partitions(self) -> list[str]:
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def add(self, vectors: list[list[float]], texts: list[str], metadatas: list[dict], ids: list[str]):
+        """Upsert by id, like Pinecone: re-adding an id replaces its row instead of duplicating it."""
+        # Within one call the last occurrence of an id wins
+        latest = {doc_id: i for i, doc_id in enumerate(ids)}
+        groups: dict[str, list[int]] = {}
+        for i in sorted(latest.values()):
+            groups.setdefault(partition_name(metadatas[i].get("user_uuid")), []).append(i)
+
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        for name, rows in groups.items():
+            records = [{"id": ids[i], "text": texts[i], "metadata": metadatas[i]} for i in rows]
+            partition = self.partition(name)
+            partition.append(matrix[rows], records)
+            self._maybe_compact(partition)
+
+    def search(self, vector: list[float], k: int, filter: Optional[dict] = None) -> list[tuple[dict, float]]:
+        """
+        Top-k records by cosine similarity. `filter` keeps Pinecone equality semantics:
+        {"user_uuid": ...} searches only that user's partition; other keys are matched on metadata.
+        """
+        filter = dict(filter or {})
+        names = [partition_name(filter.pop("user_uuid"))] if "user_uuid" in filter else self.partitions()
+        query = _normalize(np.asarray(vector, dtype=np.float32)[None, :])[0]
+
+        # Over-fetch when post-filtering on other metadata keys
+        fetch = k * 10 if filter else k
+        candidates = []
+        for name in names:
+            partition = self.partition(name)
+            view = partition.view()
+            if view is None:
+                continue
+            hits = partition.search(view, query, fetch)
+            for record, (_, score) in zip(partition.read_rows(view, [row for row, _ in hits]), hits):
+                if all(record["metadata"].get(key) == value for key, value in filter.items()):
+                    candidates.append((record, score))
+
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        return candidates[:k]
+
+    def delete(self, ids: Iterable[str], user_uuid: Optional[str] = None) -> int:
+        ids = set(ids)
+        names = [partition_name(user_uuid)] if user_uuid else self.partitions()
+        deleted = 0
+        for name in names:
+            partition = self.partition(name)
+            deleted += partition.delete(ids)
+            self._maybe_compact(partition)
+        return deleted
+
+    def compact(self) -> int:
+        return sum(self.partition(name).compact() for name in self.partitions())
+
+    def _maybe_compact(self, partition: _Partition):
+        stats = partition.stats()
+        if stats["rows"] and stats["deleted"] / stats["rows"] >= self.compact_ratio:
+            reclaimed = partition.compact()
+            logger.info(f"Compacted vector partition {os.path.basename(partition.path)}: {reclaimed} rows reclaimed")
+
+    def get_stats(self) -> dict:
+        return {name: self.partition(name).stats() for name in self.partitions()}
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain VectorStore over LocalVectorIndex (drop-in for PineconeVectorStore in retrieval and upload)."""
+
+    def __init__(self, embedding: Embeddings, index: LocalVectorIndex):
+        self._embedding = embedding
+        self.index = index
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        **kwargs: Any
+    ) -> list[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.index.add(self._embedding.embed_documents(texts), texts, metadatas, ids)
+        return ids
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        **kwargs: Any
+    ) -> list[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = await self._embedding.aembed_documents(texts)
+        await asyncio.to_thread(self.index.add, vectors, texts, metadatas, ids)
+        return ids
+
+    def delete(self, ids: Optional[list[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        return self.index.delete(ids, kwargs.get("user_uuid")) > 0
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: list[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        return [(_to_document(record), score) for record, score in self.index.search(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        vector = await self._embedding.aembed_query(query)
+        return await asyncio.to_thread(self.similarity_search_by_vector_with_score, vector, k, filter)
+
+    async def asimilarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] -> [0, 1]
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        index: Optional[LocalVectorIndex] = None,
+        **kwargs: Any
+    ) -> "LocalVectorStore":
+        if index is None:
+            raise ValueError("LocalVectorStore.from_texts requires an index")
+        store = cls(embedding, index)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+
+def _to_document(record: dict) -> Document:
+    return Document(id=record["id"], page_content=record["text"], metadata=record["metadata"])
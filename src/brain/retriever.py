@@ -3,26 +3,74 @@ from typing import Optional
 from functools import lru_cache
 from langchain_pinecone import PineconeVectorStore
 from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.documents import Document
 from src.core.config import settings
 from src.core import control
+from src.brain.embedding_cache import CachedEmbeddings, DiskEmbeddingCache
+from src.brain.local_index import LocalVectorIndex, LocalVectorStore
+from src.services.clients import get_async_http_client, get_http_client
 
 # Ensure environment variable is set for the library
 os.environ["PINECONE_API_KEY"] = settings.PINECONE_API_KEY # type: ignore
 
-@lru_cache(maxsize=1)
-def _get_embeddings() -> OpenAIEmbeddings:
-    """Get or create cached embeddings instance (thread-safe via lru_cache)"""
-    return OpenAIEmbeddings(
+def _create_embeddings(max_retries: int = 2) -> Embeddings:
+    """
+    OpenAI embeddings on the process-wide connection pools (prewarmed at startup),
+    wrapped in the query/chunk embedding cache unless ENABLE_EMBEDDING_CACHE is off.
+    """
+    embeddings = OpenAIEmbeddings(
         model=control.RAG_EMBEDDING_MODEL, 
-        api_key=settings.OPENAI_API_KEY # type: ignore
+        api_key=settings.OPENAI_API_KEY, # type: ignore
+        max_retries=max_retries,
+        http_async_client=get_async_http_client(),
+        http_client=get_http_client()
+    )
+    if not control.ENABLE_EMBEDDING_CACHE:
+        return embeddings
+
+    disk = None
+    if control.EMBEDDING_CACHE_PATH:
+        disk = DiskEmbeddingCache(control.EMBEDDING_CACHE_PATH, control.EMBEDDING_CACHE_DISK_MAX_ENTRIES)
+    return CachedEmbeddings(
+        embeddings,
+        model=control.RAG_EMBEDDING_MODEL,
+        max_entries=control.EMBEDDING_CACHE_MAX_ENTRIES,
+        disk=disk
     )
 
 @lru_cache(maxsize=1)
-def _get_vectorstore() -> PineconeVectorStore:
-    """Get or create cached vectorstore instance (thread-safe via lru_cache)"""
+def _get_embeddings() -> Embeddings:
+    """Get or create cached embeddings instance for queries and the vector store (thread-safe via lru_cache)."""
+    return _create_embeddings()
+
+@lru_cache(maxsize=1)
+def _get_ingestion_embeddings() -> Embeddings:
+    """
+    Embeddings for the ingestion BatchEmbedder. No SDK retries: a 429 reaches its adaptive
+    limiter at once, which backs off (honouring Retry-After) and retries the batch itself.
+    """
+    return _create_embeddings(max_retries=0)
+
+@lru_cache(maxsize=1)
+def _get_vectorstore() -> VectorStore:
+    """
+    Get or create cached vectorstore instance (thread-safe via lru_cache).
+    Backend selected by control.VECTOR_BACKEND.
+    """
+    if control.VECTOR_BACKEND == "local":
+        index = LocalVectorIndex(
+            control.LOCAL_INDEX_PATH,
+            dtype=control.LOCAL_INDEX_DTYPE,
+            compact_ratio=control.LOCAL_INDEX_COMPACT_RATIO
+        )
+        return LocalVectorStore(_get_embeddings(), index)
     return PineconeVectorStore(
         index_name=settings.PINECONE_INDEX_NAME,
         embedding=_get_embeddings(),
+        text_key=control.PINECONE_TEXT_KEY,
+        namespace=control.PINECONE_NAMESPACE or None,
         pinecone_api_key=settings.PINECONE_API_KEY # type: ignore
     )
 
@@ -30,22 +78,38 @@ def clear_retriever_cache() -> None:
     """Clear cached embeddings and vectorstore (useful for credential rotation)"""
     _get_vectorstore.cache_clear()
     _get_embeddings.cache_clear()
+    _get_ingestion_embeddings.cache_clear()
+
+def get_embedding_cache_stats() -> dict:
+    """Hit/miss counters of the embedding cache (empty if disabled)"""
+    embeddings = _get_embeddings()
+    return embeddings.get_stats() if isinstance(embeddings, CachedEmbeddings) else {}
 
-def get_retriever(user_uuid: Optional[str] = None):
+def get_retriever(user_uuid: Optional[str] = None, k: Optional[int] = None):
     """
-    Creates a Pinecone Retriever connected to our index.
+    Creates a Retriever connected to our index (Pinecone or the local index).
     Uses control.py settings for embedding model and top_k.
     Reuses cached embeddings and vectorstore for performance.
     
     Args:
         user_uuid: Optional UUID to filter documents by user. 
                    If provided, only retrieves documents uploaded by this user.
+        k: Number of documents to return (defaults to control.RAG_TOP_K)
     """
     vectorstore = _get_vectorstore()
     
     # Build search kwargs with optional user filter
-    search_kwargs: dict = {"k": control.RAG_TOP_K}
+    search_kwargs: dict = {"k": k or control.RAG_TOP_K}
     if user_uuid:
         search_kwargs["filter"] = {"user_uuid": user_uuid}
     
-    return vectorstore.as_retriever(search_kwargs=search_kwargs)
\ No newline at end of file
+    return vectorstore.as_retriever(search_kwargs=search_kwargs)
+
+async def asearch_with_scores(query: str, user_uuid: Optional[str] = None, k: Optional[int] = None) -> list[tuple[Document, float]]:
+    """
+    Similarity search returning (document, cosine similarity) pairs, best first.
+    Same user filter as get_retriever.
+    """
+    vectorstore = _get_vectorstore()
+    search_filter = {"user_uuid": user_uuid} if user_uuid else None
+    return await vectorstore.asimilarity_search_with_score(query, k=k or control.RAG_TOP_K, filter=search_filter)
@@ -0,0 +1,87 @@
+import logging
+from langchain_core.documents import Document
+from src.core import control, metrics
+from src.core.tokens import count_tokens
+from src.brain.lexical import rrf_scores, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def text_similarity(a: set[str], b: set[str]) -> float:
+    """Jaccard overlap of two token sets (1.0 = same words)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def mmr_select(
+    candidates: list[tuple[Document, float]],
+    max_docs: int,
+    max_tokens: int,
+    lambda_mult: float = 0.7,
+    duplicate_similarity: float = 0.9
+) -> list[Document]:
+    """
+    Maximal marginal relevance over (doc, relevance) candidates.
+    Redundancy is token overlap between chunks; near-duplicates are dropped outright.
+    Stops at `max_docs` or when the next chunk no longer fits in `max_tokens`
+    (the best chunk is always kept).
+    """
+    pool = [(doc, relevance, set(tokenize(doc.page_content))) for doc, relevance in candidates]
+    selected: list[tuple[Document, set[str]]] = []
+    used_tokens = 0
+
+    while pool and len(selected) < max_docs:
+        best_index, best_score = 0, float("-inf")
+        for i, (_, relevance, tokens) in enumerate(pool):
+            redundancy = max((text_similarity(tokens, s) for _, s in selected), default=0.0)
+            score = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best_index, best_score = i, score
+
+        doc, _, tokens = pool.pop(best_index)
+        if any(text_similarity(tokens, s) >= duplicate_similarity for _, s in selected):
+            continue
+        # Chunks carry their token count from ingestion; count only legacy chunks
+        doc_tokens = doc.metadata.get("token_count") or count_tokens(doc.page_content)
+        if selected and used_tokens + doc_tokens > max_tokens:
+            break
+        selected.append((doc, tokens))
+        used_tokens += doc_tokens
+
+    metrics.RAG_CONTEXT_TOKENS.observe(used_tokens)
+    return [doc for doc, _ in selected]
+
+
+def select_context(dense: list[tuple[Document, float]], lexical: list[tuple[Document, float]]) -> list[Document]:
+    """
+    Score-aware context selection: drop dense hits below RAG_SIMILARITY_THRESHOLD and BM25 hits
+    that neither passed it nor reach RAG_BM25_MIN_SCORE, fuse the survivors, then pick diverse
+    chunks with MMR within RAG_CONTEXT_MAX_TOKENS.
+    """
+    kept = [(doc, score) for doc, score in dense if score >= control.RAG_SIMILARITY_THRESHOLD]
+    relevant = {doc.page_content for doc, _ in kept}
+    lexical_kept = [
+        doc for doc, score in lexical
+        if doc.page_content in relevant or score >= control.RAG_BM25_MIN_SCORE
+    ]
+    logger.debug(
+        f"Retrieval: {len(kept)}/{len(dense)} dense hits above threshold, "
+        f"{len(lexical_kept)}/{len(lexical)} lexical hits kept"
+    )
+
+    if lexical_kept:
+        fused = rrf_scores([[doc for doc, _ in kept], lexical_kept], control.RAG_RRF_K)
+        # Normalize so the top surviving chunk has relevance 1.0 (comparable with the redundancy term)
+        top = fused[0][1]
+        candidates = [(doc, score / top) for doc, score in fused]
+    else:
+        candidates = kept
+
+    return mmr_select(
+        candidates,
+        max_docs=control.RAG_TOP_K,
+        max_tokens=control.RAG_CONTEXT_MAX_TOKENS,
+        lambda_mult=control.RAG_MMR_LAMBDA,
+        duplicate_similarity=control.RAG_DUPLICATE_SIMILARITY
+    )
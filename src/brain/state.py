@@ -1,10 +1,15 @@
-import operator
 from typing import Annotated, TypedDict
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
 
 class AgentState(TypedDict):
-    # The 'add' operator is critical here. 
+    # The 'add_messages' reducer is critical here.
     # It tells the graph: "When a node returns 'messages', append them to this list."
-    messages: Annotated[list[BaseMessage], operator.add]
+    # Unlike operator.add it also accepts RemoveMessage, which is how turns that were
+    # folded into the summary are dropped from the stored history.
+    messages: Annotated[list[BaseMessage], add_messages]
 
-    context: str
\ No newline at end of file
+    context: str
+
+    # Rolling summary of turns no longer kept verbatim (see src/brain/history.py)
+    summary: str
\ No newline at end of file
@@ -0,0 +1,93 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+from uuid import UUID
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from src.core import control
+from src.db.crud import get_conversation_checkpoint, save_conversation_checkpoint
+
+logger = logging.getLogger(__name__)
+
+# Compact state format: {"v": 1, "m": [["h", "Hi"], ["a", "Hello!"], ...], "s": "<rolling summary>"}
+FORMAT_VERSION = 1
+_TYPE_CODES = {"human": "h", "ai": "a", "system": "s"}
+_MESSAGE_CLASSES = {"h": HumanMessage, "a": AIMessage, "s": SystemMessage}
+
+
+def encode_messages(messages: list[BaseMessage]) -> dict:
+    """Serialize conversation messages to the compact storage format."""
+    return {
+        "v": FORMAT_VERSION,
+        "m": [[_TYPE_CODES[m.type], m.content] for m in messages if m.type in _TYPE_CODES]
+    }
+
+
+def decode_messages(data: dict) -> list[BaseMessage]:
+    """Inverse of encode_messages."""
+    if not data or data.get("v") != FORMAT_VERSION:
+        return []
+    return [_MESSAGE_CLASSES[code](content=content) for code, content in data.get("m", [])]
+
+
+def encode_state(values: dict) -> dict:
+    """Serialize the persisted part of AgentState (messages + rolling summary)."""
+    data = encode_messages(values.get("messages", []))
+    if values.get("summary"):
+        data["s"] = values["summary"]
+    return data
+
+
+def decode_state(data: dict) -> dict:
+    """Inverse of encode_state."""
+    return {"messages": decode_messages(data), "summary": (data or {}).get("s", "")}
+
+
+class ConversationStore(ABC):
+    """Durable conversation memory shared by all workers. The in-process checkpointer is its hot cache."""
+
+    @abstractmethod
+    async def load(self, thread_id: str) -> dict:
+        """Return {"messages": [...], "summary": str} (empty messages if the thread is unknown)."""
+        pass
+
+    @abstractmethod
+    async def save(self, thread_id: str, values: dict, user_uuid: Optional[str] = None):
+        """Persist the thread's current state values."""
+        pass
+
+
+class SQLConversationStore(ConversationStore):
+    """
+    Conversation store on the async SQLAlchemy engine (SQLite locally/in tests, Postgres in production).
+    One row per thread, rewritten once per turn.
+    """
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from src.db.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+
+    async def load(self, thread_id: str) -> dict:
+        async with self.session_factory() as db:
+            checkpoint = await get_conversation_checkpoint(db, thread_id)
+        return decode_state(checkpoint.messages_json if checkpoint else {})
+
+    async def save(self, thread_id: str, values: dict, user_uuid: Optional[str] = None):
+        async with self.session_factory() as db:
+            await save_conversation_checkpoint(
+                db,
+                thread_id,
+                encode_state(values),
+                UUID(user_uuid) if user_uuid else None
+            )
+
+
+def get_conversation_store() -> Optional[ConversationStore]:
+    """Durable store selected by control.CHECKPOINT_BACKEND (None = in-memory only, zero I/O)."""
+    if control.CHECKPOINT_BACKEND == "sql":
+        return SQLConversationStore()
+    return None
+
+
+conversation_store = get_conversation_store()
@@ -79,9 +79,15 @@ TTS_MODEL: str = "tts-1"
 # Options: "alloy", "echo", "fable", "onyx", "nova", "shimmer"
 TTS_VOICE: str = "alloy"
 
-# Response Format
-# Options: "pcm" (lowest latency), "mp3", "opus", "aac", "flac", "wav"
-TTS_RESPONSE_FORMAT: str = "pcm"
+# Response Format (default for sessions; a client can pick its own with ?audio_format= on /ws/chat)
+# "pcm" = lowest latency, raw 16-bit samples (largest); each chunk ends on a sample boundary
+# "opus" = smallest, Ogg Opus; each chunk is whole Ogg pages
+# "mp3" = each chunk is whole mp3 frames (see TTS Streaming Buffer below)
+TTS_RESPONSE_FORMAT: Literal["mp3", "pcm", "opus"] = "pcm"
+
+# PCM: prepend a WAV header to the first chunk of each sentence (off = raw samples only;
+# the format is announced to the client in the "audio_format" message either way)
+TTS_PCM_WAV_HEADER: bool = True
 
 # Speech Speed (0.25 to 4.0)
 # 1.0 = normal, <1.0 = slower, >1.0 = faster
@@ -96,13 +102,48 @@ TTS_OUTPUT_BITS_PER_SAMPLE: int = 16
 # Smaller = more frequent updates, Higher = fewer network calls
 TTS_CHUNK_SIZE: int = 2048
 
-# TTS Streaming Buffer Size (bytes)
-# Controls buffering before sending audio chunks to client
-# Smaller = lower latency but may cause audio breakup
-# Larger = smoother audio but slightly higher latency
-# Recommended: 4096-16384 for good balance
+# TTS Streaming Buffer (mp3, bytes)
+# The first chunk of a sentence is sent once TTS_FIRST_CHUNK_SIZE bytes of whole frames have arrived
+# (fast first sound), later chunks double in size up to TTS_BUFFER_SIZE (fewer, larger messages)
+# A session's first chunk size doubles after a sentence whose audio underran on the client
+# and shrinks back after clean ones; chunks always end on an mp3 frame boundary
+TTS_FIRST_CHUNK_SIZE: int = 2048
 TTS_BUFFER_SIZE: int = 19000
 
+# TTS Phrase Cache
+# Synthesized sentences are cached by (text, model, voice, speed, format) and streamed at once when
+# repeated (greetings, fallback and error answers, common FAQ answers)
+# In-process LRU bounded by TTS_CACHE_MAX_MB, backed by an on-disk SQLite file shared by all workers
+ENABLE_TTS_CACHE: bool = True
+TTS_CACHE_MAX_MB: int = 32
+
+# Only sentences up to this length are cached (long answers rarely repeat)
+TTS_CACHE_MAX_SENTENCE_CHARS: int = 300
+
+# On-disk tier ("" = memory only)
+TTS_CACHE_PATH: str = ".cache/tts_audio.sqlite3"
+TTS_CACHE_DISK_MAX_ENTRIES: int = 20000
+
+# ============================================================================
+# HTTP Clients (OpenAI TTS, LLM and embeddings)
+# ============================================================================
+
+# One process-wide connection pool shared by all sessions (keep-alive: no TLS handshake per session)
+# HTTP/2 multiplexes concurrent requests over one connection (needs the h2 package; else HTTP/1.1)
+HTTP2_ENABLED: bool = True
+HTTP_MAX_CONNECTIONS: int = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+HTTP_KEEPALIVE_SECONDS: float = 120.0
+
+# Timeouts (seconds); TTS and LLM responses stream, so the read timeout is per chunk
+HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+HTTP_TIMEOUT_SECONDS: float = 60.0
+
+# Open connections at startup so the first session does not pay the handshakes
+# HTTP_PREWARM_CONNECTIONS = concurrent warm-up requests (HTTP/1.1: one connection each)
+PREWARM_HTTP_CLIENTS: bool = True
+HTTP_PREWARM_CONNECTIONS: int = 2
+
 # ============================================================================
 # RAG (Retrieval-Augmented Generation) Settings - Pinecone
 # ============================================================================
@@ -115,9 +156,176 @@ RAG_EMBEDDING_MODEL: str = "text-embedding-3-small"
 # Lower = faster, less context; Higher = more context, slower
 RAG_TOP_K: int = 2
 
-# Similarity Threshold (0.0 to 1.0)
+# Retrieval Mode
+# "adaptive" = over-fetch, drop weak matches, de-duplicate with MMR, fit RAG_CONTEXT_MAX_TOKENS
+#              (RAG_TOP_K becomes the maximum number of documents)
+# "top_k" = always send exactly RAG_TOP_K documents
+RAG_RETRIEVAL_MODE: Literal["adaptive", "top_k"] = "adaptive"
+
+# Candidates fetched from each retriever before filtering/fusion
+RAG_FETCH_K: int = 8
+
+# Similarity Threshold (0.0 to 1.0, cosine similarity of the query and chunk embeddings)
 # Higher = only very similar docs, Lower = more diverse results
-RAG_SIMILARITY_THRESHOLD: float = 0.7
+# text-embedding-3 models score relevant chunks around 0.3-0.6, so 0.7 would drop nearly everything
+RAG_SIMILARITY_THRESHOLD: float = 0.3
+
+# Context Token Budget (adaptive mode)
+# Chunks are added best-first until the next one would exceed this budget (the best chunk is always sent)
+RAG_CONTEXT_MAX_TOKENS: int = 800
+
+# Maximal Marginal Relevance (adaptive mode)
+# 1.0 = pure relevance, lower = prefer chunks that add new information
+RAG_MMR_LAMBDA: float = 0.7
+
+# Chunks whose word overlap with an already selected chunk is at least this are dropped
+RAG_DUPLICATE_SIMILARITY: float = 0.9
+
+# Hybrid Search
+# Query a per-user BM25 index in parallel with the vector search and merge with reciprocal rank fusion
+# Helps questions hinging on exact tokens (plan names, prices, SKUs, section numbers)
+ENABLE_HYBRID_SEARCH: bool = True
+
+# Reciprocal rank fusion constant (higher = flatter weighting of ranks)
+RAG_RRF_K: int = 60
+
+# BM25 score a lexical hit needs to enter the adaptive context on its own
+# (hits the vector search also returned above RAG_SIMILARITY_THRESHOLD always count).
+# Scores add up per matched query term, weighted by rarity: a single common word scores ~1-2,
+# an exact rare token (SKU, plan name) several points
+RAG_BM25_MIN_SCORE: float = 5.0
+
+# BM25 index location and memory bounds
+BM25_INDEX_PATH: str = "data/bm25"
+BM25_MAX_DOCS_PER_USER: int = 20000
+BM25_MAX_USERS: int = 500
+
+# Rewrite a user's BM25 log once this fraction of its records is dead
+# (re-uploaded, deleted or evicted chunks), so reloading it stays proportional to the live chunks
+BM25_COMPACT_RATIO: float = 0.5
+
+# Document Chunking (uploads)
+# Uploaded pages/files are split at headings, paragraphs and sentences into chunks of at most
+# CHUNK_SIZE_TOKENS, consecutive chunks sharing ~CHUNK_OVERLAP_TOKENS
+# Smaller = tighter context and cheaper turns; Larger = more surrounding detail per chunk
+CHUNK_SIZE_TOKENS: int = 300
+CHUNK_OVERLAP_TOKENS: int = 40
+
+# A heading only starts a new chunk once the current one has at least this many tokens
+CHUNK_MIN_TOKENS: int = 50
+
+# Upload Processing
+# Parsing + chunking run in a process pool so large files never stall live voice sessions
+# PARSE_MAX_WORKERS = pool processes per API worker
+PARSE_MAX_WORKERS: int = 2
+
+# Upload jobs ingested concurrently per ingestion worker (others stay queued)
+INGEST_MAX_CONCURRENCY: int = 2
+
+# Ingestion Embedding
+# Chunks are packed into embedding requests of at most EMBED_BATCH_MAX_TOKENS / EMBED_BATCH_MAX_INPUTS
+# (progress is reported after each request); each batch is upserted while later ones embed
+EMBED_BATCH_MAX_TOKENS: int = 8000
+EMBED_BATCH_MAX_INPUTS: int = 128
+
+# Embedding requests in flight per ingestion worker
+# Halved on every rate limit (429) and grown back one at a time as requests succeed
+EMBED_MAX_CONCURRENCY: int = 4
+
+# Retries of a rate-limited request (exponential backoff, or the server's Retry-After)
+EMBED_MAX_RETRIES: int = 5
+
+# Upload Size Limits
+# Request bodies over UPLOAD_MAX_REQUEST_MB are rejected (413) before they are parsed;
+# files over UPLOAD_MAX_FILE_MB are rejected (single upload) or marked failed (batch)
+# Uploads are streamed to disk in 1 MB pieces, so memory use does not grow with file size
+UPLOAD_MAX_FILE_MB: int = 50
+UPLOAD_MAX_REQUEST_MB: int = 200
+
+# Ingestion Jobs
+# Uploads are spooled to INGESTION_UPLOAD_DIR and queued in the database; the API answers 202 at once
+# "in_app" = a worker runs inside each API process
+# "external" = API only enqueues; run `python -m src.ingestion.worker` (same DB and upload dir) to ingest
+INGESTION_WORKER_MODE: Literal["in_app", "external"] = "in_app"
+INGESTION_UPLOAD_DIR: str = "data/uploads"
+
+# How often an idle worker checks for queued jobs (seconds)
+INGESTION_POLL_SECONDS: float = 1.0
+
+# Running jobs heartbeat every INGESTION_HEARTBEAT_SECONDS; a job silent for INGESTION_JOB_TIMEOUT_SECONDS
+# (worker crashed or restarted) is requeued, and failed after INGESTION_MAX_ATTEMPTS tries
+INGESTION_HEARTBEAT_SECONDS: float = 10.0
+INGESTION_JOB_TIMEOUT_SECONDS: float = 120.0
+INGESTION_MAX_ATTEMPTS: int = 3
+
+# Vector Store Backend
+# "pinecone" = managed index (network round-trip per query)
+# "local" = memory-mapped per-user index on this host (no network, works offline)
+VECTOR_BACKEND: Literal["pinecone", "local"] = "pinecone"
+
+# Pinecone record layout: metadata key holding the chunk text, and namespace ("" = default namespace)
+# Used by both the retriever's vector store and the ingestion upserts, so they always agree
+PINECONE_TEXT_KEY: str = "text"
+PINECONE_NAMESPACE: str = ""
+
+# Local index location and storage precision
+# "float16" = near-exact scores; "int8" = half the size and ~4x faster search, slightly lower recall
+LOCAL_INDEX_PATH: str = "data/vector_index"
+LOCAL_INDEX_DTYPE: Literal["float16", "int8"] = "float16"
+
+# Compact a user's partition once this fraction of its rows is deleted
+LOCAL_INDEX_COMPACT_RATIO: float = 0.2
+
+# Embedding Cache
+# Reuses embeddings for repeated queries and re-uploaded chunks (keyed by model + normalized text)
+# In-process LRU, backed by an on-disk SQLite file shared by all workers on the host
+ENABLE_EMBEDDING_CACHE: bool = True
+EMBEDDING_CACHE_MAX_ENTRIES: int = 2048
+
+# On-disk tier ("" = memory only)
+EMBEDDING_CACHE_PATH: str = ".cache/embeddings.sqlite3"
+EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 200000
+
+# ============================================================================
+# Conversation Memory (LangGraph checkpointer)
+# ============================================================================
+
+# Checkpoint Backend
+# "memory" = in-process only, zero I/O (single worker)
+# "sql" = durable store on DATABASE_URL, shared by all workers; memory is its read-through cache
+CHECKPOINT_BACKEND: Literal["memory", "sql"] = "memory"
+
+# Verbatim History Window
+# The last HISTORY_MAX_TURNS turns that fit in HISTORY_MAX_TOKENS are sent to the LLM as-is
+# Lower = cheaper, faster turns; Higher = more exact recall
+HISTORY_MAX_TURNS: int = 6
+HISTORY_MAX_TOKENS: int = 1500
+
+# Rolling Summary
+# Fold older turns into a running summary after the turn finishes streaming
+# (turns outside the window are sent verbatim until a summary covers them)
+# False = older turns are simply not sent to the LLM
+ENABLE_HISTORY_SUMMARY: bool = True
+
+# Turns that must age out of the window before they are folded (batches summary calls)
+HISTORY_SUMMARY_MIN_TURNS: int = 2
+
+# Max tokens for the summary itself
+HISTORY_SUMMARY_MAX_TOKENS: int = 200
+
+# Max Conversation Threads kept in memory (least recently used are evicted first)
+CHECKPOINT_MAX_THREADS: int = 10000
+
+# Max Total Checkpoint Size (bytes, serialized)
+CHECKPOINT_MAX_BYTES: int = 256 * 1024 * 1024
+
+# Idle Thread TTL (seconds)
+# Threads not read or written for this long are evicted. 0 = never expire
+CHECKPOINT_TTL_SECONDS: int = 3600
+
+# Checkpoints Kept per Thread
+# Older (superseded) checkpoints are pruned after every write. 1 = latest only
+CHECKPOINT_KEEP_PER_THREAD: int = 1
 
 # ============================================================================
 # WebSocket & Connection Settings
@@ -144,15 +352,48 @@ WS_CONNECTION_TIMEOUT: int = 300
 # False = faster but may sound choppy
 ENABLE_SENTENCE_BUFFERING: bool = True
 
+# Raw Token-Group Size (words)
+# When ENABLE_SENTENCE_BUFFERING is False, tokens are sent to TTS in groups of this many words
+TOKEN_GROUP_WORDS: int = 6
+
+# Early First-Chunk Flush
+# Send the first chunk of each answer to TTS before the first sentence is complete:
+# at a clause boundary (",", "—") once it has FIRST_CHUNK_MIN_WORDS words,
+# or unconditionally after FIRST_CHUNK_MAX_WORDS words
+# True = faster time-to-first-audio, False = first chunk is always a full sentence
+ENABLE_FIRST_CHUNK_FLUSH: bool = True
+FIRST_CHUNK_MIN_WORDS: int = 3
+FIRST_CHUNK_MAX_WORDS: int = 10
+
 # ============================================================================
 # Response Quality vs Speed Trade-offs
 # ============================================================================
 
 # Parallel TTS Processing
-# Start playing audio while still generating text
-# True = lowest latency, False = wait for full text before audio
+# Synthesize upcoming sentences while the current one is still streaming
+# (audio is still sent to the client strictly in sentence order)
+# True = lowest latency, False = one sentence at a time
 PARALLEL_TTS_PROCESSING: bool = True
 
+# Parallel TTS Window
+# Max sentences in flight (synthesizing or buffered) when PARALLEL_TTS_PROCESSING is on
+# Higher = fewer gaps between sentences, more concurrent TTS requests per call
+TTS_PIPELINE_WINDOW: int = 3
+
+# Latency-Masking Filler Audio
+# If no answer audio is ready FILLER_DELAY_MS after the user stopped speaking (retrieval and the
+# first LLM tokens still pending), play a short acknowledgement; once the answer's audio is ready
+# the clip stops at its next chunk and the answer follows
+# Clips are synthesized once at startup in every audio format and replayed from memory
+# True = less dead air (perceived latency), False = silence until the answer's first audio
+ENABLE_FILLER_AUDIO: bool = False
+FILLER_DELAY_MS: int = 700
+FILLER_PHRASES: tuple[str, ...] = ("Sure,", "Let me check.", "One moment.", "Okay,")
+
+# Filler chunks are sent this far ahead of playback; more is queued only while the answer is not ready,
+# so once it is, the answer follows after at most this much filler audio
+FILLER_LEAD_SECONDS: float = 0.15
+
 # ============================================================================
 # Performance Monitoring
 # ============================================================================
@@ -162,9 +403,13 @@ PARALLEL_TTS_PROCESSING: bool = True
 ENABLE_TOKEN_LOGGING: bool = True
 
 # Detailed Performance Logging
-# Log timing for each component (ASR, LLM, TTS)
+# Log timing for each component (ASR, LLM, TTS) and a per-turn latency breakdown
 ENABLE_PERFORMANCE_LOGGING: bool = False
 
+# Prometheus Metrics Endpoint
+# Expose per-turn latency histograms and session/token/error counters at /metrics
+ENABLE_METRICS_ENDPOINT: bool = True
+
 # Log Level for Voice Pipeline
 # Options: "DEBUG", "INFO", "WARNING", "ERROR"
 VOICE_PIPELINE_LOG_LEVEL: str = "INFO"
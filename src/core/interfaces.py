@@ -25,8 +25,20 @@ class LLMInterface(ABC):
     def get_usage_stats(self) -> dict:
         pass
 
+    async def release(self) -> None:
+        """Free per-session state (e.g. conversation checkpoints) when the connection ends"""
+        pass
+
 class TTSInterface(ABC):
     @abstractmethod
     # FIX: Use AsyncGenerator, not asyncio.AsyncGenerator
     async def speak(self, text: str) -> AsyncGenerator[bytes, None]:
-        yield b"abstract_yield"
\ No newline at end of file
+        yield b"abstract_yield"
+
+    def get_audio_format(self) -> dict:
+        """Format of the audio chunks `speak` yields, announced to the client at connect"""
+        return {}
+
+    def get_stats(self) -> dict:
+        """Per-session synthesis stats, logged in the call summary"""
+        return {}
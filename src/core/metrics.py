@@ -0,0 +1,320 @@
+"""
+Metrics
+=========================
+Minimal in-process Prometheus metrics (text exposition format 0.0.4) and per-turn
+latency timestamps for the voice pipeline. Rendered by the /metrics endpoint.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+
+# Default buckets (seconds) tuned for voice latency: most stages land between 50ms and 3s
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{_escape_label_value(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()  # ASR callbacks run on Deepgram's thread
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> ([count per bucket], sum, count)
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, (bucket_counts, total, count) in self._values.items():
+            labels = _format_labels(self.labelnames, key)
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+            inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Voice pipeline metrics ---
+TURN_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "chronos_turn_stage_seconds",
+    "Offset of each voice turn stage from the end of user speech (ASR final or text received)",
+    ("stage",)
+))
+TIME_TO_FIRST_AUDIO = REGISTRY.register(Histogram(
+    "chronos_time_to_first_audio_seconds",
+    "Time from end of user speech to the first answer audio frame sent to the client"
+))
+PERCEIVED_TIME_TO_FIRST_AUDIO = REGISTRY.register(Histogram(
+    "chronos_perceived_time_to_first_audio_seconds",
+    "Time from end of user speech to the first audio frame of any kind (filler clip or answer)"
+))
+FILLER_CLIPS = REGISTRY.register(Counter(
+    "chronos_filler_clips_total",
+    "Voice turns by filler outcome (played, cut_short by the answer, not_needed, unavailable)",
+    ("outcome",)
+))
+RETRIEVAL_SECONDS = REGISTRY.register(Histogram(
+    "chronos_retrieval_seconds",
+    "Duration of the retrieval node"
+))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "chronos_active_sessions",
+    "Open voice/chat WebSocket sessions"
+))
+TURNS = REGISTRY.register(Counter(
+    "chronos_turns_total",
+    "Conversation turns by outcome",
+    ("outcome",)
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "chronos_llm_tokens_total",
+    "LLM tokens used, by direction",
+    ("direction",)
+))
+TTS_FIRST_CHUNK_SECONDS = REGISTRY.register(Histogram(
+    "chronos_tts_first_chunk_seconds",
+    "Time from a sentence's TTS request to its first decodable audio chunk"
+))
+TTS_UNDERRUNS = REGISTRY.register(Counter(
+    "chronos_tts_underruns_total",
+    "Audio chunks produced after the client would have played everything before them",
+    ("format",)
+))
+TTS_CACHE = REGISTRY.register(Counter(
+    "chronos_tts_cache_total",
+    "TTS phrase cache lookups by result (memory_hits, disk_hits, shared, misses)",
+    ("result",)
+))
+TTS_CACHE_BYTES_SAVED = REGISTRY.register(Counter(
+    "chronos_tts_cache_bytes_saved_total",
+    "Audio bytes served from the phrase cache or a shared synthesis instead of a new TTS request"
+))
+TTS_BYTES = REGISTRY.register(Counter(
+    "chronos_tts_bytes_total",
+    "Synthesized audio bytes sent to clients, by audio format",
+    ("format",)
+))
+ERRORS = REGISTRY.register(Counter(
+    "chronos_errors_total",
+    "Errors by pipeline component",
+    ("component",)
+))
+
+# --- Conversation memory metrics ---
+CHECKPOINT_THREADS = REGISTRY.register(Gauge(
+    "chronos_checkpoint_threads",
+    "Conversation threads held by the checkpointer"
+))
+CHECKPOINT_BYTES = REGISTRY.register(Gauge(
+    "chronos_checkpoint_bytes",
+    "Serialized size of all conversation checkpoints held in memory"
+))
+CHECKPOINT_EVICTIONS = REGISTRY.register(Counter(
+    "chronos_checkpoint_evictions_total",
+    "Conversation threads dropped from the checkpointer, by reason",
+    ("reason",)
+))
+
+# --- Retrieval metrics ---
+RAG_CONTEXT_TOKENS = REGISTRY.register(Histogram(
+    "chronos_rag_context_tokens",
+    "Retrieved context tokens sent to the LLM per turn",
+    buckets=(0, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 4000)
+))
+LEXICAL_SEARCH_SECONDS = REGISTRY.register(Histogram(
+    "chronos_lexical_search_seconds",
+    "Duration of one BM25 query",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+))
+LEXICAL_INDEX_BYTES = REGISTRY.register(Gauge(
+    "chronos_lexical_index_bytes",
+    "Approximate memory held by the loaded BM25 partitions"
+))
+EMBEDDING_CACHE = REGISTRY.register(Counter(
+    "chronos_embedding_cache_total",
+    "Embedding lookups by result (memory_hits, disk_hits, misses)",
+    ("result",)
+))
+
+
+# --- Ingestion metrics ---
+INGEST_CHUNKS = REGISTRY.register(Counter(
+    "chronos_ingest_chunks_total",
+    "Uploaded chunks by ingestion stage (embedded, upserted, skipped)",
+    ("stage",)
+))
+INGEST_CHUNKS_PER_SECOND = REGISTRY.register(Gauge(
+    "chronos_ingest_chunks_per_second",
+    "Embedding + upsert throughput of the last ingested file"
+))
+EMBEDDING_RATE_LIMITS = REGISTRY.register(Counter(
+    "chronos_embedding_rate_limits_total",
+    "Embedding requests rejected with HTTP 429 during ingestion"
+))
+
+
+# --- Per-turn latency breakdown ---
+# Stages in pipeline order; each is recorded as an offset from the turn start
+TURN_STAGES = (
+    "retrieval_start",
+    "retrieval_end",
+    "llm_first_token",
+    "llm_last_token",
+    "tts_first_byte",
+    "tts_last_byte",
+    "filler_audio_sent",
+    "first_audio_sent",
+)
+
+
+class TurnTimer:
+    """Timestamps (time.perf_counter) for one voice turn."""
+
+    def __init__(self, started_at: float | None = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.marks: dict[str, float] = {}
+
+    def mark(self, stage: str, once: bool = True):
+        """Record `stage` now. With once=True only the first call counts (e.g. first token)."""
+        if once and stage in self.marks:
+            return
+        self.marks[stage] = time.perf_counter()
+
+    def offsets_ms(self) -> dict[str, float]:
+        return {
+            stage: round((self.marks[stage] - self.started_at) * 1000, 1)
+            for stage in TURN_STAGES if stage in self.marks
+        }
+
+    def mark_first_audio(self, filler: bool = False) -> bool:
+        """
+        Record the first answer (or filler) audio frame sent. Time-to-first-audio counts the answer only,
+        perceived time-to-first-audio whichever came first. Returns False if already recorded.
+        """
+        stage, other = ("filler_audio_sent", "first_audio_sent") if filler else ("first_audio_sent", "filler_audio_sent")
+        if stage in self.marks:
+            return False
+        self.mark(stage)
+        elapsed = self.marks[stage] - self.started_at
+        if other not in self.marks:
+            PERCEIVED_TIME_TO_FIRST_AUDIO.observe(elapsed)
+        if not filler:
+            TIME_TO_FIRST_AUDIO.observe(elapsed)
+        TURN_STAGE_SECONDS.observe(elapsed, stage=stage)
+        return True
+
+    def observe(self):
+        """Feed the completed turn into the stage histograms."""
+        for stage in TURN_STAGES:
+            # Audio stages are observed by mark_first_audio() when the frame goes out
+            if stage in self.marks and stage not in ("filler_audio_sent", "first_audio_sent"):
+                TURN_STAGE_SECONDS.observe(self.marks[stage] - self.started_at, stage=stage)
+        if "retrieval_start" in self.marks and "retrieval_end" in self.marks:
+            RETRIEVAL_SECONDS.observe(self.marks["retrieval_end"] - self.marks["retrieval_start"])
+
+
+# The timer of the turn being processed. Set by the ConnectionManager on the turn task;
+# asyncio tasks copy the context, so graph nodes and TTS workers of that turn see it too.
+current_turn_timer: ContextVar[TurnTimer | None] = ContextVar("current_turn_timer", default=None)
+
+
+def mark_stage(stage: str, once: bool = True):
+    """Record a stage on the current turn's timer, if there is one."""
+    timer = current_turn_timer.get()
+    if timer is not None:
+        timer.mark(stage, once)
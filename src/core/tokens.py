@@ -0,0 +1,30 @@
+import logging
+from functools import lru_cache
+from src.core import control
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English text, used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tiktoken encoding for control.LLM_MODEL once (None if unavailable, e.g. offline)."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(control.LLM_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, using {CHARS_PER_TOKEN} chars/token estimate: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally (no API call)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
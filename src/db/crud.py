@@ -1,9 +1,10 @@
 # src/db/crud.py
-from datetime import datetime
+from datetime import datetime, timezone
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.models import User, SessionLog
+from sqlalchemy.orm import selectinload
+from src.db.models import User, SessionLog, ConversationCheckpoint, IngestionJob, IngestionFile, SourceDocument, DocumentChunk
 
 async def create_user(db: AsyncSession, email: str, hashed_password: str) -> User:
     user = User(email=email, hashed_password=hashed_password)
@@ -36,3 +37,212 @@ async def update_session_log(db: AsyncSession, session_id: str, ended_at: dateti
         session_log.ended_at = ended_at
         session_log.token_usage_json = token_usage
         await db.commit()
+
+async def get_conversation_checkpoint(db: AsyncSession, thread_id: str) -> ConversationCheckpoint | None:
+    result = await db.execute(select(ConversationCheckpoint).where(ConversationCheckpoint.thread_id == thread_id))
+    return result.scalar_one_or_none()
+
+async def save_conversation_checkpoint(db: AsyncSession, thread_id: str, messages_json: dict, user_id: UUID | None = None):
+    # Upsert the latest conversation state for a thread
+    checkpoint = await get_conversation_checkpoint(db, thread_id)
+    
+    if checkpoint:
+        checkpoint.messages_json = messages_json
+        checkpoint.updated_at = datetime.now(timezone.utc)
+    else:
+        db.add(ConversationCheckpoint(thread_id=thread_id, user_id=user_id, messages_json=messages_json))
+    await db.commit()
+
+async def create_ingestion_job(db: AsyncSession, user_id: UUID, files: list[dict]) -> IngestionJob:
+    # files: [{"filename", "file_type", "storage_path"}] in upload order
+    job = IngestionJob(
+        user_id=user_id,
+        files=[IngestionFile(position=i, **f) for i, f in enumerate(files)]
+    )
+    db.add(job)
+    await db.commit()
+    return await get_ingestion_job(db, job.id)  # type: ignore
+
+async def get_ingestion_job(db: AsyncSession, job_id: UUID, user_id: UUID | None = None) -> IngestionJob | None:
+    query = select(IngestionJob).options(selectinload(IngestionJob.files)).where(IngestionJob.id == job_id)
+    if user_id is not None:
+        query = query.where(IngestionJob.user_id == user_id)
+    result = await db.execute(query.execution_options(populate_existing=True))
+    return result.scalar_one_or_none()
+
+async def list_ingestion_jobs(db: AsyncSession, user_id: UUID, limit: int = 20) -> list[IngestionJob]:
+    result = await db.execute(
+        select(IngestionJob)
+        .options(selectinload(IngestionJob.files))
+        .where(IngestionJob.user_id == user_id)
+        .order_by(IngestionJob.created_at.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def claim_ingestion_job(db: AsyncSession, worker_id: str) -> IngestionJob | None:
+    # Oldest queued job; the conditional UPDATE makes the claim atomic across workers and processes
+    candidates = await db.execute(
+        select(IngestionJob.id)
+        .where(IngestionJob.status == "queued")
+        .order_by(IngestionJob.created_at)
+        .limit(5)
+    )
+    for job_id in candidates.scalars().all():
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id, IngestionJob.status == "queued")
+            .values(
+                status="running", worker_id=worker_id, attempts=IngestionJob.attempts + 1,
+                started_at=now, heartbeat_at=now
+            )
+        )
+        await db.commit()
+        if result.rowcount == 1:  # type: ignore
+            return await get_ingestion_job(db, job_id)
+    return None
+
+async def heartbeat_ingestion_job(db: AsyncSession, job_id: UUID):
+    await db.execute(
+        update(IngestionJob).where(IngestionJob.id == job_id).values(heartbeat_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+
+async def requeue_stale_ingestion_jobs(db: AsyncSession, stale_before: datetime, max_attempts: int) -> int:
+    # Jobs whose worker stopped heartbeating: retry, or fail once they have used up their attempts
+    stale = (IngestionJob.status == "running", IngestionJob.heartbeat_at < stale_before)
+    failed = await db.execute(
+        update(IngestionJob)
+        .where(*stale, IngestionJob.attempts >= max_attempts)
+        .values(status="failed", error="Worker stopped responding", finished_at=datetime.now(timezone.utc))
+    )
+    requeued = await db.execute(
+        update(IngestionJob).where(*stale).values(status="queued", worker_id=None)
+    )
+    await db.commit()
+    return requeued.rowcount + failed.rowcount  # type: ignore
+
+async def update_ingestion_file(db: AsyncSession, file_id: UUID, **values):
+    # Progress of one file: status, page/chunk counters, error
+    await db.execute(
+        update(IngestionFile)
+        .where(IngestionFile.id == file_id)
+        .values(updated_at=datetime.now(timezone.utc), **values)
+    )
+    await db.commit()
+
+async def finish_ingestion_job(db: AsyncSession, job_id: UUID, status: str, error: str | None = None):
+    await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id)
+        .values(status=status, error=error, finished_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+
+async def get_document_by_hash(db: AsyncSession, user_id: UUID | None, content_hash: str) -> SourceDocument | None:
+    result = await db.execute(
+        select(SourceDocument)
+        .where(SourceDocument.user_id == user_id, SourceDocument.content_hash == content_hash)
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+async def get_existing_vector_ids(db: AsyncSession, user_id: UUID | None, vector_ids: list[str]) -> set[str]:
+    # Which of these vectors the user already has in the index (from any document)
+    existing: set[str] = set()
+    for start in range(0, len(vector_ids), 500):
+        result = await db.execute(
+            select(DocumentChunk.vector_id)
+            .where(DocumentChunk.user_id == user_id, DocumentChunk.vector_id.in_(vector_ids[start:start + 500]))
+        )
+        existing.update(result.scalars().all())
+    return existing
+
+async def create_document(
+    db: AsyncSession,
+    user_id: UUID | None,
+    filename: str,
+    file_type: str,
+    content_hash: str,
+    chunks: list[tuple[str, str]]
+) -> SourceDocument:
+    # chunks: [(chunk_hash, vector_id)] in document order
+    document = SourceDocument(
+        user_id=user_id,
+        filename=filename,
+        file_type=file_type,
+        content_hash=content_hash,
+        chunk_count=len(chunks),
+        chunks=[
+            DocumentChunk(user_id=user_id, position=i, chunk_hash=chunk_hash, vector_id=vector_id)
+            for i, (chunk_hash, vector_id) in enumerate(chunks)
+        ]
+    )
+    db.add(document)
+    await db.commit()
+    return document
+
+async def list_documents(db: AsyncSession, user_id: UUID | None, limit: int = 100) -> list[SourceDocument]:
+    result = await db.execute(
+        select(SourceDocument)
+        .where(SourceDocument.user_id == user_id)
+        .order_by(SourceDocument.updated_at.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def get_document(db: AsyncSession, document_id: UUID, user_id: UUID | None = None) -> SourceDocument | None:
+    query = select(SourceDocument).options(selectinload(SourceDocument.chunks)).where(SourceDocument.id == document_id)
+    if user_id is not None:
+        query = query.where(SourceDocument.user_id == user_id)
+    result = await db.execute(query.execution_options(populate_existing=True))
+    return result.scalar_one_or_none()
+
+async def get_vector_ids_used_elsewhere(
+    db: AsyncSession, user_id: UUID | None, vector_ids: list[str], document_id: UUID
+) -> set[str]:
+    # Vectors shared with the user's other documents (same chunk text) must outlive this one
+    used: set[str] = set()
+    for start in range(0, len(vector_ids), 500):
+        result = await db.execute(
+            select(DocumentChunk.vector_id).where(
+                DocumentChunk.user_id == user_id,
+                DocumentChunk.document_id != document_id,
+                DocumentChunk.vector_id.in_(vector_ids[start:start + 500])
+            )
+        )
+        used.update(result.scalars().all())
+    return used
+
+async def replace_document_chunks(
+    db: AsyncSession,
+    document_id: UUID,
+    filename: str,
+    file_type: str,
+    content_hash: str,
+    chunks: list[tuple[str, str]]
+):
+    # New version of a document: swap its chunk rows and file details in one transaction
+    document = await db.get(SourceDocument, document_id)
+    if document is None:
+        return None
+    await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document_id))
+    document.filename = filename
+    document.file_type = file_type
+    document.content_hash = content_hash
+    document.chunk_count = len(chunks)
+    document.updated_at = datetime.now(timezone.utc)
+    db.add_all([
+        DocumentChunk(document_id=document_id, user_id=document.user_id, position=i, chunk_hash=chunk_hash, vector_id=vector_id)
+        for i, (chunk_hash, vector_id) in enumerate(chunks)
+    ])
+    await db.commit()
+    return document
+
+async def delete_document(db: AsyncSession, document_id: UUID):
+    # Ingestion files keep their history but lose the link
+    await db.execute(update(IngestionFile).where(IngestionFile.document_id == document_id).values(document_id=None))
+    await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document_id))
+    await db.execute(delete(SourceDocument).where(SourceDocument.id == document_id))
+    await db.commit()
@@ -1,7 +1,7 @@
 # src/db/models.py
 from datetime import datetime, timezone
 from uuid import uuid4
-from sqlalchemy import String, Boolean, JSON, ForeignKey, Text
+from sqlalchemy import String, Boolean, Integer, Float, JSON, ForeignKey, Text, Index, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP
 
@@ -49,3 +49,110 @@ class SessionLog(Base):
     
     # Relationships
     user: Mapped["User | None"] = relationship("User", back_populates="sessions")
+
+class ConversationCheckpoint(Base):
+    __tablename__ = "conversation_checkpoints"
+    
+    # Checkpointer thread id ("<user_uuid>:<session_id>" or "<session_id>")
+    thread_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    user_id: Mapped[UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True, nullable=True)
+    # Compact messages + rolling summary, see src/brain/store.py
+    messages_json: Mapped[dict] = mapped_column(JSON, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    user_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True, nullable=False)
+    # queued -> running -> completed | partial (some files failed) | failed (no file ingested)
+    status: Mapped[str] = mapped_column(String(20), index=True, default="queued", nullable=False)
+    worker_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    # Refreshed by the worker while it runs the job; a stale heartbeat means the worker died
+    heartbeat_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    
+    # Relationships
+    files: Mapped[list["IngestionFile"]] = relationship(
+        "IngestionFile", back_populates="job", order_by="IngestionFile.position", cascade="all, delete-orphan"
+    )
+
+class IngestionFile(Base):
+    __tablename__ = "ingestion_files"
+    
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    job_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("ingestion_jobs.id"), index=True, nullable=False)
+    position: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    file_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    # Upload spooled to disk until a worker has ingested it
+    storage_path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    # sha256 of the uploaded bytes (computed while spooling)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # queued -> parsed -> chunked -> embedded -> upserted | failed
+    status: Mapped[str] = mapped_column(String(20), default="queued", nullable=False)
+    pages: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chunks_total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chunks_embedded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    chunks_upserted: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Chunks already in the index (same user, same chunk hash): not embedded again
+    chunks_skipped: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Vectors of the replaced document's removed chunks
+    chunks_deleted: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Embed + upsert throughput of this file
+    chunks_per_second: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Registry entry of the ingested (or identical, already ingested) document
+    document_id: Mapped[UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("documents.id"), nullable=True)
+    # Set when the upload is a new version of an existing document (PUT /api/documents/{id})
+    replaces_document_id: Mapped[UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    # Relationships
+    job: Mapped["IngestionJob"] = relationship("IngestionJob", back_populates="files")
+
+class SourceDocument(Base):
+    __tablename__ = "documents"
+    # One document per content per user, so concurrent identical uploads cannot both be recorded
+    # (NULL user ids never conflict in a plain unique index, hence the partial one for the shared base)
+    __table_args__ = (
+        Index("uq_documents_user_hash", "user_id", "content_hash", unique=True),
+        Index(
+            "uq_documents_shared_hash", "content_hash", unique=True,
+            postgresql_where=text("user_id IS NULL"), sqlite_where=text("user_id IS NULL")
+        ),
+    )
+    
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    # None = shared knowledge base (visible to every user)
+    user_id: Mapped[UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True, nullable=True)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    file_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    # sha256 of the file; identical re-uploads are skipped before parsing
+    content_hash: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    chunk_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    # Relationships
+    chunks: Mapped[list["DocumentChunk"]] = relationship(
+        "DocumentChunk", back_populates="document", order_by="DocumentChunk.position", cascade="all, delete-orphan"
+    )
+
+class DocumentChunk(Base):
+    __tablename__ = "chunks"
+    
+    id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    document_id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("documents.id"), index=True, nullable=False)
+    user_id: Mapped[UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True, nullable=True)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    # sha256 of the chunk text; vector_id = uuid5(user, chunk_hash), see src/ingestion/registry.py
+    chunk_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    vector_id: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    
+    # Relationships
+    document: Mapped["SourceDocument"] = relationship("SourceDocument", back_populates="chunks")
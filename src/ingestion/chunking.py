@@ -0,0 +1,160 @@
+import re
+import logging
+from dataclasses import dataclass
+from typing import Optional
+from langchain_core.documents import Document
+from src.core import control
+from src.core.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# "3.1 Refund Policy", "IV. Pricing"
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*|[IVX]+)\.?\s+\S")
+
+
+def is_heading(line: str) -> bool:
+    """Markdown headings, numbered section titles and short title-case / upper-case lines."""
+    line = line.strip()
+    if not line or len(line) > 100:
+        return False
+    if line.startswith("#"):
+        return True
+    if line[-1] in ".,;:!?":
+        return False
+    words = line.split()
+    if len(words) > 10:
+        return False
+    return bool(_NUMBERED_HEADING.match(line)) or line.isupper() or line.istitle()
+
+
+def split_blocks(text: str) -> list[tuple[str, str]]:
+    """Split page text into ("heading" | "paragraph", text) blocks; hard-wrapped lines are joined."""
+    blocks = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        lines = [line.strip() for line in paragraph.splitlines() if line.strip()]
+        body: list[str] = []
+        for line in lines:
+            # Markdown headings anywhere ("# Title\ntext"); other headings only as a one-line paragraph
+            if line.startswith("#") or (len(lines) == 1 and is_heading(line)):
+                if body:
+                    blocks.append(("paragraph", " ".join(body)))
+                    body = []
+                blocks.append(("heading", line.lstrip("#").strip()))
+            else:
+                body.append(line)
+        if body:
+            blocks.append(("paragraph", " ".join(body)))
+    return blocks
+
+
+@dataclass
+class _Unit:
+    text: str
+    tokens: int
+    separator: str      # Joins this unit to the previous one in a chunk
+    metadata: dict      # Metadata of the source page
+    section: Optional[str]
+
+
+class TokenChunker:
+    """
+    Structure-aware chunker: packs headings, paragraphs and (for long paragraphs) sentences into
+    chunks of about `chunk_tokens`, overlapping consecutive chunks by up to `overlap_tokens`.
+    A heading starts a new chunk; pages are packed together but each chunk keeps the
+    metadata (e.g. page) of the page it starts on.
+    """
+
+    def __init__(self, chunk_tokens: int = 300, overlap_tokens: int = 40, min_tokens: int = 50):
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = min(overlap_tokens, chunk_tokens // 2)
+        self.min_tokens = min_tokens
+
+    @classmethod
+    def from_control(cls) -> "TokenChunker":
+        return cls(control.CHUNK_SIZE_TOKENS, control.CHUNK_OVERLAP_TOKENS, control.CHUNK_MIN_TOKENS)
+
+    def split_documents(self, documents: list[Document]) -> list[Document]:
+        chunks: list[Document] = []
+        current: list[_Unit] = []
+        fresh = 0  # Units in `current` that are not overlap from the previous chunk
+        section: Optional[str] = None
+
+        def flush(overlap: bool):
+            nonlocal current, fresh
+            if fresh:
+                chunks.append(self._to_document(current, len(current) - fresh, len(chunks)))
+            current = self._tail(current) if overlap and fresh else []
+            fresh = 0
+
+        for document in documents:
+            for kind, text in split_blocks(document.page_content):
+                if kind == "heading":
+                    if sum(u.tokens for u in current) >= self.min_tokens or not fresh:
+                        flush(overlap=False)
+                    section = text
+                    units = [_Unit(text, count_tokens(text), "\n\n", document.metadata, section)]
+                else:
+                    units = self._units(text, document.metadata, section)
+
+                for unit in units:
+                    if fresh and sum(u.tokens for u in current) + unit.tokens > self.chunk_tokens:
+                        flush(overlap=True)
+                    # Shrink the carried overlap rather than exceed the chunk size
+                    while not fresh and current and sum(u.tokens for u in current) + unit.tokens > self.chunk_tokens:
+                        current.pop(0)
+                    current.append(unit)
+                    fresh += 1
+
+        flush(overlap=False)
+        return chunks
+
+    def _units(self, paragraph: str, metadata: dict, section: Optional[str]) -> list[_Unit]:
+        """A paragraph that fits is one unit; longer ones split into sentences, then word windows."""
+        tokens = count_tokens(paragraph)
+        if tokens <= self.chunk_tokens:
+            return [_Unit(paragraph, tokens, "\n\n", metadata, section)]
+
+        units = []
+        for sentence in _SENTENCE_BREAK.split(paragraph):
+            sentence_tokens = count_tokens(sentence)
+            if sentence_tokens <= self.chunk_tokens:
+                units.append(_Unit(sentence, sentence_tokens, " ", metadata, section))
+                continue
+            words = sentence.split()
+            # Words per window from the sentence's own token density
+            step = max(1, int(len(words) * self.chunk_tokens / sentence_tokens))
+            for start in range(0, len(words), step):
+                window = " ".join(words[start:start + step])
+                units.append(_Unit(window, count_tokens(window), " ", metadata, section))
+        units[0].separator = "\n\n"
+        return units
+
+    def _tail(self, units: list[_Unit]) -> list[_Unit]:
+        """Trailing units worth at most overlap_tokens, carried into the next chunk."""
+        tail: list[_Unit] = []
+        total = 0
+        for unit in reversed(units):
+            if total + unit.tokens > self.overlap_tokens:
+                break
+            tail.insert(0, unit)
+            total += unit.tokens
+        return tail
+
+    def _to_document(self, units: list[_Unit], first_new: int, index: int) -> Document:
+        """Join units into a chunk; page/section come from its first new (non-overlap) unit."""
+        text = units[0].text + "".join(u.separator + u.text for u in units[1:])
+        metadata = dict(units[first_new].metadata)
+        metadata["chunk_index"] = index
+        metadata["token_count"] = count_tokens(text)
+        if units[first_new].section:
+            metadata["section"] = units[first_new].section
+        return Document(page_content=text, metadata=metadata)
+
+
+def chunk_documents(documents: list[Document]) -> list[Document]:
+    """Split loader output (pages / whole files) into token-sized chunks using control.py settings."""
+    chunks = TokenChunker.from_control().split_documents(documents)
+    logger.debug(f"Chunked {len(documents)} document(s) into {len(chunks)} chunk(s)")
+    return chunks
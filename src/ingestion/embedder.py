@@ -0,0 +1,216 @@
+import time
+import random
+import asyncio
+import logging
+from typing import Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_pinecone import PineconeVectorStore
+from src.core import control, metrics
+from src.core.tokens import count_tokens
+from src.brain.local_index import LocalVectorStore
+
+logger = logging.getLogger(__name__)
+
+# Pinecone accepts at most 2 MB per upsert request (~100 vectors of 1536 dims plus text metadata)
+PINECONE_UPSERT_BATCH = 100
+
+
+def token_count(doc: Document) -> int:
+    # Set by the chunker; counted here for documents from elsewhere
+    return doc.metadata.get("token_count") or count_tokens(doc.page_content)
+
+
+def pack_batches(documents: list[Document], max_tokens: int, max_inputs: int) -> list[list[int]]:
+    """Group chunk indexes (in order) into embedding requests of at most max_tokens / max_inputs."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    tokens = 0
+    for i, doc in enumerate(documents):
+        doc_tokens = token_count(doc)
+        if current and (tokens + doc_tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(i)
+        tokens += doc_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def is_rate_limit(error: Exception) -> bool:
+    """OpenAI RateLimitError (and any client error carrying HTTP 429)."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that halves on every rate limit and grows back by one after
+    `limit` consecutive successes (AIMD), between 1 and max_concurrency.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.active = 0
+        self._successes = 0
+        self._cond: Optional[asyncio.Condition] = None  # Created in the worker's event loop
+
+    async def __aenter__(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:  # type: ignore
+            self.active -= 1
+            self._cond.notify_all()  # type: ignore
+
+    def on_success(self):
+        self._successes += 1
+        if self.limit < self.max_concurrency and self._successes >= self.limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limit(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+
+class BatchEmbedder:
+    """
+    Ingestion embedding: token-packed batches, a bounded number of requests in flight on the
+    shared embeddings client (with its cache), adaptive backoff on 429s, and each batch's
+    upsert pipelined behind the embedding of the following batches.
+    One instance per ingestion worker, so concurrent jobs share the rate-limit state.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = 8000,
+        max_batch_inputs: int = 128,
+        max_concurrency: int = 4,
+        max_retries: int = 5
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.max_retries = max_retries
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        # Totals over the embedder's lifetime (throughput reporting)
+        self.chunks_embedded = 0
+        self.tokens_embedded = 0
+
+    @classmethod
+    def from_control(cls, embeddings: Embeddings) -> "BatchEmbedder":
+        return cls(
+            embeddings,
+            max_batch_tokens=control.EMBED_BATCH_MAX_TOKENS,
+            max_batch_inputs=control.EMBED_BATCH_MAX_INPUTS,
+            max_concurrency=control.EMBED_MAX_CONCURRENCY,
+            max_retries=control.EMBED_MAX_RETRIES
+        )
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """One embedding request, retried with exponential backoff (or Retry-After) on rate limits."""
+        attempt = 0
+        while True:
+            async with self.limiter:
+                try:
+                    vectors = await self.embeddings.aembed_documents(texts)
+                    self.limiter.on_success()
+                    return vectors
+                except Exception as e:
+                    if not is_rate_limit(e) or attempt >= self.max_retries:
+                        raise
+                    self.limiter.on_rate_limit()
+                    delay = retry_after(e) or min(30.0, 2 ** attempt) * (0.5 + random.random())
+                    metrics.EMBEDDING_RATE_LIMITS.inc()
+                    logger.warning(f"Embedding rate limited; retrying in {delay:.1f}s (concurrency {self.limiter.limit})")
+            # Back off outside the limiter so other requests can use the slot
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def embed_and_upsert(
+        self,
+        vectorstore: VectorStore,
+        documents: list[Document],
+        ids: list[str],
+        on_embedded=None,
+        on_upserted=None
+    ) -> float:
+        """
+        Embed and upsert all chunks. on_embedded(count) / on_upserted(docs, ids) are awaited
+        after each batch. Returns chunks per second.
+        """
+        start = time.perf_counter()
+        upsert_slot = asyncio.Semaphore(1)  # Upserts in order of completion, one at a time
+        # Batches between "embedding started" and "upserted"; bounds vectors held in memory
+        in_flight = asyncio.Semaphore(2 * self.limiter.max_concurrency)
+
+        async def run(batch: list[int]):
+            async with in_flight:
+                docs = [documents[i] for i in batch]
+                batch_ids = [ids[i] for i in batch]
+                vectors = await self.embed([doc.page_content for doc in docs])
+                self.chunks_embedded += len(docs)
+                self.tokens_embedded += sum(token_count(doc) for doc in docs)
+                metrics.INGEST_CHUNKS.inc(len(docs), stage="embedded")
+                if on_embedded:
+                    await on_embedded(len(docs))
+                async with upsert_slot:
+                    await upsert_vectors(vectorstore, docs, vectors, batch_ids)
+                metrics.INGEST_CHUNKS.inc(len(docs), stage="upserted")
+                if on_upserted:
+                    await on_upserted(docs, batch_ids)
+
+        batches = pack_batches(documents, self.max_batch_tokens, self.max_batch_inputs)
+        tasks = [asyncio.create_task(run(batch)) for batch in batches]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        elapsed = time.perf_counter() - start
+        rate = len(documents) / elapsed if elapsed > 0 else 0.0
+        if documents:
+            metrics.INGEST_CHUNKS_PER_SECOND.set(rate)
+            logger.info(f"Embedded and upserted {len(documents)} chunk(s) in {len(batches)} batch(es): {rate:.1f} chunks/s")
+        return rate
+
+
+async def upsert_vectors(vectorstore: VectorStore, documents: list[Document], vectors: list[list[float]], ids: list[str]):
+    """Write precomputed embeddings (no second embedding call)."""
+    texts = [doc.page_content for doc in documents]
+    metadatas = [dict(doc.metadata) for doc in documents]
+    if isinstance(vectorstore, LocalVectorStore):
+        await asyncio.to_thread(vectorstore.index.add, vectors, texts, metadatas, ids)
+    elif isinstance(vectorstore, PineconeVectorStore):
+        # Same record layout as PineconeVectorStore.add_texts; text key and namespace come from
+        # control.py, which the retriever also configures the store with
+        records = [
+            {"id": i, "values": v, "metadata": {**m, control.PINECONE_TEXT_KEY: t}}
+            for i, v, m, t in zip(ids, vectors, metadatas, texts)
+        ]
+        await asyncio.to_thread(
+            vectorstore.index.upsert,
+            vectors=records, namespace=control.PINECONE_NAMESPACE or None,
+            batch_size=PINECONE_UPSERT_BATCH, show_progress=False
+        )
+    else:
+        await vectorstore.aadd_texts(texts, metadatas, ids=ids)
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from langchain_core.documents import Document
+from src.core import control
+from src.ingestion.chunking import chunk_documents
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md", ".docx", ".doc")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def load_file(file_path: str, file_extension: str) -> list[Document]:
+    """Run the LangChain loader for a file type (PDF: one Document per page, others: one per file)."""
+    # Loaders are imported here so the API process does not pay for them until a worker needs them
+    from langchain_community.document_loaders import (
+        PyPDFLoader,
+        TextLoader,
+        Docx2txtLoader,
+        UnstructuredMarkdownLoader,
+    )
+    if file_extension == ".pdf":
+        loader = PyPDFLoader(file_path)
+    elif file_extension == ".txt":
+        loader = TextLoader(file_path, encoding="utf-8")
+    elif file_extension == ".md":
+        loader = UnstructuredMarkdownLoader(file_path)
+    elif file_extension in [".docx", ".doc"]:
+        loader = Docx2txtLoader(file_path)
+    else:
+        raise ValueError(f"Unsupported file type: {file_extension}")
+    return loader.load()
+
+
+def load_tagged(file_path: str, file_extension: str, metadata: dict) -> list[Document]:
+    """Load a file and tag every page/document with `metadata`."""
+    documents = load_file(file_path, file_extension)
+    for doc in documents:
+        doc.metadata.update(metadata)
+    return documents
+
+
+def parse_file(file_path: str, file_extension: str, metadata: dict) -> list[Document]:
+    """Load, tag and chunk one file. Runs in a pool process: CPU-bound and blocking."""
+    return chunk_documents(load_tagged(file_path, file_extension, metadata))
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all uploads of this worker (created on first use)."""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=control.PARSE_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_parse_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_parse_pool(), func, *args)
+    except BrokenProcessPool:
+        # A parser crashed (e.g. out of memory on a malformed file); start a fresh pool for later uploads
+        logger.error("Document parsing pool crashed; restarting it")
+        shutdown_parse_pool()
+        raise
+
+
+async def parse_file_async(file_path: str, file_extension: str, metadata: dict) -> list[Document]:
+    """Parse and chunk a file in the process pool without blocking the event loop."""
+    return await _run_in_pool(parse_file, file_path, file_extension, metadata)
+
+
+async def load_file_async(file_path: str, file_extension: str, metadata: dict) -> list[Document]:
+    """Parse step only (see load_tagged), in the process pool."""
+    return await _run_in_pool(load_tagged, file_path, file_extension, metadata)
+
+
+async def chunk_documents_async(documents: list[Document]) -> list[Document]:
+    """Chunk step only (see chunk_documents), in the process pool."""
+    return await _run_in_pool(chunk_documents, documents)
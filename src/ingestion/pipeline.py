@@ -0,0 +1,179 @@
+import uuid
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+from langchain_core.documents import Document
+from src.core import metrics
+from src.brain.retriever import _get_ingestion_embeddings, _get_vectorstore
+from src.brain.local_index import LocalVectorStore
+from src.brain.lexical import get_lexical_index
+from src.ingestion.embedder import BatchEmbedder
+from src.ingestion.parsing import load_file_async, chunk_documents_async
+from src.ingestion.registry import DocumentRegistry, assign_ids, file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Called with progress fields of the file being ingested (status, pages, chunks_*)
+ProgressCallback = Callable[..., Awaitable[None]]
+
+
+async def _no_progress(**values):
+    pass
+
+
+def _stage(status: str, done: int, total: int) -> dict:
+    # A file reaches a stage once all of its chunks have passed it
+    return {"status": status} if done == total else {}
+
+
+async def ingest_documents(
+    documents: list[Document],
+    progress: Optional[ProgressCallback] = None,
+    ids: Optional[list[str]] = None,
+    embedder: Optional[BatchEmbedder] = None
+) -> int:
+    """
+    Embed and upsert chunks into the configured vector store (Pinecone or local index) and the
+    BM25 index. Embedding runs in token-packed, concurrent, rate-limit-aware batches (see
+    src/ingestion/embedder.py), each batch upserted while later ones are still embedding.
+    Vector ids default to the deterministic (user_uuid, chunk hash) ids of src/ingestion/registry.py.
+    Returns number of documents ingested
+    """
+    if ids is None:
+        ids = assign_ids(documents)
+    progress = progress or _no_progress
+    embedder = embedder or BatchEmbedder.from_control(_get_ingestion_embeddings())
+    lexical_index = get_lexical_index()
+    total = len(documents)
+    embedded = upserted = 0
+    lock = asyncio.Lock()  # Batches finish out of order; counters only move forward
+
+    async def on_embedded(count: int):
+        nonlocal embedded
+        async with lock:
+            embedded += count
+            await progress(**_stage("embedded", embedded, total), chunks_embedded=embedded)
+
+    async def on_upserted(batch: list[Document], batch_ids: list[str]):
+        nonlocal upserted
+        # Same chunks (and ids) into the per-user BM25 index for hybrid search
+        if lexical_index is not None:
+            await asyncio.to_thread(lexical_index.add_documents, batch, batch_ids)
+        async with lock:
+            upserted += len(batch)
+            await progress(**_stage("upserted", upserted, total), chunks_upserted=upserted)
+
+    rate = await embedder.embed_and_upsert(_get_vectorstore(), documents, ids, on_embedded, on_upserted)
+    if documents:
+        await progress(chunks_per_second=round(rate, 1))
+    return total
+
+
+async def delete_vectors(ids: list[str], user_uuid: Optional[str]) -> int:
+    """Batch-delete chunks from the vector store and the BM25 index."""
+    if not ids:
+        return 0
+    vectorstore = _get_vectorstore()
+    # The local index deletes within the user's partition; Pinecone deletes by id (1000 per request)
+    kwargs = {"user_uuid": user_uuid} if isinstance(vectorstore, LocalVectorStore) else {}
+    await vectorstore.adelete(ids, **kwargs)
+    lexical_index = get_lexical_index()
+    if lexical_index is not None:
+        await asyncio.to_thread(lexical_index.delete, ids, user_uuid)
+    return len(ids)
+
+
+async def delete_document(registry: DocumentRegistry, document_id: uuid.UUID, user_uuid: Optional[str]) -> Optional[int]:
+    """
+    Remove a document's vectors (except chunks another of the user's documents shares) and its
+    registry entry. Returns the number of vectors deleted, None if the user has no such document.
+    """
+    document = await registry.get_document(document_id, user_uuid)
+    if document is None:
+        return None
+    ids = list(dict.fromkeys(chunk.vector_id for chunk in document.chunks))
+    shared = await registry.ids_used_elsewhere(user_uuid, ids, document_id)
+    deleted = await delete_vectors([i for i in ids if i not in shared], user_uuid)
+    await registry.delete_document(document_id)
+    logger.info(f"Deleted document {document.filename}: {deleted} vector(s)")
+    return deleted
+
+
+async def ingest_file(
+    file_path: str,
+    file_extension: str,
+    metadata: dict,
+    progress: Optional[ProgressCallback] = None,
+    registry: Optional[DocumentRegistry] = None,
+    content_hash: Optional[str] = None,
+    replaces: Optional[uuid.UUID] = None,
+    embedder: Optional[BatchEmbedder] = None
+) -> int:
+    """
+    Full ingestion of one stored upload: parse -> chunk (process pool) -> embed -> upsert.
+    With a registry, a file identical to one the user already ingested is skipped before parsing,
+    and chunks already in the user's index are not embedded again.
+    `replaces` makes the file a new version of that document: only changed chunks are embedded,
+    and vectors of chunks it no longer has are deleted once the new ones are in.
+    Reports each stage through `progress`; returns number of chunks embedded and upserted.
+    """
+    progress = progress or _no_progress
+    user_uuid = metadata.get("user_uuid")
+
+    previous = None
+    if registry is not None:
+        content_hash = content_hash or await asyncio.to_thread(file_sha256, file_path)
+        if replaces is not None:
+            previous = await registry.get_document(replaces, user_uuid)
+            if previous is None:
+                raise ValueError("The document to replace no longer exists")
+        existing = previous if previous is not None else await registry.find_document(user_uuid, content_hash)
+        if existing is not None and existing.content_hash == content_hash:
+            logger.info(f"{metadata.get('source')}: identical to already ingested {existing.filename}, skipped")
+            await progress(
+                status="upserted", chunks_total=existing.chunk_count,
+                chunks_skipped=existing.chunk_count, document_id=existing.id
+            )
+            return 0
+        if previous is not None:
+            other = await registry.find_document(user_uuid, content_hash)
+            if other is not None:
+                raise ValueError(f"Identical to already ingested document {other.filename}")
+
+    pages = await load_file_async(file_path, file_extension, metadata)
+    await progress(status="parsed", pages=len(pages))
+
+    chunks = await chunk_documents_async(pages)
+    if not chunks:
+        raise ValueError("No content could be extracted from the file")
+    ids = assign_ids(chunks)
+
+    # Repeated chunks within the file and chunks the user already has are embedded once
+    known = await registry.existing_ids(user_uuid, ids) if registry is not None else set()
+    new: dict[str, Document] = {}
+    for chunk, chunk_id in zip(chunks, ids):
+        if chunk_id not in known and chunk_id not in new:
+            new[chunk_id] = chunk
+    metrics.INGEST_CHUNKS.inc(len(chunks) - len(new), stage="skipped")
+    await progress(status="chunked", chunks_total=len(chunks), chunks_skipped=len(chunks) - len(new))
+
+    ingested = await ingest_documents(list(new.values()), progress, ids=list(new), embedder=embedder)
+
+    if registry is None:
+        await progress(status="upserted")
+        return ingested
+
+    source = metadata.get("source", "")
+    if previous is None:
+        document = await registry.record_document(user_uuid, source, file_extension, content_hash, chunks, ids)  # type: ignore
+        await progress(status="upserted", document_id=document.id)
+        return ingested
+
+    # Replace: the new version is searchable before the removed chunks are deleted
+    kept = set(ids)
+    removed = list(dict.fromkeys(c.vector_id for c in previous.chunks if c.vector_id not in kept))
+    shared = await registry.ids_used_elsewhere(user_uuid, removed, previous.id)
+    await registry.replace_document(previous.id, source, file_extension, content_hash, chunks, ids)  # type: ignore
+    deleted = await delete_vectors([i for i in removed if i not in shared], user_uuid)
+    await progress(status="upserted", chunks_deleted=deleted, document_id=previous.id)
+    return ingested
@@ -0,0 +1,120 @@
+import uuid
+import hashlib
+import logging
+from typing import Optional
+from langchain_core.documents import Document
+from sqlalchemy.exc import IntegrityError
+from src.db import crud
+
+logger = logging.getLogger(__name__)
+
+# Namespace of deterministic vector ids (never change it: existing vectors would get new ids)
+VECTOR_ID_NAMESPACE = uuid.UUID("5b8f2d4e-2f1c-4c62-9a1d-7e0c3b9a6f10")
+
+
+def file_sha256(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def vector_id(user_uuid: Optional[str], chunk_digest: str) -> str:
+    """Same chunk text for the same user -> same id, so re-ingesting overwrites instead of duplicating."""
+    return str(uuid.uuid5(VECTOR_ID_NAMESPACE, f"{user_uuid or ''}:{chunk_digest}"))
+
+
+def assign_ids(chunks: list[Document]) -> list[str]:
+    """Tag each chunk with its chunk_hash and return deterministic vector ids (from metadata user_uuid)."""
+    ids = []
+    for chunk in chunks:
+        digest = chunk_hash(chunk.page_content)
+        chunk.metadata["chunk_hash"] = digest
+        ids.append(vector_id(chunk.metadata.get("user_uuid"), digest))
+    return ids
+
+
+def _user_id(user_uuid: Optional[str]) -> Optional[uuid.UUID]:
+    return uuid.UUID(user_uuid) if user_uuid else None
+
+
+class DocumentRegistry:
+    """
+    Which files and chunks are already in the index, per user (documents / chunks tables).
+    Lets ingestion skip identical files before parsing and known chunks before embedding,
+    and tracks the vector ids of each document so it can be replaced or deleted.
+    A chunk shared by several documents is a single vector whose metadata (source, page) is the
+    one of the document that embedded it first; it is not rewritten when that document is
+    replaced or deleted, so search results may still cite the old file for such chunks.
+    """
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from src.db.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+
+    async def find_document(self, user_uuid: Optional[str], content_hash: str):
+        async with self.session_factory() as db:
+            return await crud.get_document_by_hash(db, _user_id(user_uuid), content_hash)
+
+    async def existing_ids(self, user_uuid: Optional[str], ids: list[str]) -> set[str]:
+        async with self.session_factory() as db:
+            return await crud.get_existing_vector_ids(db, _user_id(user_uuid), ids)
+
+    async def record_document(
+        self,
+        user_uuid: Optional[str],
+        filename: str,
+        file_type: str,
+        content_hash: str,
+        chunks: list[Document],
+        ids: list[str]
+    ):
+        """
+        Register a new document. If a concurrent job recorded the same content for the user first
+        (both passed find_document), that document is returned instead: its chunks have the same ids.
+        """
+        entries = [(chunk.metadata["chunk_hash"], chunk_id) for chunk, chunk_id in zip(chunks, ids)]
+        try:
+            async with self.session_factory() as db:
+                return await crud.create_document(db, _user_id(user_uuid), filename, file_type, content_hash, entries)
+        except IntegrityError:
+            existing = await self.find_document(user_uuid, content_hash)
+            if existing is None:
+                raise
+            logger.info(f"{filename}: identical to {existing.filename}, recorded by a concurrent upload")
+            return existing
+
+    async def get_document(self, document_id: uuid.UUID, user_uuid: Optional[str] = None):
+        async with self.session_factory() as db:
+            return await crud.get_document(db, document_id, _user_id(user_uuid))
+
+    async def ids_used_elsewhere(self, user_uuid: Optional[str], ids: list[str], document_id: uuid.UUID) -> set[str]:
+        async with self.session_factory() as db:
+            return await crud.get_vector_ids_used_elsewhere(db, _user_id(user_uuid), ids, document_id)
+
+    async def replace_document(
+        self,
+        document_id: uuid.UUID,
+        filename: str,
+        file_type: str,
+        content_hash: str,
+        chunks: list[Document],
+        ids: list[str]
+    ):
+        entries = [(chunk.metadata["chunk_hash"], chunk_id) for chunk, chunk_id in zip(chunks, ids)]
+        try:
+            async with self.session_factory() as db:
+                return await crud.replace_document_chunks(db, document_id, filename, file_type, content_hash, entries)
+        except IntegrityError:
+            raise ValueError("Another document with identical content was ingested meanwhile") from None
+
+    async def delete_document(self, document_id: uuid.UUID):
+        async with self.session_factory() as db:
+            await crud.delete_document(db, document_id)
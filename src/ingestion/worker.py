@@ -0,0 +1,192 @@
+import os
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from src.core import control
+from src.db import crud
+from src.ingestion import pipeline
+from src.ingestion.embedder import BatchEmbedder
+from src.ingestion.pipeline import ingest_file
+from src.ingestion.registry import DocumentRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    """
+    Pulls upload jobs from the ingestion_jobs table and ingests their files
+    (parse -> chunk -> embed -> upsert), recording per-file progress as it goes.
+
+    Runs inside the API process (control.INGESTION_WORKER_MODE = "in_app") or on its own
+    (`python -m src.ingestion.worker`); any number of workers can share the table.
+    """
+
+    def __init__(self, session_factory=None, concurrency: Optional[int] = None, worker_id: Optional[str] = None):
+        if session_factory is None:
+            from src.db.database import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+        self.registry = DocumentRegistry(session_factory)
+        self._embedder: Optional[BatchEmbedder] = None
+        self.concurrency = concurrency or control.INGEST_MAX_CONCURRENCY
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._jobs: set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._last_requeue = 0.0
+
+    @property
+    def embedder(self) -> BatchEmbedder:
+        """Shared by all jobs of this worker, so they back off together on rate limits."""
+        if self._embedder is None:
+            self._embedder = BatchEmbedder.from_control(pipeline._get_ingestion_embeddings())
+        return self._embedder
+
+    # --- Lifecycle ---
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Stop polling and cancel running jobs (they are requeued once their heartbeat goes stale)."""
+        tasks = [t for t in [self._task, *self._jobs] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self):
+        logger.info(f"Ingestion worker {self.worker_id} started ({self.concurrency} concurrent job(s))")
+        while True:
+            try:
+                claimed = await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion worker poll failed: {e}")
+                claimed = False
+            if not claimed:
+                await asyncio.sleep(control.INGESTION_POLL_SECONDS)
+
+    async def poll(self) -> bool:
+        """Claim one queued job if there is a free slot; True if a job was started."""
+        await self._requeue_stale()
+        if len(self._jobs) >= self.concurrency:
+            return False
+        async with self.session_factory() as db:
+            job = await crud.claim_ingestion_job(db, self.worker_id)
+        if job is None:
+            return False
+        task = asyncio.create_task(self.run_job(job))
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+        return True
+
+    async def run_until_idle(self):
+        """Process queued jobs until none are left (CLI / tests)."""
+        while await self.poll() or self._jobs:
+            if self._jobs:
+                await asyncio.wait(self._jobs, return_when=asyncio.FIRST_COMPLETED)
+
+    # --- Jobs ---
+    async def run_job(self, job):
+        logger.info(f"Ingesting job {job.id}: {len(job.files)} file(s)")
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        ingested = failed = 0
+        try:
+            for job_file in job.files:
+                if job_file.status == "upserted":
+                    ingested += 1  # Done before a retry
+                    continue
+                if job_file.status == "failed" and not job_file.storage_path:
+                    failed += 1  # Rejected at upload (unsupported type)
+                    continue
+                if await self._ingest(job, job_file):
+                    ingested += 1
+                else:
+                    failed += 1
+        finally:
+            heartbeat.cancel()
+
+        status = "completed" if not failed else ("partial" if ingested else "failed")
+        async with self.session_factory() as db:
+            await crud.finish_ingestion_job(db, job.id, status, None if ingested else "No file could be ingested")
+        await asyncio.to_thread(_remove_spooled, job)
+        logger.info(f"Job {job.id} {status}: {ingested} ingested, {failed} failed")
+
+    async def _ingest(self, job, job_file) -> bool:
+        async def progress(**values):
+            async with self.session_factory() as db:
+                await crud.update_ingestion_file(db, job_file.id, **values)
+
+        metadata = {"source": job_file.filename, "file_type": job_file.file_type, "user_uuid": str(job.user_id)}
+        try:
+            if job.attempts > 1:
+                # Retry: drop the counters of the interrupted attempt
+                await progress(
+                    status="queued", pages=0, chunks_total=0, chunks_embedded=0,
+                    chunks_upserted=0, chunks_skipped=0, chunks_deleted=0, chunks_per_second=None, error=None
+                )
+            chunks = await ingest_file(
+                job_file.storage_path, job_file.file_type, metadata, progress,
+                registry=self.registry, content_hash=job_file.content_hash,
+                replaces=job_file.replaces_document_id, embedder=self.embedder
+            )
+            logger.info(f"✅ {job_file.filename}: {chunks} chunk(s) ingested")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error ingesting {job_file.filename}: {e}")
+            await progress(status="failed", error=str(e))
+            return False
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(control.INGESTION_HEARTBEAT_SECONDS)
+            try:
+                async with self.session_factory() as db:
+                    await crud.heartbeat_ingestion_job(db, job_id)
+            except Exception as e:
+                logger.warning(f"Ingestion heartbeat failed for job {job_id}: {e}")
+
+    async def _requeue_stale(self):
+        now = asyncio.get_running_loop().time()
+        if now - self._last_requeue < control.INGESTION_HEARTBEAT_SECONDS:
+            return
+        self._last_requeue = now
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=control.INGESTION_JOB_TIMEOUT_SECONDS)
+        async with self.session_factory() as db:
+            count = await crud.requeue_stale_ingestion_jobs(db, stale_before, control.INGESTION_MAX_ATTEMPTS)
+        if count:
+            logger.warning(f"Recovered {count} ingestion job(s) from unresponsive workers")
+
+
+def _remove_spooled(job):
+    """Delete the job's spooled uploads, and their directory once empty (see src/api/upload.py)."""
+    for job_file in job.files:
+        if job_file.storage_path:
+            try:
+                os.remove(job_file.storage_path)
+                os.rmdir(os.path.dirname(job_file.storage_path))
+            except OSError:
+                pass
+
+
+async def main():
+    from src.core.logger import setup_logger
+    from src.db.database import init_db
+    from src.ingestion.parsing import shutdown_parse_pool
+
+    setup_logger()
+    await init_db()
+    worker = IngestionWorker()
+    try:
+        await worker.run()
+    finally:
+        await worker.stop()
+        shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    # Standalone ingestion worker: scale ingestion apart from the voice API
+    # (set INGESTION_WORKER_MODE = "external" so the API only enqueues jobs)
+    asyncio.run(main())
@@ -17,21 +17,33 @@ import logging
 from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.core.config import settings
 from src.core.logger import setup_logger
 from src.core import control
+from src.core.metrics import REGISTRY
 
 # For retriever warmup at startup
 from src.brain.retriever import get_retriever
 
+# Process-wide HTTP clients (prewarmed at startup, closed on shutdown)
+from src.services.clients import prewarm_clients, get_pool_stats, close_clients
+
+# Latency-masking filler clips (synthesized at startup)
+from src.services.filler import get_filler_bank
+
 # Database initialization
 from src.db.database import init_db
 
+# Document parsing process pool (shut down with the app) and the in-app ingestion worker
+from src.ingestion.parsing import shutdown_parse_pool
+from src.ingestion.worker import IngestionWorker
+
 # Import the routers
 from src.api.websocket import router as ws_router
-from src.api.upload import router as upload_router
+from src.api.upload import router as upload_router, UploadSizeLimitMiddleware
+from src.api.documents import router as documents_router
 from src.api.auth import router as auth_router
 
 logger = logging.getLogger(__name__)
@@ -53,6 +65,22 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
     
+    # Shared HTTP connection pools: open the OpenAI connections before the first session needs them
+    if control.PREWARM_HTTP_CLIENTS and settings.OPENAI_API_KEY:
+        try:
+            elapsed = await prewarm_clients()
+            logger.info(f"🔥 HTTP clients prewarmed in {elapsed:.0f}ms: {get_pool_stats()}")
+        except Exception as e:
+            logger.error(f"❌ HTTP client prewarm failed: {e}")
+
+    # Filler clip bank: every acknowledgement phrase in every audio format, ready before the first turn
+    if control.ENABLE_FILLER_AUDIO and settings.OPENAI_API_KEY:
+        try:
+            clips = await get_filler_bank().build()
+            logger.info(f"✅ Filler audio ready: {clips} clip(s)")
+        except Exception as e:
+            logger.error(f"❌ Filler audio synthesis failed: {e}")
+
     # Warmup Vector DB
     if settings.PINECONE_API_KEY:
         try:
@@ -63,9 +91,20 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"❌ Warmup failed: {e}")
 
+    # Background ingestion of queued uploads (unless workers run as separate processes)
+    ingestion_worker = None
+    if control.INGESTION_WORKER_MODE == "in_app":
+        ingestion_worker = IngestionWorker()
+        ingestion_worker.start()
+
     yield
     # Shutdown
     logger.info(f"🛑 {settings.APP_NAME} shutting down...")
+    if ingestion_worker is not None:
+        await ingestion_worker.stop()
+    shutdown_parse_pool()
+    logger.info(f"HTTP client pool: {get_pool_stats()}")
+    await close_clients()
 
 # 3. Create App
 app = FastAPI(
@@ -75,7 +114,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# 4. CORS
+# 4. Upload size limit (checked before the multipart body is parsed) and CORS
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=control.UPLOAD_MAX_REQUEST_MB * 1024 * 1024)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -100,12 +140,21 @@ app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(ws_router, prefix="/ws", tags=["WebSocket"])
 # File Upload & Ingestion
 app.include_router(upload_router, prefix="/api", tags=["Upload"])
+# Document registry (list / delete / replace)
+app.include_router(documents_router, prefix="/api", tags=["Documents"])
 
 # 7. Health Check
 @app.get("/", tags=["Health"])
 async def root():
     return {"status": "online", "service": settings.APP_NAME}
 
+# 8. Prometheus Metrics
+if control.ENABLE_METRICS_ENDPOINT:
+    @app.get("/metrics", tags=["Health"])
+    async def metrics():
+        """Per-turn latency histograms plus session, token and error counters"""
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(
         "src.main:app",
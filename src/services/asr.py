@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import time
 from typing import Optional
 
 # 1. Keep the imports that we know work for your version
@@ -10,6 +11,7 @@ from deepgram import LiveTranscriptionEvents
 from src.core.interfaces import ASRInterface
 from src.core.config import settings
 from src.core import control
+from src.core import metrics
 
 logger = logging.getLogger(__name__)
 logger.setLevel(control.VOICE_PIPELINE_LOG_LEVEL)
@@ -55,17 +57,21 @@ class DeepgramASR(ASRInterface):
                         
                         # FIX: Use self.loop (Main Loop) instead of get_running_loop()
                         # Send transcript with input_type marker for voice
+                        # final_at starts the turn's latency clock (end of user speech)
                         asyncio.run_coroutine_threadsafe(
                             self.queue.put({
                                 "text": sentence,
-                                "input_type": "voice"
+                                "input_type": "voice",
+                                "final_at": time.perf_counter()
                             }), 
                             self.loop
                         )
             except Exception as e:
+                metrics.ERRORS.inc(component="asr")
                 logger.error(f"Error in Deepgram Callback: {e}")
 
         def on_error(self_dg, error, **kwargs):
+            metrics.ERRORS.inc(component="asr")
             logger.error(f"Deepgram Error: {error}")
 
         if self.dg_connection:
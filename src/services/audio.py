@@ -0,0 +1,252 @@
+import struct
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# TTS output formats a session can use (OpenAI response_format values)
+AUDIO_FORMATS = ("mp3", "pcm", "opus")
+
+# Opus is always decoded at 48 kHz (Ogg granule positions count 48 kHz samples)
+OPUS_SAMPLE_RATE = 48000
+
+# WAV data size for a stream of unknown length (players read until the data ends)
+STREAMING_WAV_DATA_SIZE = 0xFFFFFFFF - 36
+
+OGG_CAPTURE = b"OggS"
+OGG_HEADER_BYTES = 27
+
+
+class PCMFramer:
+    """
+    Cuts raw PCM into chunks that end on sample boundaries (block_align bytes), so every
+    chunk can be played on its own. `header` (e.g. a WAV header) is prepended to the first chunk only.
+    """
+
+    def __init__(self, block_align: int, sample_rate: int, header: Optional[bytes] = None):
+        self.block_align = block_align
+        self.sample_rate = sample_rate
+        self.header = header
+        self._pending = bytearray()
+        self.samples = 0
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio emitted so far"""
+        return self.samples / self.sample_rate
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self._pending += data
+        usable = len(self._pending) - len(self._pending) % self.block_align
+        if not usable:
+            return []
+        chunk = bytes(self._pending[:usable])
+        del self._pending[:usable]
+        return [self._emit(chunk)]
+
+    def flush(self) -> list[bytes]:
+        # A trailing partial sample cannot be played; drop it
+        if self._pending:
+            logger.debug(f"PCM stream ended with {len(self._pending)} byte(s) of a partial sample")
+            self._pending.clear()
+        return []
+
+    def _emit(self, chunk: bytes) -> bytes:
+        self.samples += len(chunk) // self.block_align
+        if self.header is not None:
+            chunk, self.header = self.header + chunk, None
+        return chunk
+
+
+class OggPageFramer:
+    """
+    Cuts an Ogg (Opus) stream into whole pages. The identification and comment header pages
+    go out together with the first audio page, so the first chunk carries the Ogg header and
+    every later chunk is a sequence of complete audio pages.
+    """
+
+    HEADER_PAGES = 2  # OpusHead, OpusTags
+
+    def __init__(self):
+        self._pending = bytearray()
+        self._held = bytearray()
+        self.pages = 0
+        self.granule = 0  # Last granule position (48 kHz samples)
+
+    @property
+    def duration(self) -> float:
+        return self.granule / OPUS_SAMPLE_RATE
+
+    def _next_page(self) -> Optional[bytes]:
+        buf = self._pending
+        if len(buf) < OGG_HEADER_BYTES:
+            return None
+        if buf[:4] != OGG_CAPTURE:
+            # Resynchronize on the next capture pattern (a corrupt or truncated page)
+            start = buf.find(OGG_CAPTURE, 1)
+            logger.warning("Ogg stream out of sync; skipping to the next page")
+            del buf[:start if start > 0 else len(buf) - 3]
+            return self._next_page()
+        segments = buf[26]
+        if len(buf) < OGG_HEADER_BYTES + segments:
+            return None
+        size = OGG_HEADER_BYTES + segments + sum(buf[OGG_HEADER_BYTES:OGG_HEADER_BYTES + segments])
+        if len(buf) < size:
+            return None
+        page = bytes(buf[:size])
+        del buf[:size]
+        granule = struct.unpack_from("<q", page, 6)[0]
+        if granule >= 0:
+            self.granule = granule
+        return page
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self._pending += data
+        while (page := self._next_page()) is not None:
+            self.pages += 1
+            self._held += page
+        if self.pages <= self.HEADER_PAGES or not self._held:
+            return []
+        chunk = bytes(self._held)
+        self._held.clear()
+        return [chunk]
+
+    def flush(self) -> list[bytes]:
+        if self._pending:
+            logger.debug(f"Ogg stream ended with {len(self._pending)} byte(s) of a partial page")
+            self._pending.clear()
+        chunk = bytes(self._held)
+        self._held.clear()
+        return [chunk] if chunk and self.pages > self.HEADER_PAGES else []
+
+
+# MPEG audio Layer III: bitrates (kbit/s, index 1-14) and sample rates by MPEG version bits
+MP3_BITRATES = {
+    3: (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1
+    2: (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),      # MPEG-2
+    0: (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),      # MPEG-2.5
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def mp3_frame(data, pos: int) -> Optional[tuple[int, int, int]]:
+    """(frame length, samples, sample rate) of the Layer III frame header at pos, None if there is none."""
+    if len(data) - pos < 4:
+        return None
+    b1, b2 = data[pos + 1], data[pos + 2]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version, layer = (b1 >> 3) & 0x03, (b1 >> 1) & 0x03
+    bitrate_index, rate_index, padding = b2 >> 4, (b2 >> 2) & 0x03, (b2 >> 1) & 0x01
+    if version == 1 or layer != 1 or not 0 < bitrate_index < 15 or rate_index == 3:
+        return None
+    bitrate = MP3_BITRATES[version][bitrate_index - 1] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+
+class MP3FrameBuffer:
+    """
+    Adaptive output buffer for an MP3 stream: the first chunk goes out as soon as `first_bytes`
+    of complete frames have arrived, then the chunk size grows (x growth) toward `max_bytes`.
+    Chunks always end on a frame boundary, so the client never receives a partial frame.
+    Backed by one bytearray (no bytes concatenation); frames are parsed once through a memoryview.
+    """
+
+    def __init__(self, first_bytes: int, max_bytes: int, growth: float = 2.0):
+        self.target = first_bytes
+        self.max_bytes = max_bytes
+        self.growth = growth
+        self._buf = bytearray()
+        self._scan = 0  # Where the next frame header is expected
+        self._cut = 0  # End of the last complete frame: chunks are cut here
+        self._cut_samples = 0
+        self._id3_checked = False
+        self.samples = 0
+        self.sample_rate = 0
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+    def _skip_id3(self) -> bool:
+        # An ID3v2 tag before the first frame travels with the first chunk
+        if len(self._buf) < 10:
+            return False
+        self._id3_checked = True
+        if self._buf[:3] == b"ID3":
+            size = 0
+            for byte in self._buf[6:10]:
+                size = (size << 7) | (byte & 0x7F)
+            self._scan = 10 + size + (10 if self._buf[5] & 0x10 else 0)
+        return True
+
+    def _find_frames(self):
+        view = memoryview(self._buf)
+        try:
+            while True:
+                frame = mp3_frame(view, self._scan)
+                if frame is None:
+                    if len(view) - self._scan < 4:
+                        return
+                    # Not a frame header (junk or a tag): resynchronize, the skipped bytes stay in the stream
+                    next_sync = self._buf.find(b"\xff", self._scan + 1)
+                    self._scan = next_sync if next_sync != -1 else len(view)
+                    continue
+                length, samples, self.sample_rate = frame
+                if len(view) - self._scan < length:
+                    return
+                self._scan += length
+                self._cut = self._scan
+                self._cut_samples += samples
+        finally:
+            view.release()
+
+    def _take(self, end: int) -> bytes:
+        chunk = bytes(self._buf[:end])
+        del self._buf[:end]
+        self._scan -= end
+        self._cut = 0
+        self.samples += self._cut_samples
+        self._cut_samples = 0
+        return chunk
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self._buf += data
+        if not self._id3_checked and not self._skip_id3():
+            return []
+        self._find_frames()
+        if self._cut < self.target:
+            return []
+        self.target = min(self.max_bytes, int(self.target * self.growth))
+        return [self._take(self._cut)]
+
+    def flush(self) -> list[bytes]:
+        if not self._buf:
+            return []
+        # Whatever is left, including a frame cut short by the end of the stream
+        return [self._take(len(self._buf))]
+
+
+class PlayoutClock:
+    """
+    Client playback model for one sentence: playback starts when the first chunk is sent and runs
+    in real time. A chunk sent after everything before it has finished playing is an underrun.
+    """
+
+    def __init__(self):
+        self.ends_at: Optional[float] = None
+        self.underruns = 0
+        self._duration = 0.0
+
+    def on_chunk(self, now: float, total_duration: float):
+        """`total_duration`: seconds of audio sent so far, this chunk included"""
+        if self.ends_at is None:
+            self.ends_at = now
+        elif now > self.ends_at:
+            self.underruns += 1
+            self.ends_at = now
+        self.ends_at += total_duration - self._duration
+        self._duration = total_duration
@@ -0,0 +1,118 @@
+import time
+import asyncio
+import logging
+import importlib.util
+from typing import Optional
+import httpx
+from openai import AsyncOpenAI
+from src.core.config import settings
+from src.core import control
+
+logger = logging.getLogger(__name__)
+
+# Process-wide HTTP clients: every session's TTS, LLM and embedding calls reuse their warm
+# keep-alive connections instead of paying a TLS handshake per session
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+_openai: Optional[AsyncOpenAI] = None
+_stats = {"requests": 0, "prewarm_ms": None}
+
+
+def http2_enabled() -> bool:
+    """HTTP/2 (one multiplexed connection per host) when enabled and the h2 package is installed."""
+    return control.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=control.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=control.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=control.HTTP_KEEPALIVE_SECONDS
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(control.HTTP_TIMEOUT_SECONDS, connect=control.HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+async def _count_request(request: httpx.Request):
+    _stats["requests"] += 1
+
+
+def create_async_http_client() -> httpx.AsyncClient:
+    """A new pooled client with the configured limits (the shared one is get_async_http_client)."""
+    return httpx.AsyncClient(
+        http2=http2_enabled(), limits=_limits(), timeout=_timeout(),
+        event_hooks={"request": [_count_request]}
+    )
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = create_async_http_client()
+    return _async_client
+
+
+def get_http_client() -> httpx.Client:
+    """Shared client for the sync code paths of LangChain models (e.g. embeddings in worker threads)."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(http2=http2_enabled(), limits=_limits(), timeout=_timeout())
+    return _sync_client
+
+
+def get_openai_client() -> AsyncOpenAI:
+    global _openai
+    if _openai is None:
+        _openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=get_async_http_client())
+    return _openai
+
+
+async def prewarm_clients(connections: Optional[int] = None) -> float:
+    """
+    Open connections to the OpenAI API ahead of the first session (TLS handshake and, with HTTP/2,
+    protocol negotiation) with cheap model-list requests. Returns the time taken in ms.
+    """
+    connections = connections or control.HTTP_PREWARM_CONNECTIONS
+    start = time.perf_counter()
+    client = get_openai_client()
+    results = await asyncio.gather(*(client.models.list() for _ in range(connections)), return_exceptions=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    errors = [r for r in results if isinstance(r, Exception)]
+    if len(errors) == connections:
+        raise errors[0]
+    if errors:
+        logger.warning(f"HTTP client prewarm: {len(errors)}/{connections} request(s) failed: {errors[0]}")
+    _stats["prewarm_ms"] = round(elapsed, 1)
+    return elapsed
+
+
+def get_pool_stats() -> dict:
+    connections = []
+    if _async_client is not None and not _async_client.is_closed:
+        # httpcore's pool behind the transport (no public API for it)
+        pool = getattr(getattr(_async_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+    return {
+        "http2": http2_enabled(),
+        "connections": len(connections),
+        "idle": sum(1 for c in connections if c.is_idle()),
+        "requests": _stats["requests"],
+        "prewarm_ms": _stats["prewarm_ms"],
+    }
+
+
+async def close_clients():
+    """Close the shared pools. Clients fetched afterwards get new ones (the LLMs are rebuilt on them)."""
+    global _async_client, _sync_client, _openai
+    # Imported here: the retriever builds its embeddings on these clients
+    from src.brain.retriever import clear_retriever_cache
+
+    if _async_client is not None:
+        await _async_client.aclose()
+    if _sync_client is not None:
+        _sync_client.close()
+    _async_client = _sync_client = _openai = None
+    # The cached embeddings hold the closed pools
+    clear_retriever_cache()
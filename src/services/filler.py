@@ -0,0 +1,87 @@
+import random
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Optional
+from src.core import control
+from src.services.audio import AUDIO_FORMATS, MP3FrameBuffer, OggPageFramer
+from src.services.tts import OpenAITTS
+
+logger = logging.getLogger(__name__)
+
+# WAV header the PCM stream starts with (TTS_PCM_WAV_HEADER)
+WAV_HEADER_BYTES = 44
+
+
+def clip_chunks(chunks: list[bytes], audio_format: str) -> tuple[list[bytes], list[float]]:
+    """
+    A synthesized clip as small, independently sendable chunks with their durations (seconds),
+    so playback can be paced and handed over to the answer between any two chunks.
+    mp3 is re-cut into constant TTS_FIRST_CHUNK_SIZE pieces of whole frames.
+    """
+    durations = []
+    if audio_format == "mp3":
+        size = control.TTS_FIRST_CHUNK_SIZE
+        buffer = MP3FrameBuffer(size, size, growth=1.0)
+        data = b"".join(chunks)
+        pieces = []
+        # Fed in small slices: each feed emits at most one piece
+        for start in range(0, len(data), size // 4):
+            before = buffer.duration
+            for piece in buffer.feed(data[start:start + size // 4]):
+                pieces.append(piece)
+                durations.append(buffer.duration - before)
+        before = buffer.duration
+        for piece in buffer.flush():
+            pieces.append(piece)
+            durations.append(buffer.duration - before)
+        return pieces, durations
+    if audio_format == "opus":
+        framer = OggPageFramer()
+        for chunk in chunks:
+            before = framer.duration
+            framer.feed(chunk)
+            durations.append(framer.duration - before)
+        return chunks, durations
+    bytes_per_second = control.TTS_OUTPUT_SAMPLE_RATE * control.TTS_OUTPUT_CHANNELS * control.TTS_OUTPUT_BITS_PER_SAMPLE // 8
+    for chunk in chunks:
+        samples = len(chunk) - (WAV_HEADER_BYTES if chunk.startswith(b"RIFF") else 0)
+        durations.append(samples / bytes_per_second)
+    return chunks, durations
+
+
+class FillerBank:
+    """
+    Short acknowledgement clips ("Sure,", "Let me check.") synthesized once at startup, in every
+    session audio format, and kept in memory as ready-to-send chunks (no TTS request at play time).
+    Each clip is (phrase, chunks, chunk durations in seconds).
+    """
+
+    def __init__(self, phrases: tuple[str, ...] = ()):
+        self.phrases = phrases
+        self.clips: dict[str, list[tuple[str, list[bytes], list[float]]]] = {}
+
+    async def build(self, formats: tuple[str, ...] = AUDIO_FORMATS) -> int:
+        """Synthesize every phrase in every format (through the phrase cache). Returns the number of clips."""
+        async def synthesize(tts: OpenAITTS, phrase: str) -> tuple[str, list[bytes]]:
+            return phrase, [chunk async for chunk in tts.speak(phrase)]
+
+        for audio_format in formats:
+            tts = OpenAITTS(audio_format=audio_format)
+            results = await asyncio.gather(*(synthesize(tts, phrase) for phrase in self.phrases))
+            # A phrase whose synthesis failed yields no audio (logged by the TTS service)
+            self.clips[audio_format] = [
+                (phrase, *clip_chunks(chunks, audio_format)) for phrase, chunks in results if chunks
+            ]
+        return sum(len(clips) for clips in self.clips.values())
+
+    def pick(self, audio_format: str) -> Optional[tuple[str, list[bytes], list[float]]]:
+        """A random clip in the format, None if the bank has none."""
+        clips = self.clips.get(audio_format)
+        return random.choice(clips) if clips else None
+
+
+@lru_cache(maxsize=1)
+def get_filler_bank() -> FillerBank:
+    """Process-wide clip bank shared by all sessions (empty until built at startup)."""
+    return FillerBank(tuple(control.FILLER_PHRASES))
@@ -1,26 +1,56 @@
 import uuid
+import asyncio
 import logging
 from typing import AsyncGenerator, Optional
-from langchain_core.messages import HumanMessage
+from collections import deque
+from langchain_core.messages import HumanMessage, RemoveMessage
 from src.core.interfaces import LLMInterface
-from src.brain.graph import build_graph
+from src.brain.graph import brain_app, checkpointer, get_llm, get_summary_llm
+from src.brain.history import format_summary_request, split_history, split_turns
+from src.brain.store import conversation_store
 from src.core import control
+from src.core import metrics
 
 logger = logging.getLogger(__name__)
 logger.setLevel(control.VOICE_PIPELINE_LOG_LEVEL)
 
+def checkpoint_thread_id(thread_id: str, user_uuid: Optional[str] = None) -> str:
+    """
+    Conversation memory key of a session. Authenticated and anonymous sessions live in separate
+    key spaces, so a client-chosen session id can never name another user's thread.
+    """
+    return f"user:{user_uuid}:{thread_id}" if user_uuid else f"anon:{thread_id}"
+
 class OpenAILLM(LLMInterface):
     def __init__(self, thread_id: str, user_uuid: Optional[str] = None):
         self.thread_id = thread_id
         self.user_uuid = user_uuid
-        self.config = {"configurable": {"thread_id": self.thread_id}}
+        # thread_id selects the conversation memory, user_uuid the document filter.
+        # The checkpointer is shared by all sessions, so scope memory to the user.
+        self.config = {"configurable": {"thread_id": checkpoint_thread_id(thread_id, user_uuid), "user_uuid": user_uuid}}
 
         # --- Token Counters ---
         self.input_tokens = 0
         self.output_tokens = 0
+        # Turns cancelled (barge-in) before the provider reported usage
+        self.interrupted_turns = 0
+        # Prompt size of recent turns, to watch history growth
+        self.turn_input_tokens: deque[int] = deque(maxlen=20)
+        self.summary_tokens = 0
         
-        # Build user-specific brain graph
-        self.brain_app = build_graph(user_uuid)
+        # Shared compiled brain graph (compiled once per process)
+        self.brain_app = brain_app
+
+        # Durable conversation store (None = in-memory only)
+        self.store = conversation_store
+        self._history_restored = False
+        self._persist_lock = asyncio.Lock()
+        self._persist_tasks: set[asyncio.Task] = set()
+
+        # Rolling summary: computed after a turn, applied between turns
+        self._state_lock = asyncio.Lock()
+        self._turn_active = False
+        self._pending_summary: Optional[dict] = None
 
         logger.info(f"Brain initialized for session: {self.thread_id} (user: {user_uuid})")
 
@@ -28,6 +58,20 @@ class OpenAILLM(LLMInterface):
         if not query:
             return
 
+        await self._restore_history()
+        async with self._state_lock:
+            self._turn_active = True
+            await self._apply_pending_summary()
+
+        # Per-turn bookkeeping so a cancelled (barge-in) turn is still billed correctly.
+        # Usage metadata only arrives with on_chat_model_end, which never fires when
+        # the stream is cancelled, so we fall back to a local estimate.
+        prompt_messages = None
+        streamed_chunks = 0
+        usage_recorded = False
+        turn_input_tokens = 0
+        interrupted = True
+
         try:
             # Stream events from the Graph (LangGraph)
             # detailed events including token streaming
@@ -40,13 +84,20 @@ class OpenAILLM(LLMInterface):
                 # We look for "on_chat_model_stream" which represents a chunk of text from GPT
                 kind = event["event"]
                 
-                if kind == "on_chat_model_stream":
+                if kind == "on_chat_model_start":
+                    # Keep the prompt so input tokens can be estimated if the turn is cut short
+                    prompt_messages = event["data"].get("input", {}).get("messages")
+
+                elif kind == "on_chat_model_stream":
                     # Extract the chunk data
                     data = event["data"]
                     chunk = data.get("chunk")
                     
                     # Yield content if it exists
                     if chunk and hasattr(chunk, "content") and chunk.content:
+                        streamed_chunks += 1
+                        metrics.mark_stage("llm_first_token")
+                        metrics.mark_stage("llm_last_token", once=False)
                         yield chunk.content
                 
                 # Capture Usage (End of Turn)
@@ -56,18 +107,150 @@ class OpenAILLM(LLMInterface):
                     if data and hasattr(data, "usage_metadata") and data.usage_metadata:
                         usage = data.usage_metadata
                         # Accumulate totals
-                        self.input_tokens += usage.get("input_tokens", 0)
-                        self.output_tokens += usage.get("output_tokens", 0)
+                        turn_input_tokens = usage.get("input_tokens", 0)
+                        self._add_usage(turn_input_tokens, usage.get("output_tokens", 0))
+                        usage_recorded = True
+
+            interrupted = False
 
         except Exception as e:
+            interrupted = False
+            metrics.ERRORS.inc(component="llm")
             logger.error(f"LLM/Graph Error: {e}")
             yield "I'm sorry, I'm having trouble thinking right now."
 
+        finally:
+            # Runs on normal completion, errors, and cancellation (GeneratorExit / CancelledError)
+            if not usage_recorded and prompt_messages is not None:
+                # OpenAI streams roughly one token per content chunk
+                turn_input_tokens = self._estimate_input_tokens(prompt_messages)
+                self._add_usage(turn_input_tokens, streamed_chunks)
+                logger.debug(f"Estimated usage for turn without usage metadata ({streamed_chunks} chunks streamed)")
+            if turn_input_tokens:
+                self.turn_input_tokens.append(turn_input_tokens)
+            if interrupted:
+                self.interrupted_turns += 1
+            self._turn_active = False
+            # Summarize and persist once per turn, off the critical path
+            if control.ENABLE_HISTORY_SUMMARY or self.store is not None:
+                self._schedule_persist()
+
+    def _add_usage(self, input_tokens: int, output_tokens: int):
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        metrics.LLM_TOKENS.inc(input_tokens, direction="input")
+        metrics.LLM_TOKENS.inc(output_tokens, direction="output")
+
+    def _estimate_input_tokens(self, prompt_messages) -> int:
+        """Estimate prompt tokens locally when the provider never reported usage."""
+        # astream_events reports chat model input as a batch: [[BaseMessage, ...]]
+        if prompt_messages and isinstance(prompt_messages[0], list):
+            prompt_messages = prompt_messages[0]
+        try:
+            return get_llm().get_num_tokens_from_messages(prompt_messages)
+        except Exception as e:
+            logger.debug(f"Token estimation failed, using character heuristic: {e}")
+            return sum(len(str(m.content)) for m in prompt_messages) // 4
+
+
+    async def _restore_history(self):
+        """Read-through: seed the in-memory checkpointer from the durable store on a cold thread."""
+        if self.store is None or self._history_restored:
+            return
+        self._history_restored = True
+
+        try:
+            state = await self.brain_app.aget_state(self.config)  # type: ignore
+            if state.values.get("messages"):
+                return  # Hot in this process
+
+            values = await self.store.load(self.config["configurable"]["thread_id"])
+            if values["messages"]:
+                await self.brain_app.aupdate_state(self.config, values, as_node="chatbot")  # type: ignore
+                logger.info(f"Restored {len(values['messages'])} messages for session: {self.thread_id}")
+        except Exception as e:
+            logger.error(f"Failed to restore conversation history: {e}")
+
+    def _schedule_persist(self):
+        task = asyncio.create_task(self._persist())
+        self._persist_tasks.add(task)
+        task.add_done_callback(self._persist_tasks.discard)
+
+    async def _persist(self):
+        """Fold aged-out turns into the summary, then write the thread to the durable store (serialized per session)."""
+        async with self._persist_lock:
+            if control.ENABLE_HISTORY_SUMMARY:
+                await self._summarize()
+            if self.store is None:
+                return
+            try:
+                state = await self.brain_app.aget_state(self.config)  # type: ignore
+                if state.values.get("messages"):
+                    await self.store.save(self.config["configurable"]["thread_id"], state.values, self.user_uuid)  # type: ignore
+            except Exception as e:
+                logger.error(f"Failed to persist conversation: {e}")
+
+    async def _summarize(self):
+        """Summarize turns that fell out of the verbatim window. Applied now, or before the next turn if one is running."""
+        try:
+            state = await self.brain_app.aget_state(self.config)  # type: ignore
+            older, _ = split_history(state.values.get("messages", []))
+            if len(split_turns(older)) < control.HISTORY_SUMMARY_MIN_TURNS:
+                return
+
+            response = await get_summary_llm().ainvoke(format_summary_request(state.values.get("summary", ""), older))
+            usage = response.usage_metadata or {}
+            self.summary_tokens += usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+            self._add_usage(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+            async with self._state_lock:
+                self._pending_summary = {"summary": str(response.content), "remove": [m.id for m in older]}
+                if not self._turn_active:
+                    await self._apply_pending_summary()
+        except Exception as e:
+            metrics.ERRORS.inc(component="summary")
+            logger.error(f"Failed to summarize conversation history: {e}")
+
+    async def _apply_pending_summary(self):
+        """Replace summarized messages with the new summary. Caller holds _state_lock."""
+        pending, self._pending_summary = self._pending_summary, None
+        if pending is None:
+            return
+        try:
+            state = await self.brain_app.aget_state(self.config)  # type: ignore
+            present = {m.id for m in state.values.get("messages", [])}
+            removals = [RemoveMessage(id=message_id) for message_id in pending["remove"] if message_id in present]
+            await self.brain_app.aupdate_state(  # type: ignore
+                self.config,
+                {"summary": pending["summary"], "messages": removals},
+                as_node="chatbot"
+            )
+            logger.debug(f"Folded {len(removals)} messages into the summary for session: {self.thread_id}")
+        except Exception as e:
+            logger.error(f"Failed to apply conversation summary: {e}")
+
+    async def release(self) -> None:
+        """Flush pending writes, then drop this session's checkpoints from the shared checkpointer"""
+        if self._persist_tasks:
+            await asyncio.gather(*self._persist_tasks, return_exceptions=True)
+        checkpointer.release(self.config["configurable"]["thread_id"])
+        logger.debug(f"Checkpointer after release: {checkpointer.get_stats()}")
 
 # --- Return the Counters ---
     def get_usage_stats(self) -> dict:
         return {
             "input_tokens": self.input_tokens,
             "output_tokens": self.output_tokens,
-            "total_tokens": self.input_tokens + self.output_tokens
-        }
\ No newline at end of file
+            "total_tokens": self.input_tokens + self.output_tokens,
+            "interrupted_turns": self.interrupted_turns,
+            "summary_tokens": self.summary_tokens,
+            "last_turn_input_tokens": self.turn_input_tokens[-1] if self.turn_input_tokens else 0,
+            "input_token_growth_per_turn": self._input_token_growth()
+        }
+
+    def _input_token_growth(self) -> float:
+        """Average change in prompt size between consecutive turns (~0 once history is bounded)."""
+        sizes = list(self.turn_input_tokens)
+        if len(sizes) < 2:
+            return 0.0
+        return round((sizes[-1] - sizes[0]) / (len(sizes) - 1), 1)
\ No newline at end of file
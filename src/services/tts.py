@@ -1,18 +1,39 @@
-import asyncio
 import struct
 import logging
 import time
 from typing import AsyncGenerator
-from openai import AsyncOpenAI
 from src.core.interfaces import TTSInterface
-from src.core.config import settings
 from src.core import control
+from src.core import metrics
+from src.services.audio import (
+    AUDIO_FORMATS, OPUS_SAMPLE_RATE, STREAMING_WAV_DATA_SIZE,
+    MP3FrameBuffer, OggPageFramer, PCMFramer, PlayoutClock
+)
+from src.services.clients import get_openai_client
+from src.services.tts_cache import get_phrase_cache, phrase_key
 
 logger = logging.getLogger(__name__)
 
+class TTSSynthesisError(Exception):
+    """A TTS request failed (already logged and counted by OpenAITTS._synthesize)."""
+
 class OpenAITTS(TTSInterface):
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, audio_format: str | None = None):
+        # Shared across sessions: keep-alive connections are reused (see src/services/clients.py)
+        self.client = get_openai_client()
+        # Per session: negotiated by the client, else control.TTS_RESPONSE_FORMAT
+        self.audio_format = audio_format or control.TTS_RESPONSE_FORMAT
+        if self.audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unsupported TTS audio format: {self.audio_format}")
+        # Process-wide phrase audio cache (None = always synthesize)
+        self.cache = get_phrase_cache() if control.ENABLE_TTS_CACHE else None
+        # mp3 first-chunk size: doubles after a sentence with an underrun, halves back after a clean one
+        self.first_chunk_bytes = control.TTS_FIRST_CHUNK_SIZE
+        # Per-session stats (first-chunk latency and client underruns)
+        self.sentences = 0
+        self.first_chunk_ms_total = 0.0
+        self.first_chunk_ms_max = 0.0
+        self.underruns = 0
 
     def create_wav_header(self, data_size: int, sample_rate: int | None = None, channels: int | None = None, bits_per_sample: int | None = None) -> bytes:
         """
@@ -32,71 +53,161 @@ class OpenAITTS(TTSInterface):
         
         return header
 
+    def get_audio_format(self) -> dict:
+        """What the client receives: sample/page/frame-aligned chunks, stream headers in each sentence's first chunk only"""
+        if self.audio_format == "pcm":
+            return {
+                "format": "pcm",
+                "container": "wav" if control.TTS_PCM_WAV_HEADER else None,
+                "sample_rate": control.TTS_OUTPUT_SAMPLE_RATE,
+                "channels": control.TTS_OUTPUT_CHANNELS,
+                "bits_per_sample": control.TTS_OUTPUT_BITS_PER_SAMPLE,
+            }
+        if self.audio_format == "opus":
+            return {"format": "opus", "container": "ogg", "sample_rate": OPUS_SAMPLE_RATE, "channels": 1}
+        return {"format": "mp3", "container": None}
+
+    def _framer(self):
+        # New per sentence: each sentence is its own stream (own WAV / Ogg header)
+        if self.audio_format == "pcm":
+            block_align = control.TTS_OUTPUT_CHANNELS * control.TTS_OUTPUT_BITS_PER_SAMPLE // 8
+            header = self.create_wav_header(STREAMING_WAV_DATA_SIZE) if control.TTS_PCM_WAV_HEADER else None
+            return PCMFramer(block_align, control.TTS_OUTPUT_SAMPLE_RATE, header)
+        if self.audio_format == "opus":
+            return OggPageFramer()
+        return MP3FrameBuffer(self.first_chunk_bytes, max(self.first_chunk_bytes, control.TTS_BUFFER_SIZE))
+
+    def _record_sentence(self, first_chunk_ms: float | None, underruns: int):
+        if first_chunk_ms is not None:
+            self.sentences += 1
+            self.first_chunk_ms_total += first_chunk_ms
+            self.first_chunk_ms_max = max(self.first_chunk_ms_max, first_chunk_ms)
+            metrics.TTS_FIRST_CHUNK_SECONDS.observe(first_chunk_ms / 1000)
+        if underruns:
+            self.underruns += underruns
+            metrics.TTS_UNDERRUNS.inc(underruns, format=self.audio_format)
+            self.first_chunk_bytes = min(control.TTS_BUFFER_SIZE, self.first_chunk_bytes * 2)
+        else:
+            self.first_chunk_bytes = max(control.TTS_FIRST_CHUNK_SIZE, self.first_chunk_bytes // 2)
+
+    def get_stats(self) -> dict:
+        return {
+            "format": self.audio_format,
+            "sentences": self.sentences,
+            "avg_first_chunk_ms": round(self.first_chunk_ms_total / self.sentences, 1) if self.sentences else 0.0,
+            "max_first_chunk_ms": round(self.first_chunk_ms_max, 1),
+            "underruns": self.underruns,
+            "first_chunk_bytes": self.first_chunk_bytes,
+            "cache": self.cache.get_stats() if self.cache is not None else {},
+        }
+
+    def _cache_key(self, text: str) -> str:
+        audio_format = self.audio_format
+        if audio_format == "pcm" and control.TTS_PCM_WAV_HEADER:
+            audio_format = "pcm+wav"
+        return phrase_key(text, control.TTS_MODEL, control.TTS_VOICE, control.TTS_SPEED, audio_format)
+
     async def speak(self, text: str) -> AsyncGenerator[bytes, None]:
         """
-        Stream audio with optimized buffering - balance between latency and quality.
-        Uses configurable buffer size to prevent audio breakup while keeping latency low.
+        Stream audio in the session's format, cut on pcm sample boundaries, opus Ogg page boundaries
+        or mp3 frame boundaries (a small first chunk, then growing toward TTS_BUFFER_SIZE).
+        The WAV header / Ogg Opus header pages are only in the sentence's first chunk.
+        Short sentences go through the phrase cache: repeated ones are streamed without a TTS request.
         
         Performance metrics are logged when ENABLE_PERFORMANCE_LOGGING is enabled.
         """
         if not text:
             return
 
+        if self.cache is not None and len(text) <= control.TTS_CACHE_MAX_SENTENCE_CHARS:
+            audio = self.cache.stream(self._cache_key(text), lambda: self._synthesize(text))
+        else:
+            audio = self._synthesize(text)
+        sent = False
+        try:
+            async for chunk in audio:
+                sent = True
+                yield chunk
+            return
+        except TTSSynthesisError:
+            return  # Logged and counted by _synthesize
+        except Exception:
+            # The phrase cache itself failed (e.g. its SQLite tier), not the TTS request
+            metrics.ERRORS.inc(component="tts_cache")
+            logger.exception(f"TTS phrase cache failed for {text!r}")
+            if sent:
+                return
+
+        # Nothing of the sentence was sent yet: synthesize it without the cache
+        try:
+            async for chunk in self._synthesize(text):
+                yield chunk
+        except TTSSynthesisError:
+            pass
+
+    async def _synthesize(self, text: str) -> AsyncGenerator[bytes, None]:
+        """One OpenAI TTS request; raises TTSSynthesisError on failure (after logging it)."""
         start_time = time.time()
         first_chunk_time = None
         total_bytes = 0
         chunks_sent = 0
+        framer = self._framer()
+        clock = PlayoutClock()
         
         try:
-            # Use mp3 format for better streaming support
-            # Buffer chunks to ensure complete mp3 frames for smooth playback
-            buffer = b''
-            buffer_size = control.TTS_BUFFER_SIZE
             
             if control.ENABLE_PERFORMANCE_LOGGING:
-                logger.debug(f"TTS: Starting synthesis for {len(text)} characters")
-                logger.debug(f"TTS: Buffer size: {buffer_size} bytes, Chunk size: {control.TTS_CHUNK_SIZE} bytes")
+                logger.debug(f"TTS: Starting {self.audio_format} synthesis for {len(text)} characters")
             
             async with self.client.audio.speech.with_streaming_response.create(
                 model=control.TTS_MODEL,
                 voice=control.TTS_VOICE,
                 input=text,
-                response_format="mp3",
+                response_format=self.audio_format,  # type: ignore
                 speed=control.TTS_SPEED
             ) as response:
-                async for chunk in response.iter_bytes(chunk_size=control.TTS_CHUNK_SIZE):
-                    if chunk:
-                        buffer += chunk
-                        
-                        # Send buffer when it reaches optimal size
-                        if len(buffer) >= buffer_size:
-                            if first_chunk_time is None:
-                                first_chunk_time = time.time()
-                                if control.ENABLE_PERFORMANCE_LOGGING:
-                                    latency = (first_chunk_time - start_time) * 1000
-                                    logger.debug(f"TTS: First chunk latency: {latency:.1f}ms")
-                            
-                            yield buffer
-                            total_bytes += len(buffer)
-                            chunks_sent += 1
-                            buffer = b''
+                async for data in response.iter_bytes(chunk_size=control.TTS_CHUNK_SIZE):
+                    if not data:
+                        continue
+                    metrics.mark_stage("tts_first_byte")
+                    metrics.mark_stage("tts_last_byte", once=False)
+                    for chunk in framer.feed(data):
+                        if first_chunk_time is None:
+                            first_chunk_time = time.time()
+                            if control.ENABLE_PERFORMANCE_LOGGING:
+                                latency = (first_chunk_time - start_time) * 1000
+                                logger.debug(f"TTS: First chunk latency: {latency:.1f}ms")
+                        clock.on_chunk(time.time(), framer.duration)
+                        yield chunk
+                        total_bytes += len(chunk)
+                        chunks_sent += 1
                 
                 # Send any remaining data
-                if buffer:
+                for chunk in framer.flush():
                     if first_chunk_time is None:
                         first_chunk_time = time.time()
-                    yield buffer
-                    total_bytes += len(buffer)
+                    clock.on_chunk(time.time(), framer.duration)
+                    yield chunk
+                    total_bytes += len(chunk)
                     chunks_sent += 1
             
+            metrics.TTS_BYTES.inc(total_bytes, format=self.audio_format)
+            self._record_sentence(
+                (first_chunk_time - start_time) * 1000 if first_chunk_time else None, clock.underruns
+            )
             # Log performance metrics
             if control.ENABLE_PERFORMANCE_LOGGING:
                 total_time = (time.time() - start_time) * 1000
-                logger.debug(f"TTS: Complete - {total_bytes} bytes in {chunks_sent} chunks, {total_time:.1f}ms total")
+                logger.debug(
+                    f"TTS: Complete - {total_bytes} bytes in {chunks_sent} chunks, {total_time:.1f}ms total, "
+                    f"{clock.underruns} underrun(s)"
+                )
                 if chunks_sent > 0:
                     logger.debug(f"TTS: Avg chunk size: {total_bytes / chunks_sent:.0f} bytes")
 
         except Exception as e:
+            metrics.ERRORS.inc(component="tts")
             logger.error(f"TTS Error: {e}")
             if control.ENABLE_PERFORMANCE_LOGGING:
-                logger.debug(f"TTS: Failed after {(time.time() - start_time) * 1000:.1f}ms")
\ No newline at end of file
+                logger.debug(f"TTS: Failed after {(time.time() - start_time) * 1000:.1f}ms")
+            raise TTSSynthesisError(str(e)) from e
@@ -0,0 +1,254 @@
+import os
+import time
+import array
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Optional
+from src.core import control, metrics
+
+logger = logging.getLogger(__name__)
+
+
+def phrase_key(text: str, model: str, voice: str, speed: float, audio_format: str) -> str:
+    """Content address of a synthesized sentence (whitespace-normalized text + everything that changes the audio)."""
+    text = " ".join(text.split())
+    return hashlib.sha256(f"{model}\x00{voice}\x00{speed}\x00{audio_format}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class DiskAudioCache:
+    """
+    Persistent phrase audio in a local SQLite file (WAL), shared by all workers on the host.
+    Each entry keeps its chunk boundaries, so cached audio replays as the same messages.
+    Oldest rows are pruned past `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS phrases ("
+                "key TEXT PRIMARY KEY, audio BLOB NOT NULL, sizes BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[list[bytes]]:
+        row = self._connect().execute("SELECT audio, sizes FROM phrases WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        audio, sizes = row
+        chunks, offset = [], 0
+        for size in array.array("I", sizes):
+            chunks.append(audio[offset:offset + size])
+            offset += size
+        return chunks
+
+    def put(self, key: str, chunks: list[bytes]):
+        sizes = array.array("I", [len(c) for c in chunks]).tobytes()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO phrases (key, audio, sizes, created_at) VALUES (?, ?, ?, ?)",
+                (key, b"".join(chunks), sizes, time.time())
+            )
+            self._writes += 1
+            # Amortize the size check over many inserts
+            if self._writes >= 100:
+                self._writes = 0
+                conn.execute(
+                    "DELETE FROM phrases WHERE key IN ("
+                    "SELECT key FROM phrases ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+
+class _Flight:
+    """One synthesis shared by every concurrent request for the same phrase."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.consumers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def add(self, chunk: bytes):
+        self.chunks.append(chunk)
+        self._wake()
+
+    def finish(self):
+        self.done = True
+        self._wake()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                return
+            await changed.wait()
+
+
+class PhraseAudioCache:
+    """
+    Content-addressed cache of synthesized sentences: an in-process LRU bounded by bytes, backed by
+    an optional on-disk tier. Cached audio is streamed at once; concurrent misses for the same phrase
+    share one synthesis (it is cancelled when no listener is left, and only complete audio is cached).
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk: Optional[DiskAudioCache] = None):
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self.bytes = 0
+        self._memory: OrderedDict[str, list[bytes]] = OrderedDict()
+        self._inflight: dict[str, _Flight] = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "shared": 0, "misses": 0}
+        self.bytes_saved = 0
+
+    async def stream(self, key: str, synthesize: Callable[[], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """Audio chunks of the phrase: from the cache, from a synthesis in flight, or from `synthesize()`."""
+        chunks = self._memory_get(key)
+        if chunks is None and self.disk is not None:
+            chunks = await asyncio.to_thread(self._disk_get, key)
+            if chunks is not None:
+                self._remember(key, chunks)
+                self._count("disk_hits")
+        elif chunks is not None:
+            self._count("memory_hits")
+        if chunks is not None:
+            self._saved(sum(len(c) for c in chunks))
+            for chunk in chunks:
+                yield chunk
+            return
+
+        flight = self._inflight.get(key)
+        if flight is None:
+            self._count("misses")
+            flight = self._inflight[key] = _Flight()
+            flight.task = asyncio.create_task(self._run(key, flight, synthesize))
+            shared = False
+        else:
+            self._count("shared")
+            shared = True
+
+        flight.consumers += 1
+        try:
+            async for chunk in flight.stream():
+                if shared:
+                    self._saved(len(chunk))
+                yield chunk
+        finally:
+            flight.consumers -= 1
+            if not flight.consumers and not flight.done and flight.task is not None:
+                # Everyone stopped listening (barge-in): stop the synthesis too
+                flight.task.cancel()
+
+    async def _run(self, key: str, flight: _Flight, synthesize):
+        complete = False
+        try:
+            async for chunk in synthesize():
+                flight.add(chunk)
+            complete = True
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"TTS synthesis failed: {e}")
+        finally:
+            flight.finish()
+            self._inflight.pop(key, None)
+        if complete and flight.chunks:
+            self._remember(key, flight.chunks)
+            if self.disk is not None:
+                # Write-back off the critical path
+                asyncio.get_running_loop().run_in_executor(None, self._disk_put, key, flight.chunks)
+
+    def get_stats(self) -> dict:
+        lookups = sum(self.stats.values())
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._memory),
+            "bytes": self.bytes,
+            "bytes_saved": self.bytes_saved,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+        }
+
+    def clear(self):
+        self._memory.clear()
+        self.bytes = 0
+
+    # --- Internals ---
+    def _memory_get(self, key: str) -> Optional[list[bytes]]:
+        chunks = self._memory.get(key)
+        if chunks is not None:
+            self._memory.move_to_end(key)
+        return chunks
+
+    def _remember(self, key: str, chunks: list[bytes]):
+        size = sum(len(c) for c in chunks)
+        if size > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self.bytes -= sum(len(c) for c in previous)
+        self._memory[key] = chunks
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.bytes -= sum(len(c) for c in evicted)
+
+    def _count(self, result: str):
+        self.stats[result] += 1
+        metrics.TTS_CACHE.inc(result=result)
+
+    def _saved(self, size: int):
+        self.bytes_saved += size
+        metrics.TTS_CACHE_BYTES_SAVED.inc(size)
+
+    def _disk_get(self, key: str) -> Optional[list[bytes]]:
+        try:
+            return self.disk.get(key)  # type: ignore
+        except Exception as e:
+            logger.warning(f"TTS disk cache unavailable: {e}")
+            return None
+
+    def _disk_put(self, key: str, chunks: list[bytes]):
+        try:
+            self.disk.put(key, chunks)  # type: ignore
+        except Exception as e:
+            logger.warning(f"TTS disk cache write failed: {e}")
+
+
+@lru_cache(maxsize=1)
+def get_phrase_cache() -> PhraseAudioCache:
+    """Process-wide phrase cache shared by all sessions."""
+    disk = None
+    if control.TTS_CACHE_PATH:
+        disk = DiskAudioCache(control.TTS_CACHE_PATH, control.TTS_CACHE_DISK_MAX_ENTRIES)
+    return PhraseAudioCache(max_bytes=control.TTS_CACHE_MAX_MB * 1024 * 1024, disk=disk)
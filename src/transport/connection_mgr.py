@@ -1,14 +1,17 @@
 import asyncio
 import logging
-import re
+import time
 from datetime import datetime, timezone
 from typing import AsyncGenerator
 from uuid import UUID
 from fastapi import WebSocket, WebSocketDisconnect, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.interfaces import ASRInterface, LLMInterface, TTSInterface
+from src.transport.tts_pipeline import TTSPipeline
+from src.transport.segmenter import TextSegmenter
 from src.db.crud import create_session_log, update_session_log
 from src.core import control
+from src.core import metrics
 
 logger = logging.getLogger(__name__)
 logger.setLevel(control.VOICE_PIPELINE_LOG_LEVEL)
@@ -21,7 +24,8 @@ class ConnectionManager:
         llm: LLMInterface, 
         tts: TTSInterface,
         user_id: UUID | None = None,
-        session_id: str | None = None
+        session_id: str | None = None,
+        fillers=None
     ):
         self.websocket = websocket
         self.asr = asr
@@ -29,13 +33,32 @@ class ConnectionManager:
         self.tts = tts
         self.user_id = user_id
         self.session_id = session_id
+        # Pre-synthesized acknowledgement clips (a FillerBank); None = no filler audio
+        self.fillers = fillers
         # Queue for passing text from ASR -> LLM with input type info
         self.transcription_queue = asyncio.Queue()
+        # Queue for everything sent back to the client: (turn_id, kind, payload)
+        self.outbound_queue = asyncio.Queue()
+        # The in-flight turn (LLM + TTS) and its id; bumped on every new turn or interrupt
+        self.current_turn: asyncio.Task | None = None
+        self.turn_id = 0
+        self.turn_timer: metrics.TurnTimer | None = None
+        # Sentence -> audio stage; a window of 1 synthesizes one sentence at a time
+        self.tts_pipeline = TTSPipeline(
+            tts,
+            window=control.TTS_PIPELINE_WINDOW if control.PARALLEL_TTS_PROCESSING else 1
+        )
 
     async def connect(self, db: AsyncSession):
         await self.websocket.accept()
+        metrics.ACTIVE_SESSIONS.inc()
         logger.info("Client connected")
 
+        # Tell the client how to decode the audio messages (sent before anything else)
+        audio_format = self.tts.get_audio_format()
+        if audio_format:
+            await self.outbound_queue.put((None, "json", {"type": "audio_format", **audio_format}))
+
         # Create session log record
         if self.session_id:
             try:
@@ -50,15 +73,25 @@ class ConnectionManager:
         # 2. Start Independent Tasks
         receive_task = asyncio.create_task(self.receive_audio())
         process_task = asyncio.create_task(self.run_brain())
+        send_task = asyncio.create_task(self.send_output())
 
         try:
             # 3. Keep connection alive
-            await asyncio.gather(receive_task, process_task)
+            await asyncio.gather(receive_task, process_task, send_task)
         except WebSocketDisconnect:
             logger.info("Client disconnected gracefully")
         except Exception as e:
             logger.error(f"Connection error: {e}")
         finally:
+            # Stop the actors that are still running (gather does not cancel siblings)
+            for task in (receive_task, process_task, send_task, self.current_turn):
+                if task and not task.done():
+                    task.cancel()
+            await asyncio.gather(
+                *(t for t in (receive_task, process_task, send_task, self.current_turn) if t),
+                return_exceptions=True
+            )
+
             # --- START: TOKEN USAGE LOGGING ---
             try:
                 # We ask the LLM service for the accumulated stats
@@ -67,6 +100,8 @@ class ConnectionManager:
                 logger.info("--- CALL SUMMARY ---")
                 logger.info(f"Session ID: {self.session_id}")
                 logger.info(f"Token Usage: {stats}")
+                logger.info(f"TTS Pipeline: {self.tts_pipeline.get_stats()}")
+                logger.info(f"TTS Output: {self.tts.get_stats()}")
                 logger.info("--------------------")
                 
                 # Update session log with end time and token usage
@@ -83,6 +118,11 @@ class ConnectionManager:
             # --- END: TOKEN USAGE LOGGING ---
 
             # Cleanup on exit
+            metrics.ACTIVE_SESSIONS.dec()
+            try:
+                await self.llm.release()
+            except Exception as e:
+                logger.warning(f"Could not release LLM session state: {e}")
             await self.asr.stop()
             logger.info("Connection resources cleaned up")
 
@@ -106,8 +146,12 @@ class ConnectionManager:
                             # Bypass ASR, send text directly to brain with input_type marker
                             await self.transcription_queue.put({
                                 "text": data.get("content", ""),
-                                "input_type": "text"
+                                "input_type": "text",
+                                "final_at": time.perf_counter()
                             })
+                        elif data.get("type") == "interrupt":
+                            # Client-side barge-in (e.g. local VAD detected speech)
+                            await self.interrupt()
                     except json.JSONDecodeError:
                         logger.warning("Received invalid JSON text message")
                 
@@ -122,14 +166,73 @@ class ConnectionManager:
             logger.error(f"Error receiving data: {e}")
             raise
 
+    async def send_output(self):
+        """
+        Output Actor: Drains the outbound queue to the WebSocket.
+        Items tagged with a stale turn id were produced by an interrupted turn and are dropped.
+        """
+        while True:
+            turn_id, kind, payload = await self.outbound_queue.get()
+            if turn_id is not None and turn_id != self.turn_id:
+                continue
+
+            if kind in ("bytes", "filler"):
+                await self.websocket.send_bytes(payload)
+                if turn_id is not None and self.turn_timer is not None:
+                    self.turn_timer.mark_first_audio(filler=kind == "filler")
+            else:
+                await self.websocket.send_json(payload)
+
+    def _flush_outbound(self) -> int:
+        """Drop everything still waiting in the outbound queue. Returns the number of items dropped."""
+        dropped = 0
+        while True:
+            try:
+                self.outbound_queue.get_nowait()
+                dropped += 1
+            except asyncio.QueueEmpty:
+                return dropped
+
+    async def interrupt(self) -> bool:
+        """
+        Barge-in: cancel the in-flight turn (LLM stream and TTS HTTP streams),
+        flush queued outbound audio and tell the client to stop playback.
+        Returns True if a turn was actually cancelled.
+        """
+        turn = self.current_turn
+        if turn is None or turn.done():
+            # Nothing in flight: the previous answer finished (or there was none)
+            self.current_turn = None
+            return False
+
+        # Detach the turn and invalidate anything it already queued before awaiting,
+        # so a concurrent interrupt (client frame vs. new transcript) is a no-op
+        self.current_turn = None
+        self.turn_id += 1
+        dropped = self._flush_outbound()
+
+        turn.cancel()
+        try:
+            await turn
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error while cancelling turn: {e}")
+
+        await self.outbound_queue.put((None, "json", {"type": "stop_playback"}))
+        logger.info(f"Turn interrupted ({dropped} queued messages dropped)")
+        return True
+
+    def _turn_finished(self, turn: asyncio.Task):
+        if self.current_turn is turn:
+            self.current_turn = None
+
     async def run_brain(self):
         """
-        Brain & Output Actor:
+        Brain Actor:
         1. Waits for Text from ASR Queue
-        2. Sends to LLM
-        3. Buffers Tokens into Sentences
-        4. Sends to TTS
-        5. Streams Audio back to Client
+        2. Interrupts the previous turn if it is still running (barge-in)
+        3. Starts the new turn as its own cancellable task
         """
         while True:
             # 1. Wait for a final transcript from ASR
@@ -139,87 +242,154 @@ class ConnectionManager:
             if isinstance(queue_item, dict):
                 transcript = queue_item.get("text", "")
                 input_type = queue_item.get("input_type", "voice")
+                final_at = queue_item.get("final_at")
             else:
                 # Legacy: if it's just a string, assume it's from voice
                 transcript = queue_item
                 input_type = "voice"
+                final_at = None
             
             if not transcript:
                 continue
 
+            # 2. A new final transcript always wins over the old answer
+            await self.interrupt()
+
+            # 3. Run the turn in the background so the next transcript can cancel it
+            self.turn_id += 1
+            self.turn_timer = metrics.TurnTimer(started_at=final_at)
+            self.current_turn = asyncio.create_task(
+                self.handle_turn(transcript, input_type, self.turn_id, self.turn_timer)
+            )
+            self.current_turn.add_done_callback(self._turn_finished)
+
+    async def handle_turn(self, transcript: str, input_type: str, turn_id: int, timer: metrics.TurnTimer):
+        """
+        Turn Actor:
+        1. Sends the user's text to the client
+        2. Sends to LLM
+        3. Buffers Tokens into Sentences
+        4. Sends to TTS
+        5. Queues Audio for the client
+        """
+        # Task-local: graph nodes, LLM and TTS calls of this turn mark their stages on it
+        metrics.current_turn_timer.set(timer)
+        filler: asyncio.Task | None = None
+
+        try:
             logger.info(f"User said: {transcript} (input_type: {input_type})")
-            
+
             # Send User Text to Frontend
-            await self.websocket.send_json({
+            await self.outbound_queue.put((turn_id, "json", {
                 "type": "conversation_item",
                 "role": "user",
                 "content": transcript
-            })
+            }))
 
             # 2. Generate Tokens (LLM)
             token_generator = self.llm.generate_response(transcript)
-            
+
             # 3. Buffer Tokens into Sentences (Better TTS quality)
             sentence_generator = self.text_chunker(token_generator)
-            
+
             # 4. Synthesize & Stream (TTS) - Only if input was voice
-            async for sentence in sentence_generator:
-                logger.info(f"Speaking: {sentence}")
-
-                # Send Bot Text to Frontend immediately
-                await self.websocket.send_json({
-                    "type": "conversation_item",
-                    "role": "assistant",
-                    "content": sentence
-                })
-                
-                # Only generate and send audio if the input was voice
-                if input_type == "voice":
-                    # PARALLEL PROCESSING: Start TTS immediately and stream as chunks arrive
-                    # This reduces perceived latency - audio starts playing sooner
-                    async for audio_chunk in self.tts.speak(sentence):
-                        if audio_chunk:
-                            await self.websocket.send_bytes(audio_chunk)
+            if input_type == "voice":
+                # Dead air guard: a filler clip plays if the answer's audio is late
+                answer_started = asyncio.Event()
+                if self.fillers is not None:
+                    filler = asyncio.create_task(self.play_filler(turn_id, timer, answer_started))
+
+                # PIPELINED: upcoming sentences are synthesized while the current one streams,
+                # audio is still queued strictly in sentence order
+                async for sentence, audio_chunk in self.tts_pipeline.stream(sentence_generator):
+                    if audio_chunk is None:
+                        logger.info(f"Speaking: {sentence}")
+                        # Send Bot Text to Frontend as its audio starts
+                        await self.outbound_queue.put((turn_id, "json", {
+                            "type": "conversation_item",
+                            "role": "assistant",
+                            "content": sentence
+                        }))
+                    else:
+                        answer_started.set()
+                        await self.outbound_queue.put((turn_id, "bytes", audio_chunk))
+
+                if control.ENABLE_PERFORMANCE_LOGGING and self.tts_pipeline.last_turn_gaps_ms:
+                    gaps = self.tts_pipeline.last_turn_gaps_ms
+                    logger.debug(f"TTS: Inter-sentence gaps: avg {sum(gaps) / len(gaps):.1f}ms, max {max(gaps):.1f}ms")
+            else:
+                async for sentence in sentence_generator:
+                    # Send Bot Text to Frontend immediately
+                    await self.outbound_queue.put((turn_id, "json", {
+                        "type": "conversation_item",
+                        "role": "assistant",
+                        "content": sentence
+                    }))
+            timer.observe()
+            metrics.TURNS.inc(outcome="completed")
+            if control.ENABLE_PERFORMANCE_LOGGING:
+                logger.debug(f"Turn {turn_id} latency breakdown (ms from end of speech): {timer.offsets_ms()}")
+        except asyncio.CancelledError:
+            metrics.TURNS.inc(outcome="interrupted")
+            raise
+        except Exception as e:
+            metrics.TURNS.inc(outcome="failed")
+            metrics.ERRORS.inc(component="turn")
+            logger.error(f"Turn {turn_id} failed: {e}")
+        finally:
+            if filler is not None:
+                filler.cancel()
+
+    async def play_filler(self, turn_id: int, timer: metrics.TurnTimer, answer_started: asyncio.Event):
+        """
+        Filler Actor: if the answer has no audio FILLER_DELAY_MS after the end of speech,
+        plays a short acknowledgement clip. Chunks are paced to playback (FILLER_LEAD_SECONDS
+        ahead), and the clip stops at the next chunk once the answer's audio is ready, so the
+        answer follows after at most that much filler; a barge-in drops it with the rest of the turn.
+        """
+        delay = control.FILLER_DELAY_MS / 1000 - (time.perf_counter() - timer.started_at)
+        try:
+            await asyncio.wait_for(answer_started.wait(), max(0.0, delay))
+            metrics.FILLER_CLIPS.inc(outcome="not_needed")
+            return
+        except asyncio.TimeoutError:
+            pass
+
+        clip = self.fillers.pick(self.tts.get_audio_format().get("format"))
+        if clip is None:
+            metrics.FILLER_CLIPS.inc(outcome="unavailable")
+            return
+        phrase, chunks, durations = clip
+        logger.info(f"Filler: {phrase}")
+        started = time.perf_counter()
+        queued = 0.0  # Seconds of filler audio sent so far
+        for chunk, duration in zip(chunks, durations):
+            # Hold the next chunk until the client is about to run out of filler audio
+            wait = started + queued - control.FILLER_LEAD_SECONDS - time.perf_counter()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(answer_started.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            if answer_started.is_set():
+                metrics.FILLER_CLIPS.inc(outcome="cut_short")
+                return
+            self.outbound_queue.put_nowait((turn_id, "filler", chunk))
+            queued += duration
+        metrics.FILLER_CLIPS.inc(outcome="played")
 
     async def text_chunker(self, chunks: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
         """
-        Aggregates tokens into full sentences to optimize TTS audio quality.
-        Handles emails, URLs, abbreviations, and decimals intelligently.
+        Aggregates tokens into sentences (or raw word groups) for TTS.
+        Uses an incremental segmenter so each token is scanned once, regardless of answer length.
         """
-        buffer = ""
-        
-        # Pattern to match sentence-ending punctuation that's NOT part of:
-        # - Email addresses (word@word.word)
-        # - URLs (http://example.com or www.example.com)
-        # - Common abbreviations (Dr., Mr., Mrs., Ms., etc.)
-        # - Decimals (3.14)
-        # - File extensions (.txt, .pdf)
-        sentence_end_pattern = re.compile(
-            r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|!)\s+'
-            r'|(?<=\?)\s+'
-            r'|(?<=!)\s+'
-            r'|(?<=:)\s+(?=[A-Z])'  # Colon followed by capital letter
-            r'|(?<=;)\s+'
-        )
-        
+        segmenter = TextSegmenter.from_control()
+
         async for text in chunks:
-            buffer += text
-            
-            # Look for sentence boundaries
-            matches = list(sentence_end_pattern.finditer(buffer))
-            
-            if matches:
-                # Get the position of the last match
-                last_match = matches[-1]
-                sentence_end_pos = last_match.start()
-                
-                # Extract the complete sentence(s)
-                sentence = buffer[:sentence_end_pos].strip()
-                buffer = buffer[sentence_end_pos:].strip()
-                
-                if sentence:
-                    yield sentence
+            for segment in segmenter.feed(text):
+                yield segment
 
         # Yield any remaining content
-        if buffer.strip():
-            yield buffer.strip()
\ No newline at end of file
+        remainder = segmenter.flush()
+        if remainder:
+            yield remainder
@@ -0,0 +1,205 @@
+from src.core import control
+
+# Words that end with a period but do not end a sentence ("Dr. Smith", "e.g. this")
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "mt",
+    "inc", "ltd", "co", "corp", "dept", "approx", "e.g", "i.e",
+}
+
+# Abbreviations only when a number follows ("No. 5", "Fig. 3"); "No. You need a plan." is two sentences
+NUMBER_ABBREVIATIONS = {"no", "fig"}
+
+# Capitalized words that start a sentence, so "plan B. It is cheap." splits after "B."
+# while "J. Smith" (any other capitalized word) keeps the initial
+SENTENCE_STARTERS = {
+    "I", "It", "It's", "Its", "The", "This", "That", "These", "Those", "There", "They", "We", "You",
+    "Your", "Yes", "No", "If", "In", "For", "To", "And", "But", "So", "A", "An", "Our", "He", "She",
+    "What", "How", "Please", "Let", "Here", "Also", "However", "Otherwise", "Then", "Just",
+}
+
+SENTENCE_END = ".?!;:"
+CLAUSE_END = ",—–"
+CLOSING = "\"')]”’"
+
+
+class TextSegmenter:
+    """
+    Incremental streaming segmenter for LLM tokens -> TTS chunks.
+
+    Keeps a scan offset into its buffer, so every character is inspected a constant
+    number of times no matter how long the response gets. Handles abbreviations,
+    initials, decimals (3.14), emails and URLs: a period only ends a sentence when it
+    is followed by whitespace and is not part of a known abbreviation.
+
+    Modes:
+    - "sentence": emit complete sentences (optionally flushing the first chunk early
+      at a clause boundary or after `first_chunk_max_words` words)
+    - "words": raw token-group mode, emit every `group_words` complete words
+    """
+
+    def __init__(
+        self,
+        mode: str = "sentence",
+        first_chunk_flush: bool = False,
+        first_chunk_min_words: int = 3,
+        first_chunk_max_words: int = 10,
+        group_words: int = 6
+    ):
+        self.mode = mode
+        self.first_chunk_flush = first_chunk_flush
+        self.first_chunk_min_words = first_chunk_min_words
+        self.first_chunk_max_words = first_chunk_max_words
+        self.group_words = max(1, group_words)
+
+        self._buffer = ""
+        self._scan = 0       # Next index of _buffer to inspect
+        self._words = 0      # Complete words in _buffer[:_scan]
+        self._emitted = 0    # Segments emitted so far
+
+    @classmethod
+    def from_control(cls) -> "TextSegmenter":
+        """Build a segmenter from control.py settings."""
+        return cls(
+            mode="sentence" if control.ENABLE_SENTENCE_BUFFERING else "words",
+            first_chunk_flush=control.ENABLE_FIRST_CHUNK_FLUSH,
+            first_chunk_min_words=control.FIRST_CHUNK_MIN_WORDS,
+            first_chunk_max_words=control.FIRST_CHUNK_MAX_WORDS,
+            group_words=control.TOKEN_GROUP_WORDS
+        )
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text and return any segments that are now complete."""
+        self._buffer += text
+        segments = []
+
+        while (end := self._find_boundary()) is not None:
+            segment = self._buffer[:end].strip()
+            self._buffer = self._buffer[end:]
+            self._scan = 0
+            self._words = 0
+            if segment:
+                self._emitted += 1
+                segments.append(segment)
+
+        return segments
+
+    def flush(self) -> str | None:
+        """Return whatever is left once the stream has ended."""
+        segment = self._buffer.strip()
+        self._buffer = ""
+        self._scan = 0
+        self._words = 0
+        if segment:
+            self._emitted += 1
+            return segment
+        return None
+
+    def _find_boundary(self) -> int | None:
+        """
+        Scan forward from the saved offset. Returns the end index of the next segment,
+        or None (saving the offset) if more text is needed to decide.
+        """
+        buf = self._buffer
+        size = len(buf)
+        early = self.mode == "sentence" and self.first_chunk_flush and self._emitted == 0
+
+        i = self._scan
+        while i < size:
+            char = buf[i]
+
+            if char.isspace():
+                # A word just ended
+                if i > 0 and not buf[i - 1].isspace():
+                    self._words += 1
+                    if self.mode == "words" and self._words >= self.group_words:
+                        return i
+                    if early and self._words >= self.first_chunk_max_words:
+                        return i
+
+            elif self.mode == "sentence" and (char in SENTENCE_END or (early and char in CLAUSE_END)):
+                # Include closing quotes/brackets in the segment
+                end = i + 1
+                while end < size and buf[end] in CLOSING:
+                    end += 1
+
+                # Need to see what follows before deciding
+                if end >= size:
+                    self._scan = i
+                    return None
+
+                if buf[end].isspace():
+                    if char in CLAUSE_END:
+                        # Words before this clause, counting the one the comma closes
+                        if self._words + 1 >= self.first_chunk_min_words:
+                            return end
+                    elif char == ":":
+                        # Only a boundary when followed by a capitalised word
+                        nxt = end
+                        while nxt < size and buf[nxt].isspace():
+                            nxt += 1
+                        if nxt >= size:
+                            self._scan = i
+                            return None
+                        if buf[nxt].isupper():
+                            return end
+                    elif char != ".":
+                        return end
+                    else:
+                        abbreviation = self._is_abbreviation(i)
+                        if abbreviation is None:
+                            # The next word decides; wait for it
+                            self._scan = i
+                            return None
+                        if not abbreviation:
+                            return end
+
+            i += 1
+
+        self._scan = i
+        return None
+
+    def _is_abbreviation(self, dot: int) -> bool | None:
+        """
+        Check whether the period at `dot` closes an abbreviation or initial.
+        None if that depends on the next word and it has not streamed in completely yet.
+        """
+        start = dot
+        while start > 0 and not self._buffer[start - 1].isspace():
+            start -= 1
+        word = self._buffer[start:dot].lstrip("\"'([“‘")
+        lowered = word.lower()
+        if not word:
+            return False
+        if lowered in ABBREVIATIONS:
+            return True
+        # Dotted acronyms ("U.S.", "a.m.")
+        parts = lowered.split(".")
+        if len(parts) > 1 and all(len(p) == 1 and p.isalpha() for p in parts):
+            return True
+        if lowered not in NUMBER_ABBREVIATIONS and not (len(word) == 1 and word.isupper()):
+            return False
+
+        next_word = self._next_word(dot + 1)
+        if next_word is None:
+            return None
+        if lowered in NUMBER_ABBREVIATIONS:
+            return next_word[:1].isdigit()
+        # A single capital letter: an initial unless the next word starts a sentence
+        if len(next_word) == 2 and next_word[0].isupper() and next_word[1] == ".":
+            return True  # Another initial ("J. R. R. Tolkien")
+        if not next_word[:1].isupper():
+            return True  # Lowercase continuation is no sentence start either
+        return next_word.rstrip(",.;:!?") not in SENTENCE_STARTERS
+
+    def _next_word(self, pos: int) -> str | None:
+        """The word after `pos` (closing marks and whitespace skipped), None if it may still be streaming."""
+        buf = self._buffer
+        size = len(buf)
+        while pos < size and (buf[pos] in CLOSING or buf[pos].isspace()):
+            pos += 1
+        end = pos
+        while end < size and not buf[end].isspace():
+            end += 1
+        if end >= size:
+            return None
+        return buf[pos:end]
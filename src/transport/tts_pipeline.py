@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, AsyncIterable
+from src.core.interfaces import TTSInterface
+from src.core import control
+
+logger = logging.getLogger(__name__)
+logger.setLevel(control.VOICE_PIPELINE_LOG_LEVEL)
+
+class TTSPipeline:
+    """
+    Ordered, concurrent sentence synthesis.
+
+    Starts `tts.speak` for upcoming sentences as soon as they are emitted, keeping at most
+    `window` sentences in flight (synthesizing or buffered), and yields their audio strictly
+    in sentence order. A window of 1 is the classic one-sentence-at-a-time behaviour.
+    """
+
+    def __init__(self, tts: TTSInterface, window: int = 1):
+        self.tts = tts
+        self.window = max(1, window)
+
+        # Inter-sentence gap stats (time between the last chunk of sentence N
+        # and the first chunk of sentence N+1 leaving the pipeline)
+        self.sentences = 0
+        self.gap_count = 0
+        self.gap_ms_total = 0.0
+        self.gap_ms_max = 0.0
+        self.last_turn_gaps_ms: list[float] = []
+
+    async def stream(self, sentences: AsyncIterable[str]) -> AsyncGenerator[tuple[str, bytes | None], None]:
+        """
+        Yields (sentence, None) when a sentence starts playing, then (sentence, chunk)
+        for each of its audio chunks. Cancelling the consumer cancels all in-flight synthesis.
+        """
+        slots = asyncio.Semaphore(self.window)
+        pending: asyncio.Queue = asyncio.Queue()
+        workers: set[asyncio.Task] = set()
+
+        async def synthesize(sentence: str, out: asyncio.Queue):
+            try:
+                async for chunk in self.tts.speak(sentence):
+                    if chunk:
+                        out.put_nowait(chunk)
+            except Exception as e:
+                logger.error(f"TTS pipeline synthesis failed: {e}")
+            finally:
+                out.put_nowait(None)
+
+        async def schedule():
+            try:
+                async for sentence in sentences:
+                    # Bounded window: wait until the oldest sentence has been played out
+                    await slots.acquire()
+                    out: asyncio.Queue = asyncio.Queue()
+                    workers.add(asyncio.create_task(synthesize(sentence, out)))
+                    pending.put_nowait((sentence, out))
+            finally:
+                pending.put_nowait(None)
+
+        scheduler = asyncio.create_task(schedule())
+        self.last_turn_gaps_ms = []
+        last_chunk_at: float | None = None
+
+        try:
+            while (item := await pending.get()) is not None:
+                sentence, out = item
+                self.sentences += 1
+                yield sentence, None
+
+                first = True
+                while (chunk := await out.get()) is not None:
+                    now = time.perf_counter()
+                    if first and last_chunk_at is not None:
+                        self._record_gap((now - last_chunk_at) * 1000)
+                    first = False
+                    yield sentence, chunk
+                    last_chunk_at = time.perf_counter()
+
+                slots.release()
+
+            # Surface errors from the sentence source (e.g. the LLM stream)
+            await scheduler
+        finally:
+            scheduler.cancel()
+            for worker in workers:
+                worker.cancel()
+            # Wait for the sentence source (LLM stream) and TTS streams to unwind, so the
+            # next turn cannot start while this one is still closing them
+            await asyncio.gather(scheduler, *workers, return_exceptions=True)
+
+    def _record_gap(self, gap_ms: float):
+        self.last_turn_gaps_ms.append(gap_ms)
+        self.gap_count += 1
+        self.gap_ms_total += gap_ms
+        self.gap_ms_max = max(self.gap_ms_max, gap_ms)
+
+    def get_stats(self) -> dict:
+        return {
+            "window": self.window,
+            "sentences": self.sentences,
+            "avg_gap_ms": round(self.gap_ms_total / self.gap_count, 1) if self.gap_count else 0.0,
+            "max_gap_ms": round(self.gap_ms_max, 1)
+        }
@@ -46,35 +46,52 @@ with st.sidebar:
     
     if st.button("🚀 Ingest Files", type="primary", disabled=not uploaded_files):
         if uploaded_files:
-            with st.spinner("Processing and ingesting files..."):
-                try:
-                    # Prepare files for upload
-                    files = [("files", (file.name, file.getvalue(), file.type)) for file in uploaded_files]
-                    
-                    # Upload to API with authentication headers
-                    response = requests.post(
-                        f"{API_URL}/api/upload/batch", 
-                        files=files,
-                        headers=get_auth_headers()
-                    )
+            try:
+                # Prepare files for upload
+                files = [("files", (file.name, file.getvalue(), file.type)) for file in uploaded_files]
+                
+                # Upload to API with authentication headers; ingestion continues in the background
+                response = requests.post(
+                    f"{API_URL}/api/upload/batch", 
+                    files=files,
+                    headers=get_auth_headers()
+                )
+                
+                if response.status_code == 202:
+                    st.session_state.ingestion_job = response.json()["status_url"]
+                else:
+                    error_detail = response.json().get('detail', 'Unknown error')
+                    st.error(f"❌ Upload failed: {error_detail}")
                     
-                    if response.status_code == 200:
-                        result = response.json()
-                        st.success(f"✅ Successfully ingested {result['total_documents_ingested']} documents!")
-                        
-                        # Show details
-                        with st.expander("📋 Details"):
-                            for file_result in result['files']:
-                                status_icon = "✅" if file_result['status'] == 'processed' else "❌"
-                                st.write(f"{status_icon} **{file_result['filename']}**: {file_result.get('documents_extracted', 'N/A')} docs")
-                    else:
-                        error_detail = response.json().get('detail', 'Unknown error')
-                        st.error(f"❌ Upload failed: {error_detail}")
-                        
-                except requests.exceptions.ConnectionError:
-                    st.error("❌ Cannot connect to server. Is it running on port 8026?")
-                except Exception as e:
-                    st.error(f"❌ Error: {str(e)}")
+            except requests.exceptions.ConnectionError:
+                st.error("❌ Cannot connect to server. Is it running on port 8026?")
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
+    
+    # Progress of the last upload (polled until the job finishes)
+    if st.session_state.get("ingestion_job"):
+        try:
+            job = requests.get(f"{API_URL}{st.session_state.ingestion_job}", headers=get_auth_headers()).json()
+            if job["status"] in ("queued", "running"):
+                st.info(f"⏳ Ingesting files ({job['status']})...")
+            elif job["status"] == "completed":
+                skipped = f" ({job['total_chunks_skipped']} already indexed)" if job['total_chunks_skipped'] else ""
+                st.success(f"✅ Successfully ingested {job['total_chunks_ingested']} chunks{skipped}!")
+            else:
+                st.warning(f"⚠️ Ingestion {job['status']}: {job['total_chunks_ingested']} chunks ingested")
+            
+            with st.expander("📋 Details", expanded=job["status"] in ("queued", "running")):
+                for file_result in job['files']:
+                    status_icon = {"upserted": "✅", "failed": "❌"}.get(file_result['status'], "⏳")
+                    st.write(f"{status_icon} **{file_result['filename']}**: {file_result['status']} "
+                             f"({file_result['chunks_upserted']}/{file_result['chunks_total']} chunks)")
+            
+            if job["status"] in ("queued", "running"):
+                st.button("🔄 Refresh progress")
+            else:
+                st.session_state.ingestion_job = None
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
     
     st.divider()
     st.caption("💡 Files are automatically processed and stored in the vector database")
@@ -86,7 +103,8 @@ st.title("🤖 Chronos Unified Agent")
 
 # Build WebSocket URL with authentication token
 access_token = st.session_state.get("access_token", "")
-ws_url_with_auth = f"{WS_URL}?session_id={st.session_state.session_id}"
+# mp3: the player below decodes every audio message as a standalone file
+ws_url_with_auth = f"{WS_URL}?session_id={st.session_state.session_id}&audio_format=mp3"
 if access_token:
     ws_url_with_auth += f"&token={access_token}"
 
@@ -224,6 +242,7 @@ js_code = f"""
         let isMicActive = false;
         let audioQueue = [];
         let isPlaying = false;
+        let currentAudio = null;
 
         // --- 1. WebSocket Logic ---
         function connect() {{
@@ -250,6 +269,9 @@ js_code = f"""
                         if (msg.type === "conversation_item") {{
                             addBubble(msg.role, msg.content);
                         }}
+                        else if (msg.type === "stop_playback") {{
+                            stopPlayback();
+                        }}
                     }} catch (e) {{ console.error(e); }}
                 }}
             }};
@@ -338,10 +360,22 @@ js_code = f"""
             isPlaying = true;
             const audioBlob = audioQueue.shift();
             const audio = new Audio(URL.createObjectURL(audioBlob));
-            audio.onended = () => {{ isPlaying = false; playQueue(); }};
+            currentAudio = audio;
+            audio.onended = () => {{ isPlaying = false; currentAudio = null; playQueue(); }};
             await audio.play();
         }}
 
+        // Barge-in: server cancelled the current answer
+        function stopPlayback() {{
+            audioQueue = [];
+            if (currentAudio) {{
+                currentAudio.onended = null;
+                currentAudio.pause();
+                currentAudio = null;
+            }}
+            isPlaying = false;
+        }}
+
         // Init
         connect();
 
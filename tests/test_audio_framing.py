@@ -0,0 +1,69 @@
+import struct
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.services.audio import MP3FrameBuffer, OggPageFramer, PCMFramer, PlayoutClock
+
+def ogg_page(payload: bytes, granule: int, sequence: int) -> bytes:
+    segments = [255] * (len(payload) // 255) + [len(payload) % 255]
+    header = struct.pack("<4sBBqIIIB", b"OggS", 0, 0, granule, 1, sequence, 0, len(segments))
+    return header + bytes(segments) + payload
+
+def feed_in_pieces(framer, data: bytes, size: int) -> list[bytes]:
+    chunks = []
+    for start in range(0, len(data), size):
+        chunks.extend(framer.feed(data[start:start + size]))
+    return chunks + framer.flush()
+
+def test_pcm_chunks_end_on_sample_boundaries_with_header_on_first_only():
+    samples = bytes(range(256)) * 40
+    chunks = feed_in_pieces(PCMFramer(block_align=2, sample_rate=24000, header=b"RIFF"), samples + b"\x01", 333)
+    assert chunks[0].startswith(b"RIFF") and not any(c.startswith(b"RIFF") for c in chunks[1:])
+    assert all(len(c) % 2 == 0 for c in chunks)
+    # Every sample arrives once and in order; the trailing half sample is dropped
+    assert b"".join(chunks)[4:] == samples
+
+def test_ogg_chunks_are_whole_pages_with_headers_in_the_first():
+    head = ogg_page(b"OpusHead" + bytes(11), 0, 0)
+    tags = ogg_page(b"OpusTags" + bytes(300), 0, 1)
+    audio = [ogg_page(bytes([i]) * (100 + 97 * i), 960 * (i + 1), i + 2) for i in range(6)]
+    framer = OggPageFramer()
+    chunks = feed_in_pieces(framer, head + tags + b"".join(audio), 173)
+
+    assert chunks[0].startswith(head + tags + audio[0])
+    assert b"".join(chunks) == head + tags + b"".join(audio)
+    # Each chunk is a run of complete pages
+    pages = set(audio)
+    for chunk in chunks[1:]:
+        while chunk:
+            page = next(p for p in pages if chunk.startswith(p))
+            chunk = chunk[len(page):]
+    assert framer.granule == 960 * 6
+
+def mp3_frames(count: int) -> list[bytes]:
+    # MPEG-2 Layer III, 160 kbit/s, 24 kHz, mono: 480-byte frames of 576 samples
+    return [b"\xff\xf3\xe4\xc4" + bytes([i % 256]) * 476 for i in range(count)]
+
+def test_mp3_chunks_are_whole_frames_and_grow_from_a_small_first_chunk():
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"tags!"
+    frames = mp3_frames(120)
+    buffer = MP3FrameBuffer(first_bytes=1000, max_bytes=8000)
+    chunks = feed_in_pieces(buffer, id3 + b"".join(frames), 701)
+
+    assert b"".join(chunks) == id3 + b"".join(frames)
+    # Sent as soon as 1000 bytes of whole frames are in (the read that completes them may add a frame)
+    assert chunks[0].startswith(id3) and len(chunks[0]) < 1000 + 701 + 480
+    sizes = [len(c) for c in chunks[1:]]
+    assert all((size % 480) == 0 for size in sizes)
+    assert sizes[:3] == sorted(sizes[:3]) and max(sizes) <= 8000 + 701
+    assert abs(buffer.duration - 120 * 576 / 24000) < 1e-9
+
+def test_playout_clock_counts_chunks_that_arrive_after_playback_ran_dry():
+    clock = PlayoutClock()
+    clock.on_chunk(10.0, 0.5)   # plays until 10.5
+    clock.on_chunk(10.4, 1.0)   # in time: plays until 11.0
+    clock.on_chunk(11.3, 1.5)   # 0.3 s of silence: underrun, plays until 11.8
+    clock.on_chunk(11.7, 2.0)
+    assert clock.underruns == 1
@@ -0,0 +1,125 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.core.interfaces import LLMInterface, TTSInterface
+from src.transport.connection_mgr import ConnectionManager
+
+class SlowLLM(LLMInterface):
+    """Streams one sentence per `delay`; its cleanup (like persisting the turn) takes a while."""
+    def __init__(self, delay: float = 0.05, parts: int = 20):
+        self.delay = delay
+        self.parts = parts
+        self.closed: list[str] = []
+
+    async def generate_response(self, query: str):
+        try:
+            for i in range(self.parts):
+                await asyncio.sleep(self.delay)
+                yield f"{query} part {i}. "
+        finally:
+            await asyncio.sleep(0.02)
+            self.closed.append(query)
+
+    def get_usage_stats(self) -> dict:
+        return {}
+
+class SlowTTS(TTSInterface):
+    def __init__(self):
+        self.started: list[str] = []
+        self.closed: list[str] = []
+
+    async def speak(self, text: str):
+        self.started.append(text)
+        try:
+            for i in range(3):
+                yield f"{text}#{i}".encode()
+                await asyncio.sleep(0.01)
+        finally:
+            await asyncio.sleep(0.02)  # Closing the HTTP stream
+            self.closed.append(text)
+
+    def get_audio_format(self) -> dict:
+        return {"format": "pcm"}
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent: list = []
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+    async def send_json(self, data: dict):
+        self.sent.append(data)
+
+def new_manager(llm_delay: float = 0.05, parts: int = 20):
+    websocket = FakeWebSocket()
+    llm, tts = SlowLLM(llm_delay, parts), SlowTTS()
+    return ConnectionManager(websocket, None, llm, tts), websocket, llm, tts  # type: ignore
+
+async def say(manager: ConnectionManager, text: str):
+    await manager.transcription_queue.put({"text": text, "input_type": "voice"})
+
+def test_barge_in_drops_the_old_answer_and_stops_playback():
+    manager, websocket, llm, tts = new_manager()
+
+    async def run():
+        actors = [asyncio.create_task(manager.run_brain()), asyncio.create_task(manager.send_output())]
+        await say(manager, "first")
+        while not any(isinstance(m, bytes) for m in websocket.sent):
+            await asyncio.sleep(0.005)
+        await say(manager, "second")
+        await asyncio.sleep(0.3)
+        for actor in actors:
+            actor.cancel()
+        await manager.interrupt()
+        await asyncio.gather(*actors, return_exceptions=True)
+
+    asyncio.run(run())
+    stop = websocket.sent.index({"type": "stop_playback"})
+    assert websocket.sent.count({"type": "stop_playback"}) == 1
+    after = [m for m in websocket.sent[stop:] if isinstance(m, bytes)]
+    assert after and all(m.startswith(b"second") for m in after)
+    assert any(isinstance(m, bytes) and m.startswith(b"first") for m in websocket.sent[:stop])
+    assert "first" in llm.closed
+
+def test_interrupt_returns_once_llm_and_tts_streams_are_closed():
+    manager, websocket, llm, tts = new_manager(llm_delay=0.01)
+
+    async def run():
+        brain = asyncio.create_task(manager.run_brain())
+        await say(manager, "first")
+        while manager.outbound_queue.qsize() < 4:
+            await asyncio.sleep(0.005)
+        assert await manager.interrupt()
+        # Nothing of the cancelled turn is still unwinding once interrupt() returns
+        closed = list(llm.closed), sorted(tts.started) == sorted(tts.closed)
+        brain.cancel()
+        await asyncio.gather(brain, return_exceptions=True)
+        return closed
+
+    llm_closed, tts_closed = asyncio.run(run())
+    assert llm_closed == ["first"] and tts_closed
+
+def test_new_turn_after_a_finished_one_does_not_stop_playback():
+    manager, websocket, llm, tts = new_manager(llm_delay=0.0, parts=2)
+
+    async def run():
+        actors = [asyncio.create_task(manager.run_brain()), asyncio.create_task(manager.send_output())]
+        await say(manager, "first")
+        while manager.current_turn is None:
+            await asyncio.sleep(0.005)
+        await asyncio.wait_for(asyncio.shield(manager.current_turn), 2)
+        await asyncio.sleep(0)
+        assert manager.current_turn is None  # Cleared when the turn finished
+        await say(manager, "second")
+        await asyncio.sleep(0.2)
+        for actor in actors:
+            actor.cancel()
+        await asyncio.gather(*actors, return_exceptions=True)
+
+    asyncio.run(run())
+    assert {"type": "stop_playback"} not in websocket.sent
+    assert any(isinstance(m, bytes) and m.startswith(b"second") for m in websocket.sent)
@@ -0,0 +1,86 @@
+import sys
+import os
+import operator
+from typing import Annotated, TypedDict
+
+sys.path.append(os.getcwd())
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+from src.brain.checkpointer import BoundedMemorySaver
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+    count: int
+
+def build_graph(checkpointer):
+    def step(state: State):
+        return {"messages": [f"reply {state.get('count', 0)}"], "count": state.get("count", 0) + 1}
+
+    graph = StateGraph(State)
+    graph.add_node("step", step)
+    graph.add_edge(START, "step")
+    graph.add_edge("step", END)
+    return graph.compile(checkpointer=checkpointer)
+
+def run_turns(checkpointer, thread_id: str, turns: int = 3):
+    graph = build_graph(checkpointer)
+    config = {"configurable": {"thread_id": thread_id}}
+    for i in range(turns):
+        graph.invoke({"messages": [f"question {i}"]}, config)
+    return graph, config
+
+def is_typed(value) -> bool:
+    return isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], str) and isinstance(value[1], bytes)
+
+def test_memory_saver_layout_matches_what_bounded_saver_relies_on():
+    # BoundedMemorySaver prunes and measures MemorySaver's internal dicts directly; if a
+    # langgraph-checkpoint upgrade changes this layout, this test fails before the saver does
+    saver = MemorySaver()
+    run_turns(saver, "t1")
+
+    # storage[thread_id][checkpoint_ns][checkpoint_id] = (checkpoint, metadata, parent_id), typed (type, bytes)
+    assert list(saver.storage) == ["t1"]
+    checkpoints = saver.storage["t1"][""]
+    assert len(checkpoints) > 1
+    referenced = set()
+    for saved_checkpoint, saved_metadata, _ in checkpoints.values():
+        assert is_typed(saved_checkpoint) and is_typed(saved_metadata)
+        versions = saver.serde.loads_typed(saved_checkpoint)["channel_versions"]
+        referenced.update(("t1", "", channel, version) for channel, version in versions.items())
+    assert any(key[2] == "messages" for key in referenced)
+
+    # blobs[(thread_id, checkpoint_ns, channel, version)] = typed value
+    assert saver.blobs
+    for key, value in saver.blobs.items():
+        assert len(key) == 4 and key[0] == "t1" and key[1] == ""
+        assert key in referenced and is_typed(value)
+
+    # writes[(thread_id, checkpoint_ns, checkpoint_id)] = {(task_id, idx): (task_id, channel, typed value, ...)}
+    assert saver.writes
+    for key, writes in saver.writes.items():
+        assert len(key) == 3 and key[0] == "t1" and key[2] in checkpoints
+        for write in writes.values():
+            assert is_typed(write[2])
+
+def test_bounded_saver_prunes_to_the_latest_checkpoint_and_keeps_state():
+    saver = BoundedMemorySaver(ttl_seconds=0)
+    graph, config = run_turns(saver, "t1")
+
+    assert len(saver.storage["t1"][""]) == 1
+    assert saver.pruned_checkpoints > 0
+    assert saver.total_bytes > 0
+    # Pruning kept every blob the latest checkpoint needs
+    state = graph.get_state(config).values
+    assert state["count"] == 3 and len(state["messages"]) == 6
+
+def test_release_drops_storage_writes_and_blobs():
+    saver = BoundedMemorySaver(ttl_seconds=0)
+    run_turns(saver, "t1")
+    run_turns(saver, "t2")
+
+    saver.release("t1")
+    assert "t1" not in saver.storage
+    assert not [k for k in saver.blobs if k[0] == "t1"]
+    assert not [k for k in saver.writes if k[0] == "t1"]
+    assert saver.get_stats()["threads"] == 1 and saver.evictions["released"] == 1
@@ -0,0 +1,34 @@
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from langchain_core.documents import Document
+from src.ingestion.chunking import TokenChunker, split_blocks
+
+def test_headings_and_paragraphs_are_blocks():
+    text = "PRICING\n\nThe Basic plan is $29.\nThe Pro plan is $99.\n\n# Support\nWeekdays 9 to 5."
+    assert split_blocks(text) == [
+        ("heading", "PRICING"),
+        ("paragraph", "The Basic plan is $29. The Pro plan is $99."),
+        ("heading", "Support"),
+        ("paragraph", "Weekdays 9 to 5."),
+    ]
+
+def test_long_pages_become_overlapping_token_sized_chunks():
+    body = " ".join(f"Refund rule number {i} applies to annual plans." for i in range(60))
+    pages = [
+        Document(page_content="Refund Policy\n\n" + body, metadata={"page": 0, "user_uuid": "u1"}),
+        Document(page_content="Support\n\nWeekdays 9 to 5.", metadata={"page": 1, "user_uuid": "u1"}),
+    ]
+    chunks = TokenChunker(chunk_tokens=120, overlap_tokens=20, min_tokens=30).split_documents(pages)
+
+    assert len(chunks) > 3
+    assert all(c.metadata["token_count"] <= 130 for c in chunks)
+    assert [c.metadata["chunk_index"] for c in chunks] == list(range(len(chunks)))
+    # Consecutive chunks of the same section overlap
+    assert chunks[1].page_content.split(". ")[0] in chunks[0].page_content
+    # The heading starts a new chunk that keeps its page and section
+    assert chunks[-1].page_content == "Support\n\nWeekdays 9 to 5."
+    assert chunks[-1].metadata == {"page": 1, "user_uuid": "u1", "chunk_index": len(chunks) - 1,
+                                   "token_count": chunks[-1].metadata["token_count"], "section": "Support"}
@@ -0,0 +1,31 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.services import clients
+from src.services.tts import OpenAITTS
+
+def test_sessions_share_one_pool_until_shutdown():
+    first, second = OpenAITTS(), OpenAITTS()
+    assert first.client is second.client is clients.get_openai_client()
+    pool = clients.get_async_http_client()
+    assert first.client._client is pool
+
+    asyncio.run(clients.close_clients())
+    assert pool.is_closed
+    assert clients.get_async_http_client() is not pool and OpenAITTS().client is not first.client
+    assert clients.get_pool_stats()["connections"] == 0
+
+def test_models_and_embeddings_move_to_the_new_pool_after_close():
+    from src.brain import graph, retriever
+
+    llm, summary_llm, embeddings = graph.get_llm(), graph.get_summary_llm(), retriever._get_embeddings()
+    assert graph.get_llm() is llm
+    asyncio.run(clients.close_clients())
+
+    # Lifespan re-entry (another TestClient run, the prewarm benchmark) must not reuse the closed pool
+    assert graph.get_llm() is not llm and graph.get_summary_llm() is not summary_llm
+    assert graph.get_llm().http_async_client is clients.get_async_http_client()
+    assert retriever._get_embeddings() is not embeddings
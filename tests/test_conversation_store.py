@@ -0,0 +1,77 @@
+import asyncio
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from langchain_core.messages import HumanMessage, AIMessage
+from src.db.models import Base
+from src.brain.store import SQLConversationStore, encode_state, decode_state
+
+def make_store(tmp_path) -> tuple[SQLConversationStore, object]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'checkpoints.db'}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return SQLConversationStore(session_factory), engine
+
+def test_compact_format_round_trip():
+    messages = [HumanMessage(content="Hi, I'm Asif."), AIMessage(content="Hello Asif!")]
+    encoded = encode_state({"messages": messages, "summary": "User asked about pricing."})
+
+    assert encoded == {
+        "v": 1,
+        "m": [["h", "Hi, I'm Asif."], ["a", "Hello Asif!"]],
+        "s": "User asked about pricing."
+    }
+    decoded = decode_state(encoded)
+    assert [(m.type, m.content) for m in decoded["messages"]] == [("human", "Hi, I'm Asif."), ("ai", "Hello Asif!")]
+    assert decoded["summary"] == "User asked about pricing."
+
+def test_sql_store_upserts_latest_turn(tmp_path):
+    async def run():
+        store, engine = make_store(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        turn_1 = [HumanMessage(content="What is the Pro plan?"), AIMessage(content="$99/month.")]
+        turn_2 = turn_1 + [HumanMessage(content="And Basic?"), AIMessage(content="$29/month.")]
+
+        assert (await store.load("session_1"))["messages"] == []
+        await store.save("session_1", {"messages": turn_1})
+        await store.save("session_1", {"messages": turn_2, "summary": "Pricing questions."})
+
+        # A second store on the same database (another worker) sees the latest state
+        other_worker, other_engine = make_store(tmp_path)
+        loaded = await other_worker.load("session_1")
+        assert [m.content for m in loaded["messages"]] == [m.content for m in turn_2]
+        assert loaded["summary"] == "Pricing questions."
+
+        await engine.dispose()
+        await other_engine.dispose()
+
+    asyncio.run(run())
+
+def test_anonymous_session_cannot_load_another_users_thread(tmp_path):
+    from src.services.llm import OpenAILLM
+
+    victim = OpenAILLM(thread_id="sess-1", user_uuid="3f0c6a52-7d1e-4b8e-9a51-0c2f1e9b7d44")
+    # An unauthenticated client picking a session id shaped like the victim's key
+    attacker = OpenAILLM(thread_id="3f0c6a52-7d1e-4b8e-9a51-0c2f1e9b7d44:sess-1")
+    victim_key = victim.config["configurable"]["thread_id"]
+    attacker_key = attacker.config["configurable"]["thread_id"]
+    assert attacker_key != victim_key
+
+    async def run():
+        store, engine = make_store(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await store.save(victim_key, {"messages": [HumanMessage(content="My card ends in 4242.")]})
+        loaded = await store.load(attacker_key)
+        await engine.dispose()
+        return loaded
+
+    assert asyncio.run(run())["messages"] == []
@@ -0,0 +1,106 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from src.ingestion.embedder import BatchEmbedder, pack_batches
+
+real_sleep = asyncio.sleep
+
+class RateLimitError(Exception):
+    status_code = 429
+
+class FlakyEmbeddings(Embeddings):
+    """Rejects the first `failures` requests with a 429, then embeds"""
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.requests = 0
+        self.in_flight = self.max_in_flight = 0
+
+    def embed_documents(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await real_sleep(0.01)
+            if self.failures:
+                self.failures -= 1
+                raise RateLimitError("Rate limit reached")
+            return self.embed_documents(texts)
+        finally:
+            self.in_flight -= 1
+
+def test_batches_respect_token_and_input_limits():
+    docs = [Document(page_content="x", metadata={"token_count": n}) for n in [300, 300, 500, 900, 10, 10, 10]]
+    assert pack_batches(docs, max_tokens=1000, max_inputs=2) == [[0, 1], [2], [3, 4], [5, 6]]
+    # A chunk over the token limit still gets a batch of its own
+    assert pack_batches(docs[3:4], max_tokens=100, max_inputs=2) == [[0]]
+
+def test_rate_limits_are_retried_with_lower_concurrency(monkeypatch):
+    sleeps, limits = [], []
+
+    async def fast_sleep(delay):
+        sleeps.append(delay)
+        limits.append(embedder.limiter.limit)
+        await real_sleep(0)
+
+    embeddings = FlakyEmbeddings(failures=3)
+    embedder = BatchEmbedder(embeddings, max_batch_inputs=1, max_concurrency=4, max_retries=5)
+
+    async def run():
+        monkeypatch.setattr("src.ingestion.embedder.asyncio.sleep", fast_sleep)
+        return await asyncio.gather(*(embedder.embed([f"chunk {i}"]) for i in range(8)))
+
+    vectors = asyncio.run(run())
+    assert [v[0][0] for v in vectors] == [7.0] * 8
+    assert embeddings.requests == 8 + 3 and len(sleeps) == 3
+    # Halved on each 429, then grows back as requests succeed
+    assert limits == [2, 1, 1] and embeddings.max_in_flight <= 4
+    assert embedder.limiter.limit > 1
+
+def test_ingestion_embeddings_leave_retries_to_the_limiter(monkeypatch):
+    from src.core import control
+    from src.brain import retriever
+
+    monkeypatch.setattr(control, "ENABLE_EMBEDDING_CACHE", False)
+    retriever.clear_retriever_cache()
+    try:
+        # The SDK would otherwise retry 429s twice before the AdaptiveLimiter sees one
+        assert retriever._get_ingestion_embeddings().max_retries == 0  # type: ignore
+        assert retriever._get_embeddings().max_retries == 2  # type: ignore
+    finally:
+        retriever.clear_retriever_cache()
+
+def test_pinecone_upsert_uses_the_configured_text_key_and_namespace(monkeypatch):
+    from langchain_pinecone import PineconeVectorStore
+    from src.core import control
+    from src.ingestion.embedder import upsert_vectors
+
+    class FakeIndex:
+        config = type("Config", (), {"host": "fake", "api_key": "x"})
+
+        def __init__(self):
+            self.calls = []
+
+        def upsert(self, **kwargs):
+            self.calls.append(kwargs)
+
+    monkeypatch.setattr(control, "PINECONE_TEXT_KEY", "chunk_text")
+    monkeypatch.setattr(control, "PINECONE_NAMESPACE", "tenant-a")
+    index = FakeIndex()
+    store = PineconeVectorStore(index=index, embedding=FlakyEmbeddings(0), text_key="chunk_text", namespace="tenant-a")
+    docs = [Document(page_content="Refunds take 5 days.", metadata={"user_uuid": "u1"})]
+
+    asyncio.run(upsert_vectors(store, docs, [[0.1, 0.2]], ["id-1"]))
+    (call,) = index.calls
+    assert call["namespace"] == "tenant-a"
+    assert call["vectors"] == [{"id": "id-1", "values": [0.1, 0.2], "metadata": {"user_uuid": "u1", "chunk_text": "Refunds take 5 days."}}]
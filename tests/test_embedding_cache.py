@@ -0,0 +1,51 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from langchain_core.embeddings import Embeddings
+from src.brain.embedding_cache import CachedEmbeddings, DiskEmbeddingCache
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [[float(len(t)), 0.5] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def test_repeated_queries_hit_memory_tier():
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, model="m", max_entries=2)
+
+    async def run():
+        await cache.aembed_query("What is the Pro plan?")
+        await cache.aembed_query("  what is the pro plan ")  # same utterance, different ASR formatting
+        await cache.aembed_query("refund policy")
+        await cache.aembed_query("support hours")  # evicts the least recently used entry
+        await cache.aembed_query("what is the pro plan")
+
+    asyncio.run(run())
+    assert inner.calls == 4
+    assert cache.get_stats()["memory_hits"] == 1
+    assert cache.get_stats()["misses"] == 4
+
+def test_disk_tier_is_shared_and_keyed_by_model(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    first = CachedEmbeddings(CountingEmbeddings(), model="m", disk=DiskEmbeddingCache(path))
+    first.embed_documents(["chunk one", "chunk two"])
+
+    # Another worker on the same host
+    inner = CountingEmbeddings()
+    second = CachedEmbeddings(inner, model="m", disk=DiskEmbeddingCache(path))
+    assert second.embed_documents(["chunk two", "chunk three"]) == [[9.0, 0.5], [11.0, 0.5]]
+    assert inner.calls == 1
+    assert second.get_stats()["disk_hits"] == 1
+
+    other_model = CachedEmbeddings(CountingEmbeddings(), model="other", disk=DiskEmbeddingCache(path))
+    other_model.embed_documents(["chunk one"])
+    assert other_model.get_stats()["misses"] == 1
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.core import control, metrics
+from src.core.interfaces import LLMInterface, TTSInterface
+from src.services.filler import FillerBank, clip_chunks
+from src.transport.connection_mgr import ConnectionManager
+
+FILLER = [b"filler-1", b"filler-2"]
+FILLER_DURATIONS = [0.1, 0.1]
+
+class SlowLLM(LLMInterface):
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def generate_response(self, query: str):
+        await asyncio.sleep(self.delay)  # Retrieval + first token
+        yield "Here is the answer."
+
+    def get_usage_stats(self) -> dict:
+        return {}
+
+class FakeTTS(TTSInterface):
+    async def speak(self, text: str):
+        yield b"answer-1"
+        await asyncio.sleep(0.01)
+        yield b"answer-2"
+
+    def get_audio_format(self) -> dict:
+        return {"format": "pcm"}
+
+def run_turn(llm_delay: float, clip: tuple = (FILLER, FILLER_DURATIONS)) -> list[tuple[str, bytes]]:
+    bank = FillerBank(("Sure,",))
+    bank.clips["pcm"] = [("Sure,", *clip)]
+    manager = ConnectionManager(None, None, SlowLLM(llm_delay), FakeTTS(), fillers=bank)  # type: ignore
+
+    async def run():
+        await manager.handle_turn("What does it cost?", "voice", 1, metrics.TurnTimer())
+
+    asyncio.run(run())
+    items = []
+    while not manager.outbound_queue.empty():
+        _, kind, payload = manager.outbound_queue.get_nowait()
+        if kind != "json":
+            items.append((kind, payload))
+    return items
+
+def test_late_answer_follows_the_whole_filler_clip(monkeypatch):
+    monkeypatch.setattr(control, "FILLER_DELAY_MS", 20)
+    assert run_turn(llm_delay=0.3) == [
+        ("filler", b"filler-1"), ("filler", b"filler-2"), ("bytes", b"answer-1"), ("bytes", b"answer-2")
+    ]
+
+def test_answer_ready_mid_clip_cuts_the_filler_short(monkeypatch):
+    monkeypatch.setattr(control, "FILLER_DELAY_MS", 20)
+    monkeypatch.setattr(control, "FILLER_LEAD_SECONDS", 0.0)
+    # A 1 s clip in 0.1 s chunks; the answer is ready ~0.25 s into it
+    chunks = [f"filler-{i}".encode() for i in range(10)]
+    items = run_turn(llm_delay=0.27, clip=(chunks, [0.1] * 10))
+    kinds = [kind for kind, _ in items]
+    assert 1 <= kinds.count("filler") < 5
+    assert kinds == ["filler"] * kinds.count("filler") + ["bytes", "bytes"]
+
+def test_no_filler_when_the_answer_is_ready_in_time(monkeypatch):
+    monkeypatch.setattr(control, "FILLER_DELAY_MS", 500)
+    assert run_turn(llm_delay=0.0) == [("bytes", b"answer-1"), ("bytes", b"answer-2")]
+
+def test_perceived_and_actual_time_to_first_audio():
+    timer = metrics.TurnTimer()
+    assert timer.mark_first_audio(filler=True)
+    assert timer.mark_first_audio()
+    assert not timer.mark_first_audio()
+    assert timer.marks["filler_audio_sent"] <= timer.marks["first_audio_sent"]
+
+def test_mp3_clip_is_recut_into_small_timed_pieces():
+    frame = bytes([0xFF, 0xFB, 0x90, 0x00]) + bytes(413)  # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz
+    data = frame * 40
+    pieces, durations = clip_chunks([data[:5000], data[5000:]], "mp3")
+    assert b"".join(pieces) == data and len(pieces) > 2
+    assert all(len(p) % len(frame) == 0 for p in pieces)
+    assert abs(sum(durations) - 40 * 1152 / 44100) < 1e-9
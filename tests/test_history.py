@@ -0,0 +1,41 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from src.core import control
+from src.brain import graph
+
+def conversation(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages += [HumanMessage(content=f"Question {i}"), AIMessage(content=f"Answer {i}")]
+    return messages
+
+def prompt_contents(monkeypatch, state: dict) -> list[str]:
+    seen = []
+
+    def fake_llm(prompt):
+        seen.extend(prompt.to_messages()[1:])  # After the system prompt
+        return AIMessage(content="ok")
+
+    monkeypatch.setattr(graph, "get_llm", lambda: RunnableLambda(fake_llm))
+    asyncio.run(graph.chatbot_node(state))  # type: ignore
+    return [m.content for m in seen]
+
+def test_turn_outside_window_is_sent_until_summarized(monkeypatch):
+    monkeypatch.setattr(control, "HISTORY_MAX_TURNS", 2)
+    # One turn over the window: too few to summarize yet (HISTORY_SUMMARY_MIN_TURNS), so it must still be sent
+    messages = conversation(2) + [HumanMessage(content="Latest")]
+    contents = prompt_contents(monkeypatch, {"messages": messages, "context": "", "summary": ""})
+    assert contents == ["Question 0", "Answer 0", "Question 1", "Answer 1", "Latest"]
+
+def test_without_summaries_only_the_window_is_sent(monkeypatch):
+    monkeypatch.setattr(control, "HISTORY_MAX_TURNS", 2)
+    monkeypatch.setattr(control, "ENABLE_HISTORY_SUMMARY", False)
+    messages = conversation(2) + [HumanMessage(content="Latest")]
+    contents = prompt_contents(monkeypatch, {"messages": messages, "context": "", "summary": ""})
+    assert contents == ["Question 1", "Answer 1", "Latest"]
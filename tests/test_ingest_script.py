@@ -0,0 +1,85 @@
+import asyncio
+import importlib.util
+import sys
+import os
+from argparse import Namespace
+
+sys.path.append(os.getcwd())
+
+from langchain_core.embeddings import Embeddings
+from src.ingestion import pipeline
+
+spec = importlib.util.spec_from_file_location("ingest_script", os.path.join("scripts", "ingest.py"))
+ingest = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ingest)  # type: ignore
+
+class NoEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0]
+
+def write(path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+def test_find_files_skips_hidden_directories_and_unsupported_files(tmp_path):
+    for name in ("b.md", "a.txt", "sub/c.txt", ".git/d.txt", "notes.xyz"):
+        write(tmp_path / name, "text")
+    found = [os.path.relpath(p, tmp_path) for p in ingest.find_files(str(tmp_path))]
+    assert found == ["a.txt", "b.md", os.path.join("sub", "c.txt")]
+
+def test_rerun_after_interruption_ingests_only_unfinished_files(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    for name in ("a.txt", "b.md", "f.txt", "sub/c.txt"):
+        write(docs / name, f"Contents of {name}")
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    args = Namespace(
+        directory=str(docs), user_uuid=None, checkpoint=str(checkpoint),
+        reset=False, no_registry=True, files_in_flight=1
+    )
+    monkeypatch.setattr(pipeline, "_get_ingestion_embeddings", lambda: NoEmbeddings())
+
+    calls: list[str] = []
+    failing, hanging = {"b.md"}, {"sub/c.txt"}
+    reached = asyncio.Event()
+
+    async def fake_ingest_file(path, file_extension, metadata, progress=None, **kwargs):
+        source = metadata["source"].replace(os.sep, "/")
+        calls.append(source)
+        if source in failing:
+            raise ValueError("No content could be extracted from the file")
+        if source in hanging:
+            reached.set()
+            await asyncio.sleep(3600)  # Interrupted here
+        await progress(status="upserted", chunks_skipped=0)
+        return 1
+
+    monkeypatch.setattr(pipeline, "ingest_file", fake_ingest_file)
+
+    async def interrupted_run():
+        run = asyncio.create_task(ingest.ingest_directory(args))
+        await reached.wait()
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+
+    asyncio.run(interrupted_run())
+    assert calls == ["a.txt", "b.md", "f.txt", "sub/c.txt"]
+
+    # f.txt changed after it was ingested, and the interruption cut the last checkpoint line short
+    write(docs / "f.txt", "Contents of f.txt, second version")
+    with open(checkpoint, "a", encoding="utf-8") as f:
+        f.write('{"path": "')
+
+    calls.clear()
+    failing.clear()
+    hanging.clear()
+    stats = asyncio.run(ingest.ingest_directory(args))
+    # a.txt is done and unchanged; b.md failed, f.txt changed and sub/c.txt never finished
+    assert calls == ["b.md", "f.txt", "sub/c.txt"]
+    assert stats.files == 3 and stats.failed == 0
+
+    calls.clear()
+    asyncio.run(ingest.ingest_directory(args))
+    assert calls == []
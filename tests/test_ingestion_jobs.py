@@ -0,0 +1,236 @@
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from langchain_core.embeddings import Embeddings
+from src.core import control
+from src.db.models import Base, User
+from src.db import crud
+from src.brain.embedding_cache import CachedEmbeddings
+from src.brain.local_index import LocalVectorIndex, LocalVectorStore
+from src.ingestion import pipeline
+from src.ingestion.parsing import shutdown_parse_pool
+from src.ingestion.registry import DocumentRegistry
+from src.ingestion.worker import IngestionWorker
+
+class HashEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        return [float((hash(text) >> i) & 0xFF) + 1.0 for i in range(16)]
+
+async def setup_db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        user = User(email="a@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+    return engine, session_factory, user.id
+
+def spool(tmp_path, name: str, text: str) -> dict:
+    (tmp_path / "uploads").mkdir(exist_ok=True)
+    path = tmp_path / "uploads" / name
+    path.write_text(text, encoding="utf-8")
+    return {"filename": name, "file_type": os.path.splitext(name)[1], "storage_path": str(path)}
+
+def test_worker_ingests_queued_job_with_progress(tmp_path, monkeypatch):
+    store = LocalVectorStore(CachedEmbeddings(HashEmbeddings(), model="test"), LocalVectorIndex(str(tmp_path / "index")))
+    monkeypatch.setattr(pipeline, "_get_vectorstore", lambda: store)
+    monkeypatch.setattr(pipeline, "_get_ingestion_embeddings", lambda: store.embeddings)
+    monkeypatch.setattr(pipeline, "get_lexical_index", lambda: None)
+    monkeypatch.setattr(control, "EMBED_BATCH_MAX_INPUTS", 2)
+
+    paragraphs = "\n\n".join(f"Refund policy paragraph {i}. " + "Refunds cover annual plans. " * 40 for i in range(6))
+
+    async def run():
+        engine, session_factory, user_id = await setup_db(tmp_path)
+        async with session_factory() as db:
+            job = await crud.create_ingestion_job(db, user_id, [
+                spool(tmp_path, "policy.txt", paragraphs),
+                spool(tmp_path, "empty.txt", "   "),
+            ])
+        assert job.status == "queued" and [f.status for f in job.files] == ["queued", "queued"]
+
+        worker = IngestionWorker(session_factory, concurrency=1, worker_id="w1")
+        await worker.run_until_idle()
+
+        async with session_factory() as db:
+            job = await crud.get_ingestion_job(db, job.id, user_id=user_id)
+            other_user = await crud.get_ingestion_job(db, job.id, user_id=user_id.__class__(int=0))
+        await engine.dispose()
+        return job, other_user
+
+    try:
+        job, other_user = asyncio.run(run())
+    finally:
+        shutdown_parse_pool()
+
+    policy, empty = job.files
+    assert job.status == "partial" and job.worker_id == "w1" and job.finished_at is not None
+    assert policy.status == "upserted" and policy.pages == 1
+    assert policy.chunks_total > 2 and policy.chunks_embedded == policy.chunks_upserted == policy.chunks_total
+    assert policy.chunks_per_second > 0
+    assert empty.status == "failed" and "No content" in empty.error
+    assert other_user is None
+    assert not os.path.exists(tmp_path / "uploads")
+    assert len(store.similarity_search("refunds", k=3, filter={"user_uuid": str(job.user_id)})) == 3
+
+def test_jobs_are_claimed_once_and_stale_jobs_requeued(tmp_path):
+    async def run():
+        engine, session_factory, user_id = await setup_db(tmp_path)
+        async with session_factory() as db:
+            job = await crud.create_ingestion_job(db, user_id, [spool(tmp_path, "a.txt", "hello")])
+
+        # Two workers race for one job
+        async def claim(worker_id):
+            async with session_factory() as db:
+                return await crud.claim_ingestion_job(db, worker_id)
+        claims = await asyncio.gather(claim("w1"), claim("w2"))
+        assert sum(c is not None for c in claims) == 1
+
+        # The claiming worker dies: once its heartbeat is stale the job is queued again
+        async with session_factory() as db:
+            assert await crud.requeue_stale_ingestion_jobs(db, datetime.now(timezone.utc) - timedelta(minutes=1), 3) == 0
+            assert await crud.requeue_stale_ingestion_jobs(db, datetime.now(timezone.utc) + timedelta(minutes=1), 3) == 1
+            job = await crud.get_ingestion_job(db, job.id)
+        await engine.dispose()
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == "queued" and job.attempts == 1 and job.worker_id is None
+
+def test_reuploads_skip_known_files_and_chunks(tmp_path, monkeypatch):
+    embedded = []
+
+    class CountingEmbeddings(HashEmbeddings):
+        def embed_documents(self, texts):
+            embedded.extend(texts)
+            return super().embed_documents(texts)
+
+    store = LocalVectorStore(CountingEmbeddings(), LocalVectorIndex(str(tmp_path / "index")))
+    monkeypatch.setattr(pipeline, "_get_vectorstore", lambda: store)
+    monkeypatch.setattr(pipeline, "_get_ingestion_embeddings", lambda: store.embeddings)
+    monkeypatch.setattr(pipeline, "get_lexical_index", lambda: None)
+
+    sections = [f"Section {i}\n\n" + f"Plan {i} details. " * 120 for i in range(4)]
+    edited = sections[:3] + ["Section 3\n\n" + "Updated plan details. " * 120]
+
+    async def run():
+        engine, session_factory, user_id = await setup_db(tmp_path)
+        worker = IngestionWorker(session_factory, concurrency=1)
+        files = []
+        for name, text in [("v1.txt", sections), ("v1-copy.txt", sections), ("v2.txt", edited)]:
+            async with session_factory() as db:
+                job = await crud.create_ingestion_job(db, user_id, [spool(tmp_path, name, "\n\n".join(text))])
+            await worker.run_until_idle()
+            async with session_factory() as db:
+                files.append((await crud.get_ingestion_job(db, job.id)).files[0])
+        await engine.dispose()
+        return files
+
+    try:
+        first, copy, edit = asyncio.run(run())
+    finally:
+        shutdown_parse_pool()
+
+    # Identical file: skipped before parsing, linked to the first upload's document
+    assert first.chunks_skipped == 0 and first.chunks_upserted == first.chunks_total
+    assert copy.status == "upserted" and copy.chunks_upserted == 0
+    assert copy.chunks_skipped == first.chunks_total and copy.document_id == first.document_id
+    # Edited file: only chunks with new text are embedded
+    assert 0 < edit.chunks_upserted < edit.chunks_total
+    assert edit.chunks_skipped + edit.chunks_upserted == edit.chunks_total
+    assert len(embedded) == first.chunks_total + edit.chunks_upserted
+    assert sum(p["rows"] for p in store.index.get_stats().values()) == len(embedded)
+
+def test_replace_and_delete_document(tmp_path, monkeypatch):
+    store = LocalVectorStore(HashEmbeddings(), LocalVectorIndex(str(tmp_path / "index")))
+    monkeypatch.setattr(pipeline, "_get_vectorstore", lambda: store)
+    monkeypatch.setattr(pipeline, "_get_ingestion_embeddings", lambda: store.embeddings)
+    monkeypatch.setattr(pipeline, "get_lexical_index", lambda: None)
+
+    sections = [f"Section {i}\n\n" + f"Plan {i} details. " * 120 for i in range(4)]
+    edited = sections[:2] + ["Section 9\n\n" + "Brand new details. " * 120]
+
+    def live_rows():
+        return sum(p["rows"] - p["deleted"] for p in store.index.get_stats().values())
+
+    async def run():
+        engine, session_factory, user_id = await setup_db(tmp_path)
+        worker = IngestionWorker(session_factory, concurrency=1)
+        registry = DocumentRegistry(session_factory)
+
+        async def ingest(name, text, replaces=None):
+            row = spool(tmp_path, name, "\n\n".join(text))
+            row["replaces_document_id"] = replaces
+            async with session_factory() as db:
+                job = await crud.create_ingestion_job(db, user_id, [row])
+            await worker.run_until_idle()
+            async with session_factory() as db:
+                return (await crud.get_ingestion_job(db, job.id)).files[0]
+
+        first = await ingest("plans.txt", sections)
+        # A second document sharing the first two sections
+        other = await ingest("summary.txt", sections[:2])
+        rows_before = live_rows()
+
+        replaced = await ingest("plans-v2.txt", edited, replaces=first.document_id)
+        rows_replaced = live_rows()
+        async with session_factory() as db:
+            documents = await crud.list_documents(db, user_id)
+
+        # Deleting keeps the chunks "summary.txt" still uses
+        deleted = await pipeline.delete_document(registry, replaced.document_id, str(user_id))
+        missing = await pipeline.delete_document(registry, replaced.document_id, str(user_id))
+        await engine.dispose()
+        return first, other, replaced, documents, rows_before, rows_replaced, deleted, missing
+
+    try:
+        first, other, replaced, documents, rows_before, rows_replaced, deleted, missing = asyncio.run(run())
+    finally:
+        shutdown_parse_pool()
+
+    assert other.chunks_upserted == 0  # All of its chunks were already indexed
+    assert replaced.document_id == first.document_id and replaced.status == "upserted"
+    assert 0 < replaced.chunks_upserted < replaced.chunks_total and replaced.chunks_deleted > 0
+    assert rows_replaced == rows_before + replaced.chunks_upserted - replaced.chunks_deleted
+    assert sorted(d.filename for d in documents) == ["plans-v2.txt", "summary.txt"]
+
+    assert deleted == replaced.chunks_total - other.chunks_total and missing is None
+    assert live_rows() == other.chunks_total
+
+def test_concurrent_identical_uploads_record_one_document(tmp_path):
+    from langchain_core.documents import Document
+
+    async def run():
+        engine, session_factory, user_id = await setup_db(tmp_path)
+        registry = DocumentRegistry(session_factory)
+        chunks = [Document(page_content="Refunds cover annual plans.", metadata={"chunk_hash": "h1"})]
+        results = []
+        for user_uuid in (str(user_id), None):  # Per user and in the shared knowledge base
+            # Both jobs passed find_document before either recorded the file
+            results.append(await asyncio.gather(*(
+                registry.record_document(user_uuid, name, ".txt", "same-hash", chunks, ["v1"])
+                for name in ("a.txt", "b.txt")
+            )))
+        async with session_factory() as db:
+            documents = await crud.list_documents(db, user_id)
+        await engine.dispose()
+        return results, documents
+
+    results, documents = asyncio.run(run())
+    for first, second in results:
+        assert first.id == second.id
+    assert len(documents) == 1
@@ -0,0 +1,80 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+from langchain_core.embeddings import Embeddings
+from src.brain.local_index import LocalVectorIndex, LocalVectorStore
+
+# One axis per word, so documents sharing a word with the query score highest
+VOCABULARY = ["pricing", "refund", "support", "hours", "plan", "policy"]
+
+class BagOfWordsEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(words.count(w)) + 0.01 for w in VOCABULARY]
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_user_filter_and_delete_with_compaction(tmp_path, dtype):
+    store = LocalVectorStore(BagOfWordsEmbeddings(), LocalVectorIndex(str(tmp_path), dtype=dtype, compact_ratio=0.5))
+    ids = store.add_texts(
+        ["pricing plan", "refund policy", "support hours", "pricing plan"],
+        [{"user_uuid": "alice"}, {"user_uuid": "alice"}, {"user_uuid": "alice"}, {"user_uuid": "bob"}]
+    )
+
+    # Same semantics as the Pinecone metadata filter in get_retriever(user_uuid)
+    results = store.similarity_search("pricing", k=4, filter={"user_uuid": "alice"})
+    assert results[0].page_content == "pricing plan"
+    assert all(doc.metadata["user_uuid"] == "alice" for doc in results)
+    assert len(store.similarity_search("pricing", k=4)) == 4
+
+    assert store.delete([ids[0], ids[1]])
+    # Half of alice's rows were deleted, so her partition was compacted
+    assert store.index.get_stats()["alice"] == {"rows": 1, "deleted": 0, "dtype": dtype, "dim": len(VOCABULARY)}
+    assert [doc.page_content for doc in store.similarity_search("pricing", k=4, filter={"user_uuid": "alice"})] == ["support hours"]
+
+    # A second index on the same directory (another worker) sees the same rows
+    other_worker = LocalVectorIndex(str(tmp_path), dtype=dtype)
+    assert len(other_worker.search(BagOfWordsEmbeddings().embed_query("plan"), 4, {"user_uuid": "bob"})) == 1
+
+def test_reads_without_pread_and_deletes_old_generation_once_released(tmp_path, monkeypatch):
+    # Windows: no os.pread, and files that are still mapped cannot be deleted
+    monkeypatch.delattr(os, "pread", raising=False)
+    real_remove = os.remove
+    def remove(path):
+        if os.path.basename(path).startswith("vectors.0."):
+            raise PermissionError(path)
+        real_remove(path)
+    monkeypatch.setattr("src.brain.local_index.os.remove", remove)
+
+    store = LocalVectorStore(BagOfWordsEmbeddings(), LocalVectorIndex(str(tmp_path), compact_ratio=0.5))
+    ids = store.add_texts(["pricing plan", "refund policy"], [{"user_uuid": "alice"}] * 2)
+    assert store.similarity_search("refund", k=1, filter={"user_uuid": "alice"})[0].page_content == "refund policy"
+
+    store.delete([ids[0]])
+    partition_dir = tmp_path / "alice"
+    assert (partition_dir / "vectors.0.bin").exists() and (partition_dir / "vectors.1.bin").exists()
+
+    # The next search refreshes the view onto generation 1 and retries the delete
+    monkeypatch.setattr("src.brain.local_index.os.remove", real_remove)
+    assert [d.page_content for d in store.similarity_search("refund", k=2, filter={"user_uuid": "alice"})] == ["refund policy"]
+    assert sorted(p.name for p in partition_dir.iterdir() if p.name[0] != ".") == ["manifest.json", "meta.1.jsonl", "offsets.1.bin", "vectors.1.bin"]
+
+def test_adding_an_existing_id_replaces_its_row(tmp_path):
+    store = LocalVectorStore(BagOfWordsEmbeddings(), LocalVectorIndex(str(tmp_path), compact_ratio=1.0))
+    alice = {"user_uuid": "alice"}
+    store.add_texts(["pricing plan", "refund policy"], [alice, alice], ids=["a1", "a2"])
+    # A requeued job (or a re-run without the registry) writes the same deterministic ids again
+    store.add_texts(["pricing plan", "pricing plan v2"], [alice, alice], ids=["a1", "a2"])
+    store.add_texts(["pricing plan", "pricing plan"], [alice, alice], ids=["a3", "a3"])
+
+    results = store.similarity_search("pricing plan", k=5, filter=alice)
+    assert sorted((d.id, d.page_content) for d in results) == [
+        ("a1", "pricing plan"), ("a2", "pricing plan v2"), ("a3", "pricing plan")
+    ]
+    assert store.index.get_stats()["alice"]["deleted"] == 2
@@ -0,0 +1,81 @@
+import importlib
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from fastapi.testclient import TestClient
+from src.core import control
+from src.core.metrics import Counter, Gauge, Histogram, Registry, REGISTRY
+
+def test_counter_and_gauge_render_labels():
+    counter = Counter("test_requests_total", "Requests", ("method", "status"))
+    counter.inc(method="GET", status=200)
+    counter.inc(2, method="GET", status=200)
+    counter.inc(method="POST")  # Missing labels render empty
+    gauge = Gauge("test_sessions", "Open sessions")
+    gauge.inc(3)
+    gauge.dec()
+
+    registry = Registry()
+    registry.register(counter)
+    registry.register(gauge)
+    assert registry.render().splitlines() == [
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{method="GET",status="200"} 3',
+        'test_requests_total{method="POST",status=""} 1',
+        "# HELP test_sessions Open sessions",
+        "# TYPE test_sessions gauge",
+        "test_sessions 2",
+    ]
+
+def test_label_values_are_escaped():
+    counter = Counter("test_errors_total", "Errors", ("component",))
+    counter.inc(component='say "hi"\\\nbye')
+    assert counter.render()[-1] == 'test_errors_total{component="say \\"hi\\"\\\\\\nbye"} 1'
+
+def test_histogram_buckets_sum_and_count():
+    histogram = Histogram("test_latency_seconds", "Latency", ("stage",), buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.7, 3.0):
+        histogram.observe(value, stage="llm")
+
+    assert histogram.render() == [
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+        # Buckets are sorted, cumulative and inclusive of their upper bound
+        'test_latency_seconds_bucket{stage="llm",le="0.1"} 2',
+        'test_latency_seconds_bucket{stage="llm",le="0.5"} 2',
+        'test_latency_seconds_bucket{stage="llm",le="1.0"} 3',
+        'test_latency_seconds_bucket{stage="llm",le="+Inf"} 4',
+        'test_latency_seconds_sum{stage="llm"} 3.85',
+        'test_latency_seconds_count{stage="llm"} 4',
+    ]
+
+def test_unlabelled_histogram_has_only_le_label():
+    histogram = Histogram("test_size", "Size", buckets=(10,))
+    histogram.observe(5)
+    assert histogram.render()[2:] == [
+        'test_size_bucket{le="10"} 1',
+        'test_size_bucket{le="+Inf"} 1',
+        "test_size_sum 5.0",
+        "test_size_count 1",
+    ]
+
+def test_metrics_endpoint_follows_the_switch(monkeypatch):
+    import src.main
+
+    try:
+        monkeypatch.setattr(control, "ENABLE_METRICS_ENDPOINT", True)
+        app = importlib.reload(src.main).app
+        response = TestClient(app).get("/metrics")  # Without lifespan: no startup prewarm
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert response.text == REGISTRY.render()
+
+        monkeypatch.setattr(control, "ENABLE_METRICS_ENDPOINT", False)
+        app = importlib.reload(src.main).app
+        assert TestClient(app).get("/metrics").status_code == 404
+    finally:
+        monkeypatch.undo()
+        importlib.reload(src.main)
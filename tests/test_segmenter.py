@@ -0,0 +1,44 @@
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.transport.segmenter import TextSegmenter
+
+def segment(text: str, token_size: int = 3) -> list[str]:
+    """Stream `text` in small tokens, like an LLM, and collect the segments."""
+    segmenter = TextSegmenter()
+    segments = []
+    for i in range(0, len(text), token_size):
+        segments += segmenter.feed(text[i:i + token_size])
+    remainder = segmenter.flush()
+    return segments + ([remainder] if remainder else [])
+
+def test_short_answers_split():
+    assert segment("No. You need a plan.") == ["No.", "You need a plan."]
+    assert segment("Choose plan B. It is cheap.") == ["Choose plan B.", "It is cheap."]
+    assert segment("Yes! It works; try it.") == ["Yes!", "It works;", "try it."]
+
+def test_abbreviations_do_not_split():
+    assert segment("Dr. Smith can see you at 3 p.m. Tuesday. Bring your ID.") == [
+        "Dr. Smith can see you at 3 p.m. Tuesday.", "Bring your ID."
+    ]
+    assert segment("See No. 5 in the list. It covers refunds.") == ["See No. 5 in the list.", "It covers refunds."]
+    assert segment("Use a tool, e.g. a hammer. Done.") == ["Use a tool, e.g. a hammer.", "Done."]
+
+def test_initials_do_not_split():
+    assert segment("The book is by J. R. R. Tolkien. You will love it.") == [
+        "The book is by J. R. R. Tolkien.", "You will love it."
+    ]
+    assert segment("Ask John F. Kennedy. He knows.") == ["Ask John F. Kennedy.", "He knows."]
+
+def test_decimals_urls_and_emails_do_not_split():
+    assert segment("Pi is 3.14 roughly. Visit https://example.com/docs.html today. Mail help@example.co.uk now.") == [
+        "Pi is 3.14 roughly.", "Visit https://example.com/docs.html today.", "Mail help@example.co.uk now."
+    ]
+
+def test_token_size_does_not_change_segments():
+    text = "No. Plan B. It costs $9.99 per month, i.e. cheap. Call Dr. Lee at No. 4 Main St. Thanks!"
+    expected = segment(text, token_size=len(text))
+    for size in (1, 2, 5, 8):
+        assert segment(text, token_size=size) == expected
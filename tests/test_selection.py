@@ -0,0 +1,48 @@
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from langchain_core.documents import Document
+from src.core import control
+from src.brain.selection import mmr_select, select_context
+
+def doc(text: str) -> Document:
+    return Document(page_content=text)
+
+PRO = "The Pro plan costs $99 per month and includes 20 hours of talk time."
+
+def test_threshold_and_near_duplicates_reduce_context(monkeypatch):
+    monkeypatch.setattr(control, "RAG_TOP_K", 4)
+    monkeypatch.setattr(control, "RAG_SIMILARITY_THRESHOLD", 0.3)
+    dense = [
+        (doc(PRO), 0.62),
+        (doc(PRO + " "), 0.61),  # Same chunk ingested twice
+        (doc("Refunds are available within 30 days."), 0.41),
+        (doc("Our office has a nice view."), 0.12),  # Below threshold
+    ]
+    assert [d.page_content for d in select_context(dense, [])] == [PRO, "Refunds are available within 30 days."]
+
+def test_token_budget_sizes_k():
+    long_chunk = "word " * 400
+    candidates = [(doc("short answer about pricing"), 0.9), (doc(long_chunk), 0.8), (doc("another short fact"), 0.7)]
+    selected = mmr_select(candidates, max_docs=5, max_tokens=50)
+    # The long chunk does not fit, so selection stops after the first chunk
+    assert [d.page_content for d in selected] == ["short answer about pricing"]
+
+def test_weak_lexical_hit_does_not_revive_context_below_threshold(monkeypatch):
+    monkeypatch.setattr(control, "RAG_SIMILARITY_THRESHOLD", 0.3)
+    monkeypatch.setattr(control, "RAG_BM25_MIN_SCORE", 5.0)
+    dense = [(doc("Our office has a nice view."), 0.12), (doc(PRO), 0.2)]
+    # Shares the word "plan" with the query, nothing more
+    lexical = [(doc(PRO), 1.3)]
+    assert select_context(dense, lexical) == []
+
+def test_lexical_hits_pass_with_the_dense_threshold_or_a_strong_bm25_score(monkeypatch):
+    monkeypatch.setattr(control, "RAG_TOP_K", 4)
+    monkeypatch.setattr(control, "RAG_SIMILARITY_THRESHOLD", 0.3)
+    monkeypatch.setattr(control, "RAG_BM25_MIN_SCORE", 5.0)
+    sku = "SKU PRO-99-X ships with a headset."
+    dense = [(doc(PRO), 0.55), (doc("Our office has a nice view."), 0.12)]
+    lexical = [(doc(sku), 7.5), (doc(PRO), 1.2), (doc("Our office has a nice view."), 1.0)]
+    assert sorted(d.page_content for d in select_context(dense, lexical)) == sorted([PRO, sku])
@@ -0,0 +1,28 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from langchain_core.messages import AIMessage, HumanMessage
+from src.services.llm import OpenAILLM
+
+def test_sessions_share_the_graph_but_not_their_messages():
+    alice = OpenAILLM("shared-graph-session-a")
+    bob = OpenAILLM("shared-graph-session-b")
+    assert alice.brain_app is bob.brain_app
+
+    async def run():
+        # Write each session's history through the shared graph without calling the LLM
+        for session, name in ((alice, "Alice"), (bob, "Bob")):
+            await session.brain_app.aupdate_state(
+                session.config,  # type: ignore
+                {"messages": [HumanMessage(content=f"My name is {name}."), AIMessage(content=f"Hi {name}.")]},
+                as_node="chatbot"
+            )
+        states = [await session.brain_app.aget_state(session.config) for session in (alice, bob)]  # type: ignore
+        return [[m.content for m in state.values["messages"]] for state in states]
+
+    alice_messages, bob_messages = asyncio.run(run())
+    assert alice_messages == ["My name is Alice.", "Hi Alice."]
+    assert bob_messages == ["My name is Bob.", "Hi Bob."]
@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.services.tts_cache import DiskAudioCache, PhraseAudioCache, phrase_key
+
+CHUNKS = [b"RIFF-header+samples", b"more samples", b"last"]
+
+class FakeTTS:
+    def __init__(self, delay: float = 0.01):
+        self.requests = 0
+        self.delay = delay
+
+    async def synthesize(self):
+        self.requests += 1
+        for chunk in CHUNKS:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+async def collect(cache: PhraseAudioCache, key: str, tts: FakeTTS) -> list[bytes]:
+    return [chunk async for chunk in cache.stream(key, tts.synthesize)]
+
+def test_key_covers_voice_settings_but_not_whitespace():
+    key = phrase_key("Sure,  let me check.", "tts-1", "alloy", 1.1, "mp3")
+    assert key == phrase_key(" Sure, let me check. ", "tts-1", "alloy", 1.1, "mp3")
+    assert key != phrase_key("Sure, let me check.", "tts-1", "nova", 1.1, "mp3")
+    assert key != phrase_key("Sure, let me check.", "tts-1", "alloy", 1.1, "opus")
+
+def test_concurrent_misses_share_one_request_and_repeats_hit(tmp_path):
+    tts = FakeTTS()
+    cache = PhraseAudioCache(disk=DiskAudioCache(str(tmp_path / "tts.sqlite3")))
+
+    async def run():
+        first = await asyncio.gather(*(collect(cache, "greeting", tts) for _ in range(3)))
+        await asyncio.sleep(0.05)  # Disk write-back
+        return first, await collect(cache, "greeting", tts)
+
+    first, again = asyncio.run(run())
+    assert first == [CHUNKS] * 3 and again == CHUNKS
+    assert tts.requests == 1
+    stats = cache.get_stats()
+    assert stats["misses"] == 1 and stats["shared"] == 2 and stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 0.75 and stats["bytes_saved"] == 3 * len(b"".join(CHUNKS))
+
+    # A fresh process finds the phrase on disk, with the same chunk boundaries
+    restarted = PhraseAudioCache(disk=DiskAudioCache(str(tmp_path / "tts.sqlite3")))
+    assert asyncio.run(collect(restarted, "greeting", tts)) == CHUNKS
+    assert tts.requests == 1 and restarted.get_stats()["disk_hits"] == 1
+
+def test_abandoned_synthesis_is_cancelled_and_not_cached():
+    tts = FakeTTS(delay=0.05)
+    cache = PhraseAudioCache()
+
+    async def run():
+        listener = asyncio.create_task(collect(cache, "answer", tts))
+        await asyncio.sleep(0.07)  # First chunk received, then barge-in
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await asyncio.sleep(0.1)
+        return await collect(cache, "answer", tts)
+
+    assert asyncio.run(run()) == CHUNKS
+    assert tts.requests == 2 and cache.get_stats()["misses"] == 2
+
+class BrokenDiskCache(PhraseAudioCache):
+    def _disk_get(self, key):
+        import sqlite3
+        raise sqlite3.OperationalError("database disk image is malformed")
+
+def test_broken_cache_is_logged_and_the_sentence_still_synthesized(tmp_path, caplog):
+    from src.core import metrics
+    from src.services.tts import OpenAITTS, TTSSynthesisError
+
+    tts = OpenAITTS(audio_format="mp3")
+    tts.cache = BrokenDiskCache(disk=DiskAudioCache(str(tmp_path / "tts.sqlite3")))
+    requests = []
+
+    async def synthesize(text):
+        requests.append(text)
+        if text == "Fails.":
+            raise TTSSynthesisError("503")
+        for chunk in CHUNKS:
+            yield chunk
+
+    tts._synthesize = synthesize  # type: ignore
+    errors = lambda: metrics.ERRORS._values.get(("tts_cache",), 0)
+    before = errors()
+
+    async def speak(text):
+        return [chunk async for chunk in tts.speak(text)]
+
+    assert asyncio.run(speak("Sure.")) == CHUNKS
+    assert errors() == before + 1 and "TTS phrase cache failed" in caplog.text
+    # A failed TTS request stays silent: it was logged and counted by _synthesize
+    assert asyncio.run(speak("Fails.")) == []
+    assert requests == ["Sure.", "Fails."]
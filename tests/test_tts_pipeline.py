@@ -0,0 +1,96 @@
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from src.core.interfaces import TTSInterface
+from src.transport.tts_pipeline import TTSPipeline
+
+class DelayedTTS(TTSInterface):
+    """Synthesis takes `delays[sentence]` seconds; records start and finish order."""
+    def __init__(self, delays: dict[str, float], fail: tuple[str, ...] = ()):
+        self.delays = delays
+        self.fail = fail
+        self.started: list[str] = []
+        self.finished: list[str] = []
+
+    async def speak(self, text: str):
+        self.started.append(text)
+        await asyncio.sleep(self.delays.get(text, 0.0))
+        if text in self.fail:
+            raise RuntimeError("synthesis failed")
+        self.finished.append(text)
+        yield f"{text}:1".encode()
+        yield f"{text}:2".encode()
+
+    def get_audio_format(self) -> dict:
+        return {"format": "pcm"}
+
+async def emit(sentences: list[str]):
+    for sentence in sentences:
+        yield sentence
+
+def test_audio_is_yielded_in_sentence_order_when_synthesis_finishes_out_of_order():
+    sentences = ["One.", "Two.", "Three."]
+    tts = DelayedTTS({"One.": 0.15, "Two.": 0.05, "Three.": 0.0})
+    pipeline = TTSPipeline(tts, window=3)
+
+    async def run():
+        return [item async for item in pipeline.stream(emit(sentences))]
+
+    items = asyncio.run(run())
+    assert tts.finished == ["Three.", "Two.", "One."]
+    expected = []
+    for sentence in sentences:
+        expected += [(sentence, None), (sentence, f"{sentence}:1".encode()), (sentence, f"{sentence}:2".encode())]
+    assert items == expected
+    assert pipeline.get_stats()["sentences"] == 3
+
+def test_window_bounds_sentences_in_flight():
+    sentences = [f"Sentence {i}." for i in range(8)]
+    tts = DelayedTTS({})
+    pipeline = TTSPipeline(tts, window=3)
+    in_flight = []
+
+    async def run():
+        played = 0
+        async for sentence, chunk in pipeline.stream(emit(sentences)):
+            if chunk is None:
+                await asyncio.sleep(0.02)  # Slow playback: synthesis runs ahead of it
+                # Started but not yet played out (synthesizing or buffered)
+                in_flight.append(len(tts.started) - played)
+            elif chunk.endswith(b":2"):
+                played += 1
+
+    asyncio.run(run())
+    assert tts.started == sentences
+    assert max(in_flight) == 3
+
+def test_window_of_one_synthesizes_one_sentence_at_a_time():
+    sentences = ["One.", "Two.", "Three."]
+    tts = DelayedTTS({})
+    pipeline = TTSPipeline(tts, window=1)
+    in_flight = []
+
+    async def run():
+        played = 0
+        async for _, chunk in pipeline.stream(emit(sentences)):
+            if chunk is None:
+                await asyncio.sleep(0.01)
+                in_flight.append(len(tts.started) - played)
+            elif chunk.endswith(b":2"):
+                played += 1
+
+    asyncio.run(run())
+    assert in_flight == [1, 1, 1]
+
+def test_failed_sentence_is_skipped_without_stalling_the_rest():
+    tts = DelayedTTS({}, fail=("Two.",))
+    pipeline = TTSPipeline(tts, window=2)
+
+    async def run():
+        return [(s, c) async for s, c in pipeline.stream(emit(["One.", "Two.", "Three."])) if c is not None]
+
+    items = asyncio.run(run())
+    assert [s for s, _ in items] == ["One.", "One.", "Three.", "Three."]
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.getcwd())
+
+pytest.importorskip("resource")  # ru_maxrss (not on Windows)
+
+UPLOAD_MB = 128
+MAX_EXTRA_RSS_MB = 16
+
+# Runs in a fresh interpreter so the peak RSS belongs to this upload only
+SCRIPT = """
+import asyncio, os, resource, sys
+sys.path.append(os.getcwd())
+from tempfile import SpooledTemporaryFile
+from starlette.datastructures import UploadFile
+from src.core import control
+from src.api import upload
+
+control.INGESTION_UPLOAD_DIR = sys.argv[1]
+control.UPLOAD_MAX_FILE_MB = int(sys.argv[2])
+size = int(sys.argv[3]) * 1024 * 1024
+
+# The request body as Starlette's multipart parser leaves it: spooled to a temp file
+source = SpooledTemporaryFile(max_size=1024 * 1024)
+piece = b"x" * (1024 * 1024)
+for _ in range(size // len(piece)):
+    source.write(piece)
+source.seek(0)
+file = UploadFile(source, size=size, filename="report.txt")
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.argv[4] == "spool":
+    result = asyncio.run(upload.spool_files([file]))
+else:
+    content = asyncio.run(file.read())
+    result = [{"storage_path": "", "status": "read"}]
+extra_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) // 1024
+print(extra_mb, result[0].get("status", "queued"), result[0]["storage_path"])
+"""
+
+def run_upload(tmp_path, mode: str, max_file_mb: int = 1024) -> tuple[int, str, str]:
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT, str(tmp_path / "uploads"), str(max_file_mb), str(UPLOAD_MB), mode],
+        capture_output=True, text=True, check=True, cwd=os.getcwd()
+    ).stdout.split()
+    return int(out[0]), out[1], out[2] if len(out) > 2 else ""
+
+def test_spooling_upload_keeps_memory_flat(tmp_path):
+    extra_mb, status, path = run_upload(tmp_path, "spool")
+    print(f"{UPLOAD_MB} MB upload spooled with {extra_mb} MB extra peak RSS")
+    assert status == "queued" and os.path.getsize(path) == UPLOAD_MB * 1024 * 1024
+    assert extra_mb < MAX_EXTRA_RSS_MB
+
+    # Reference point: reading the whole upload costs its full size in RSS
+    extra_mb, _, _ = run_upload(tmp_path, "read")
+    assert extra_mb >= UPLOAD_MB * 0.9
+
+def test_oversized_file_is_rejected_without_leaving_a_temp_file(tmp_path):
+    _, status, path = run_upload(tmp_path, "spool", max_file_mb=UPLOAD_MB // 2)
+    assert status == "failed" and path == ""
+    assert all(not files for _, _, files in os.walk(tmp_path / "uploads"))
+
+def test_two_uploads_with_the_same_name_do_not_collide(tmp_path):
+    _, _, first = run_upload(tmp_path, "spool")
+    _, _, second = run_upload(tmp_path, "spool")
+    assert first != second and os.path.exists(first) and os.path.exists(second)